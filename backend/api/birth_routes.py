@@ -1,20 +1,59 @@
-﻿from typing import List
+﻿import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
 
 from api.dependencies import require_api_key
-from core.ming_pan import analyze_birth, get_palace_metadata_list, get_star_metadata_list
-from core.storage import delete_chart, get_chart, list_charts, save_chart
+from api.response_cache import (
+    SAVED_CHART_CACHE_CONTROL,
+    VARIANT_RECORD,
+    VARIANT_SUMMARY,
+    ResponseCache,
+    get_response_cache,
+)
+from api.responses import (
+    METADATA_ETAG,
+    METADATA_JSON,
+    cached_json_response,
+    encode_chart,
+    encode_chart_record,
+    fast_responses_enabled,
+    json_bytes_response,
+    make_etag,
+)
+from core.chart_codec import CHART_MEDIA_TYPE, encode_chart as encode_compact_chart
+from core.ming_pan import analyze_birth, shared_chart_cache_blocks
+from core import metrics, startup_report
+from core.async_storage import get_async_storage
+from core.storage import ChartSearch, resolve_db_path
+from core.write_behind import get_write_behind, write_behind_enabled
 from models.schemas import (
+    BatchChartItem,
     BirthInfo,
+    BulkSaveResponse,
+    ChartListItem,
     ChartRecord,
     ChartResponse,
+    ChartSearchResponse,
     MetadataResponse,
     SummaryResponse,
 )
 
 router = APIRouter(dependencies=[Depends(require_api_key)])
 
+BATCH_CHUNK_SIZE = 500
+# NDJSON 한 줄과 JSON 배열 본문의 최대 크기. 넘으면 413으로 거부한다.
+MAX_NDJSON_LINE_BYTES = 64 * 1024
+MAX_JSON_BATCH_BYTES = 16 * 1024 * 1024
+# 한 번에 저장할 수 있는 명반 수. 넘으면 검증 단계에서 422로 거부한다.
+MAX_BULK_CHARTS = 10000
+
 
 def _with_chart_id(chart_data: dict, chart_id: int) -> dict:
     updated = dict(chart_data)
@@ -22,34 +61,50 @@ def _with_chart_id(chart_data: dict, chart_id: int) -> dict:
     return updated
 
 
-@router.post("/analyze", response_model=ChartResponse)
-def analyze_birth_chart(payload: BirthInfo) -> ChartResponse:
-    """생년월일시로 자미두수 명반을 계산한다."""
-    result = analyze_birth(
-        year=payload.year,
-        month=payload.month,
-        day=payload.day,
-        hour=payload.hour,
-        is_lunar=payload.is_lunar,
-        is_intercalation=payload.is_intercalation,
-        gender=payload.gender,
-    )
-    return ChartResponse(**result)
+def _encode_cursor(chart_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{chart_id}".encode()).decode().rstrip("=")
 
 
-@router.post("/charts", response_model=ChartRecord, status_code=status.HTTP_201_CREATED)
-def create_chart(payload: BirthInfo) -> ChartRecord:
-    """명반을 계산하고 저장한다."""
-    result = analyze_birth(
-        year=payload.year,
-        month=payload.month,
-        day=payload.day,
-        hour=payload.hour,
-        is_lunar=payload.is_lunar,
-        is_intercalation=payload.is_intercalation,
-        gender=payload.gender,
-    )
-    record = save_chart(payload.model_dump(), result)
+def _decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, value = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        if prefix != "id":
+            raise ValueError(prefix)
+        return int(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from exc
+
+
+def _resolve_before_id(cursor: Optional[str], before_id: Optional[int]) -> Optional[int]:
+    if cursor is not None:
+        return _decode_cursor(cursor)
+    return before_id
+
+
+def _set_next_cursor(response: Response, records: List[dict], limit: int) -> None:
+    if records and len(records) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(records[-1]["id"])
+
+
+def _wants_compact(accept: Optional[str]) -> bool:
+    return accept is not None and CHART_MEDIA_TYPE in accept
+
+
+def _compact_response(body: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=body, status_code=status_code, media_type=CHART_MEDIA_TYPE)
+
+
+def _vary_accept(response: Response) -> Response:
+    # Accept에 따라 본문 형식이 달라지므로 공유 캐시가 형식을 섞지 않게 한다.
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+@metrics.timed("validation")
+def _record_to_model(record: dict) -> ChartRecord:
     chart_data = ChartResponse(**_with_chart_id(record["chart_data"], record["id"]))
     return ChartRecord(
         id=record["id"],
@@ -59,64 +114,465 @@ def create_chart(payload: BirthInfo) -> ChartRecord:
     )
 
 
+def _analyze_payload(payload: BirthInfo) -> dict:
+    try:
+        return analyze_birth(
+            year=payload.year,
+            month=payload.month,
+            day=payload.day,
+            hour=payload.hour,
+            is_lunar=payload.is_lunar,
+            is_intercalation=payload.is_intercalation,
+            gender=payload.gender,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
+
+
+async def _analyze(payload: BirthInfo) -> dict:
+    # 공유 명반 캐시가 소켓이나 파일 잠금을 기다릴 수 있으면 이벤트 루프를 막지 않게 한다.
+    if shared_chart_cache_blocks():
+        return await run_in_threadpool(_analyze_payload, payload)
+    return _analyze_payload(payload)
+
+
+async def _call_cache(cache: ResponseCache, func: Callable[..., Any], *args: Any) -> Any:
+    """메모리 백엔드는 바로 부르고, mmap이나 Redis 백엔드는 스레드 풀에서 부른다."""
+    if cache.blocking:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+def _analyze_payloads(payloads: List[BirthInfo]) -> Any:
+    # numpy를 불러오는 배치 엔진은 첫 배치 요청에서 import해 시작 시간을 줄인다.
+    from core.ming_pan_batch import analyze_births
+
+    return analyze_births(
+        [payload.year for payload in payloads],
+        [payload.month for payload in payloads],
+        [payload.day for payload in payloads],
+        [payload.hour for payload in payloads],
+        [payload.is_lunar for payload in payloads],
+        [payload.is_intercalation for payload in payloads],
+    )
+
+
+@router.post("/analyze", response_model=ChartResponse)
+async def analyze_birth_chart(
+    payload: BirthInfo,
+    response: Response,
+    accept: Optional[str] = Header(default=None),
+) -> Union[ChartResponse, Response]:
+    """생년월일시로 자미두수 명반을 계산한다.
+
+    Accept에 application/x-jami-chart가 있으면 고정 길이 이진 레코드로 반환한다.
+    이진 레코드는 명반만 담으므로 이 형식은 명반만 돌려주는 이 엔드포인트에서만 쓴다.
+    """
+    result = await _analyze(payload)
+    if startup_report.mark("first_analyze"):
+        startup_report.log_startup_report()
+    if _wants_compact(accept):
+        return _vary_accept(_compact_response(encode_compact_chart(result)))
+    if fast_responses_enabled():
+        return _vary_accept(json_bytes_response(encode_chart(result)))
+    _vary_accept(response)
+    with metrics.timer("validation"):
+        return ChartResponse(**result)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """요청 본문을 읽으면서 응답을 내보내는 NDJSON 스트리밍 응답.
+
+    기본 StreamingResponse는 연결 종료를 감시하려고 receive를 소비하므로
+    아직 읽지 않은 요청 본문을 가로챈다. 본문은 엔드포인트가 직접 읽는다.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _render_batch_chunk(chunk: List[Tuple[int, Any]]) -> bytes:
+    items: List[BatchChartItem] = []
+    payloads: List[BirthInfo] = []
+    for index, raw in chunk:
+        try:
+            payloads.append(BirthInfo.model_validate(raw))
+        except ValidationError as exc:
+            items.append(BatchChartItem(index=index, error=str(exc)))
+            continue
+        items.append(BatchChartItem(index=index))
+
+    batch = _analyze_payloads(payloads)
+    position = 0
+    for item in items:
+        if item.error is not None:
+            continue
+        try:
+            item.chart = ChartResponse(**batch.to_dict(position))
+        except ValueError as exc:
+            item.error = str(exc)
+        position += 1
+    return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+
+
+def _payload_too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+async def _iter_ndjson_items(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """본문을 줄 단위로 읽는다.
+
+    새로 받은 조각에서만 줄바꿈을 찾고 아직 끝나지 않은 줄만 보관한다. 한 줄이
+    MAX_NDJSON_LINE_BYTES를 넘으면 413 HTTPException을 낸다.
+    """
+    index = 0
+    tail = bytearray()
+    async for data in request.stream():
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            if len(tail) + end - start > MAX_NDJSON_LINE_BYTES:
+                raise _payload_too_large(f"{index}번째 줄이 너무 길다.")
+            if tail:
+                tail += data[start:end]
+                line = bytes(tail)
+                tail.clear()
+            else:
+                line = data[start:end]
+            if line.strip():
+                yield index, _decode_ndjson_line(line)
+                index += 1
+            start = end + 1
+        if len(tail) + len(data) - start > MAX_NDJSON_LINE_BYTES:
+            raise _payload_too_large(f"{index}번째 줄이 너무 길다.")
+        tail += data[start:]
+    if tail.strip():
+        yield index, _decode_ndjson_line(bytes(tail))
+
+
+def _decode_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode("utf-8", errors="replace")
+
+
+async def _iter_json_items(items: List[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    for index, raw in enumerate(items):
+        yield index, raw
+
+
+async def _read_json_list(request: Request) -> List[Any]:
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_JSON_BATCH_BYTES:
+        raise _payload_too_large("요청 본문이 너무 크다.")
+    body = bytearray()
+    async for data in request.stream():
+        body += data
+        if len(body) > MAX_JSON_BATCH_BYTES:
+            raise _payload_too_large("요청 본문이 너무 크다.")
+    try:
+        items = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON"
+        ) from exc
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Expected a JSON array of birth infos",
+        )
+    return items
+
+
+@router.post("/analyze/batch", response_class=NDJSONStreamingResponse)
+async def analyze_birth_chart_batch(request: Request) -> NDJSONStreamingResponse:
+    """여러 명반을 계산해 NDJSON으로 스트리밍한다.
+
+    JSON 배열 또는 NDJSON(application/x-ndjson) 본문을 받는다. 결과는 입력
+    순서대로 한 줄에 하나씩 index와 chart 또는 error를 담아 반환한다.
+
+    너무 긴 NDJSON 줄이 첫 줄이면 413을 반환하고, 응답을 보내기 시작한 뒤라면
+    그 줄의 index와 error를 담은 마지막 줄을 쓰고 멈춘다.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type:
+        items = _iter_ndjson_items(request)
+    else:
+        items = _iter_json_items(await _read_json_list(request))
+    # 첫 항목을 응답 전에 읽어 첫 줄의 413은 상태 코드로 돌려준다.
+    first = await anext(items, None)
+
+    async def render() -> AsyncIterator[bytes]:
+        chunk: List[Tuple[int, Any]] = [] if first is None else [first]
+        next_index = 0 if first is None else first[0] + 1
+        try:
+            async for item in items:
+                chunk.append(item)
+                next_index = item[0] + 1
+                if len(chunk) >= BATCH_CHUNK_SIZE:
+                    yield await run_in_threadpool(_render_batch_chunk, chunk)
+                    chunk = []
+        except HTTPException as exc:
+            if chunk:
+                yield await run_in_threadpool(_render_batch_chunk, chunk)
+            error = BatchChartItem(index=next_index, error=str(exc.detail))
+            yield error.model_dump_json().encode() + b"\n"
+            return
+        if chunk:
+            yield await run_in_threadpool(_render_batch_chunk, chunk)
+
+    return NDJSONStreamingResponse(render())
+
+
+async def _load_record(chart_id: int) -> Optional[dict]:
+    """아직 커밋되지 않은 지연 기록 레코드까지 포함해 저장된 차트를 찾는다."""
+    if write_behind_enabled():
+        record = get_write_behind().get_pending(chart_id)
+        if record is not None:
+            return record
+    return await get_async_storage().get_chart(chart_id)
+
+
+def _is_pending(chart_id: int) -> bool:
+    return write_behind_enabled() and get_write_behind().get_pending(chart_id) is not None
+
+
+async def _load_summary(chart_id: int) -> Optional[dict]:
+    """저장된 차트의 요약 필드만 읽는다. 명반 본문은 디코딩하지 않는다."""
+    if write_behind_enabled():
+        record = get_write_behind().get_pending(chart_id)
+        if record is not None:
+            return {"id": record["id"], **record["chart_data"]}
+    return await get_async_storage().get_chart_summary(chart_id)
+
+
+async def _saved_chart_response(
+    chart_id: int,
+    variant: str,
+    load: Callable[[int], Awaitable[Optional[Any]]],
+    encode: Callable[[Any], bytes],
+    if_none_match: Optional[str],
+) -> Response:
+    """저장된 차트의 인코딩한 응답을 캐시에서 꺼내거나 만들어 ETag와 함께 반환한다.
+
+    지연 기록이 아직 커밋하지 않은 레코드는 저장이 실패할 수 있으므로 캐시하지 않는다.
+    캐시에 넣은 뒤 행이 사라졌으면 그 사이 삭제가 끝난 것이므로 넣은 본문을 다시 지운다.
+    """
+    cache = get_response_cache()
+    key = (str(resolve_db_path()), chart_id, variant)
+    entry = await _call_cache(cache, cache.get, key)
+    if entry is None:
+        loaded = await load(chart_id)
+        if loaded is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+        body = encode(loaded)
+        if _is_pending(chart_id):
+            entry = (body, make_etag(body))
+        else:
+            entry = await _call_cache(cache, cache.put, key, body)
+            if not await get_async_storage().chart_exists(chart_id):
+                await _call_cache(cache, cache.invalidate, key[0], chart_id)
+    body, etag = entry
+    return cached_json_response(body, etag, if_none_match, SAVED_CHART_CACHE_CONTROL)
+
+
+def _encode_summary(summary: dict) -> bytes:
+    return SummaryResponse(
+        chart_id=summary["id"],
+        summary=summary["summary"],
+        ming_gong=summary["ming_gong"],
+        guo_shu=summary["guo_shu"],
+        jami_position=summary["jami_position"],
+    ).model_dump_json().encode()
+
+
+@router.post("/charts", response_model=ChartRecord, status_code=status.HTTP_201_CREATED)
+async def create_chart(payload: BirthInfo) -> Union[ChartRecord, Response]:
+    """명반을 계산하고 저장한다."""
+    result = await _analyze(payload)
+    if write_behind_enabled():
+        # ID 구간 예약이 DB 잠금을 기다릴 수 있어 이벤트 루프 밖에서 넣는다.
+        record = await run_in_threadpool(
+            get_write_behind().submit, payload.model_dump(), result
+        )
+    else:
+        record = await get_async_storage().save_chart(payload.model_dump(), result)
+    if fast_responses_enabled():
+        return json_bytes_response(
+            encode_chart_record(record), status_code=status.HTTP_201_CREATED
+        )
+    return _record_to_model(record)
+
+
+@router.post(
+    "/charts/bulk",
+    response_model=BulkSaveResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_charts_bulk(
+    payloads: List[BirthInfo] = Body(max_length=MAX_BULK_CHARTS),
+    chunk_size: int = Query(default=500, ge=1, le=5000),
+) -> BulkSaveResponse:
+    """여러 명반을 계산해 하나의 트랜잭션으로 저장하고 ID를 입력 순서대로 반환한다.
+
+    배치 계산은 스레드 풀에서 돌려 큰 요청이 다른 요청을 막지 않게 한다.
+    """
+    batch = await run_in_threadpool(_analyze_payloads, payloads)
+    invalid = batch.invalid_indexes()
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "유효하지 않은 날짜가 있다.", "indexes": invalid},
+        )
+    ids = await get_async_storage().save_charts_bulk(
+        (
+            (payload.model_dump(), batch.to_dict(index))
+            for index, payload in enumerate(payloads)
+        ),
+        chunk_size=chunk_size,
+    )
+    return BulkSaveResponse(ids=ids)
+
+
 @router.get("/charts", response_model=List[ChartRecord])
-def list_saved_charts(
+async def list_saved_charts(
+    response: Response,
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    before_id: Optional[int] = Query(default=None, ge=1),
+) -> Union[List[ChartRecord], Response]:
+    """저장된 차트 목록을 반환한다.
+
+    다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 돌려준다. cursor나
+    before_id를 주면 OFFSET 대신 ID 인덱스로 바로 이어서 조회한다. 이진 레코드는
+    출생 정보와 저장 시각을 담지 못하므로 저장 레코드는 항상 JSON으로 반환한다.
+    """
+    records = await get_async_storage().list_charts(
+        limit=limit, offset=offset, before_id=_resolve_before_id(cursor, before_id)
+    )
+    if fast_responses_enabled():
+        body = b"[" + b",".join(encode_chart_record(record) for record in records) + b"]"
+        response = json_bytes_response(body)
+        _set_next_cursor(response, records, limit)
+        return response
+    _set_next_cursor(response, records, limit)
+    return [_record_to_model(record) for record in records]
+
+
+@router.get("/charts/summaries", response_model=List[ChartListItem])
+async def list_saved_chart_summaries(
+    response: Response,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-) -> List[ChartRecord]:
-    """저장된 차트 목록을 반환한다."""
-    records = list_charts(limit=limit, offset=offset)
-    response: List[ChartRecord] = []
-    for record in records:
-        chart_data = ChartResponse(
-            **_with_chart_id(record["chart_data"], record["id"])
+    cursor: Optional[str] = Query(default=None),
+    before_id: Optional[int] = Query(default=None, ge=1),
+) -> List[ChartListItem]:
+    """명반 본문 없이 요약 필드만 담은 저장 차트 목록을 반환한다."""
+    records = await get_async_storage().list_chart_summaries(
+        limit=limit, offset=offset, before_id=_resolve_before_id(cursor, before_id)
+    )
+    _set_next_cursor(response, records, limit)
+    return [ChartListItem(**record) for record in records]
+
+
+@router.get("/charts/search", response_model=ChartSearchResponse)
+async def search_saved_charts(
+    response: Response,
+    ming_gong: Optional[int] = Query(default=None, ge=1, le=12),
+    guo_shu: Optional[int] = Query(default=None, ge=1, le=5),
+    jami_position: Optional[int] = Query(default=None, ge=1, le=12),
+    hour_branch: Optional[int] = Query(default=None, ge=1, le=12),
+    lunar_year: Optional[int] = Query(default=None, ge=1),
+    lunar_month: Optional[int] = Query(default=None, ge=1, le=12),
+    lunar_day: Optional[int] = Query(default=None, ge=1, le=30),
+    is_intercalation: Optional[bool] = Query(default=None),
+    created_from: Optional[str] = Query(default=None),
+    created_to: Optional[str] = Query(default=None),
+    star: Optional[str] = Query(default=None),
+    star_palace: Optional[int] = Query(default=None, ge=1, le=12),
+    group_by: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=0, le=100),
+    cursor: Optional[str] = Query(default=None),
+) -> ChartSearchResponse:
+    """명궁, 국수, 자미성 위치, 음력 생일, 저장 시각, 주성 위치로 차트를 검색한다.
+
+    예: star=자미 는 명궁에 자미성이 있는 차트를 찾는다. group_by를 주면 그 필드
+    값별 개수를 함께 반환하고, limit=0이면 개수만 반환한다.
+    """
+    if star_palace is not None and star is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="star_palace는 star와 함께 지정해야 한다.",
         )
-        response.append(
-            ChartRecord(
-                id=record["id"],
-                created_at=record["created_at"],
-                birth_info=BirthInfo(**record["birth_info"]),
-                chart_data=chart_data,
-            )
+    search = ChartSearch(
+        ming_gong=ming_gong,
+        guo_shu=guo_shu,
+        jami_position=jami_position,
+        hour_branch=hour_branch,
+        lunar_year=lunar_year,
+        lunar_month=lunar_month,
+        lunar_day=lunar_day,
+        is_intercalation=is_intercalation,
+        created_from=created_from,
+        created_to=created_to,
+        star=star,
+        star_palace=star_palace,
+    )
+    try:
+        result = await get_async_storage().search_charts(
+            search,
+            limit=limit,
+            before_id=_resolve_before_id(cursor, None),
+            group_by=group_by,
         )
-    return response
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
+    _set_next_cursor(response, result["items"], limit)
+    return ChartSearchResponse(**result)
 
 
 @router.get("/charts/{chart_id}", response_model=ChartRecord)
-def get_saved_chart(chart_id: int) -> ChartRecord:
-    """저장된 차트를 반환한다."""
-    record = get_chart(chart_id)
-    if record is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-    chart_data = ChartResponse(**_with_chart_id(record["chart_data"], record["id"]))
-    return ChartRecord(
-        id=record["id"],
-        created_at=record["created_at"],
-        birth_info=BirthInfo(**record["birth_info"]),
-        chart_data=chart_data,
+async def get_saved_chart(
+    chart_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    """저장된 차트를 반환한다.
+
+    인코딩한 응답을 차트 ID별로 캐시하고, If-None-Match가 ETag와 같으면 304를 반환한다.
+    이진 레코드는 출생 정보와 저장 시각을 담지 못하므로 Accept와 상관없이 JSON으로 반환한다.
+    """
+    return await _saved_chart_response(
+        chart_id, VARIANT_RECORD, _load_record, encode_chart_record, if_none_match
     )
 
 
 @router.delete("/charts/{chart_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_saved_chart(chart_id: int) -> None:
+async def delete_saved_chart(chart_id: int) -> None:
     """저장된 차트를 삭제한다."""
-    deleted = delete_chart(chart_id)
-    if not deleted:
+    if write_behind_enabled():
+        await run_in_threadpool(get_write_behind().flush)
+    if not await get_async_storage().delete_chart(chart_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    cache = get_response_cache()
+    await _call_cache(cache, cache.invalidate, str(resolve_db_path()), chart_id)
 
 
 @router.post("/summary", response_model=SummaryResponse)
-def summarize_birth(payload: BirthInfo) -> SummaryResponse:
+async def summarize_birth(payload: BirthInfo) -> SummaryResponse:
     """명반 요약을 반환한다."""
-    result = analyze_birth(
-        year=payload.year,
-        month=payload.month,
-        day=payload.day,
-        hour=payload.hour,
-        is_lunar=payload.is_lunar,
-        is_intercalation=payload.is_intercalation,
-        gender=payload.gender,
-    )
+    result = await _analyze(payload)
     return SummaryResponse(
         summary=result["summary"],
         ming_gong=result["ming_gong"],
@@ -126,25 +582,21 @@ def summarize_birth(payload: BirthInfo) -> SummaryResponse:
 
 
 @router.get("/summary/{chart_id}", response_model=SummaryResponse)
-def summarize_saved_chart(chart_id: int) -> SummaryResponse:
-    """저장된 명반 요약을 반환한다."""
-    record = get_chart(chart_id)
-    if record is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-    chart_data = record["chart_data"]
-    return SummaryResponse(
-        chart_id=record["id"],
-        summary=chart_data["summary"],
-        ming_gong=chart_data["ming_gong"],
-        guo_shu=chart_data["guo_shu"],
-        jami_position=chart_data["jami_position"],
+async def summarize_saved_chart(
+    chart_id: int, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """저장된 명반 요약을 반환한다. 궁 배치와 메타데이터는 읽지 않는다."""
+    return await _saved_chart_response(
+        chart_id, VARIANT_SUMMARY, _load_summary, _encode_summary, if_none_match
     )
 
 
 @router.get("/metadata", response_model=MetadataResponse)
-def get_metadata() -> MetadataResponse:
+async def get_metadata(if_none_match: Optional[str] = Header(default=None)) -> Response:
     """14주성/12궁 메타데이터를 반환한다."""
-    return MetadataResponse(
-        stars_meta=get_star_metadata_list(),
-        palace_meta=get_palace_metadata_list(),
+    return cached_json_response(
+        METADATA_JSON,
+        METADATA_ETAG,
+        if_none_match,
+        cache_control="public, max-age=86400",
     )
@@ -0,0 +1,97 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from api.responses import make_etag
+from core.cache_backends import CacheBackend, create_cache_backend
+from core.ming_pan import get_engine_version
+
+# 저장된 차트는 삭제 전까지 바뀌지 않지만 삭제될 수 있으므로, 클라이언트가 매번
+# If-None-Match로 재검증하게 해 304로 본문 전송만 아낀다.
+SAVED_CHART_CACHE_CONTROL = "private, no-cache"
+
+VARIANT_RECORD = "record"
+VARIANT_SUMMARY = "summary"
+_VARIANTS = (VARIANT_RECORD, VARIANT_SUMMARY)
+
+# (DB 경로, 차트 ID, 응답 형식)
+ResponseKey = Tuple[str, int, str]
+# (인코딩한 본문, ETag)
+CachedResponse = Tuple[bytes, str]
+
+
+def _cache_key(db_path: str, chart_id: int, variant: str) -> str:
+    # 공유 백엔드에는 배포 전 엔진으로 만든 본문이 남아 있을 수 있으므로 버전을 키에 넣는다.
+    return f"{get_engine_version()}:{db_path}:{chart_id}:{variant}"
+
+
+class ResponseCache:
+    """저장된 차트의 인코딩한 응답 본문과 ETag를 캐시 백엔드에 보관한다.
+
+    값은 ETag, 줄바꿈, 본문 순서로 이어 붙인다. 메모리 백엔드는 프로세스마다 따로
+    두므로 다른 워커의 삭제가 반영되지 않는다. 여러 워커가 함께 쓰려면 mmap이나
+    redis 백엔드를 설정한다.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    @property
+    def blocking(self) -> bool:
+        """백엔드 호출이 이벤트 루프를 막을 수 있으면 참이다."""
+        return self.backend.blocking
+
+    def get(self, key: ResponseKey) -> Optional[CachedResponse]:
+        value = self.backend.get(_cache_key(*key))
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return body, etag.decode()
+
+    def put(self, key: ResponseKey, body: bytes) -> CachedResponse:
+        """본문의 ETag를 계산해 보관하고 (본문, ETag)를 반환한다."""
+        etag = make_etag(body)
+        self.backend.set(_cache_key(*key), etag.encode() + b"\n" + body)
+        return body, etag
+
+    def invalidate(self, db_path: str, chart_id: int) -> None:
+        """삭제한 차트의 모든 응답 형식을 지운다."""
+        for variant in _VARIANTS:
+            self.backend.delete(_cache_key(db_path, chart_id, variant))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+
+_RESPONSE_CACHE: Optional[ResponseCache] = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """저장 차트 응답 캐시를 반환한다. 처음 부를 때 CACHE_BACKEND 설정으로 만든다."""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        with _RESPONSE_CACHE_LOCK:
+            if _RESPONSE_CACHE is None:
+                backend = create_cache_backend(
+                    "responses", int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+                )
+                _RESPONSE_CACHE = ResponseCache(backend)
+    return _RESPONSE_CACHE
+
+
+def get_response_cache_stats() -> Dict[str, int]:
+    """응답 캐시의 크기와 적중/실패/축출 횟수를 반환한다."""
+    return get_response_cache().stats()
+
+
+def close_response_cache() -> None:
+    """응답 캐시 백엔드의 파일이나 연결을 닫는다."""
+    global _RESPONSE_CACHE
+    with _RESPONSE_CACHE_LOCK:
+        if _RESPONSE_CACHE is not None:
+            _RESPONSE_CACHE.backend.close()
+            _RESPONSE_CACHE = None
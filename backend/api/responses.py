@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response, status
+
+from core import metrics
+from core.ming_pan import get_palace_metadata_list, get_star_metadata_list
+from models.schemas import BirthInfo, ChartResponse, MetadataResponse
+
+_CHART_FIELDS = tuple(ChartResponse.model_fields)
+_BIRTH_INFO_FIELDS = tuple(BirthInfo.model_fields)
+
+_METADATA = MetadataResponse(
+    stars_meta=get_star_metadata_list(),
+    palace_meta=get_palace_metadata_list(),
+)
+
+# 응답마다 다시 검증/직렬화하지 않도록 상수 구간을 미리 JSON으로 인코딩해 둔다.
+STARS_META_JSON = b"[" + b",".join(
+    item.model_dump_json().encode() for item in _METADATA.stars_meta
+) + b"]"
+PALACE_META_JSON = b"[" + b",".join(
+    item.model_dump_json().encode() for item in _METADATA.palace_meta
+) + b"]"
+METADATA_JSON = (
+    b'{"stars_meta":' + STARS_META_JSON + b',"palace_meta":' + PALACE_META_JSON + b"}"
+)
+
+
+def make_etag(body: bytes) -> str:
+    """응답 본문으로 강한 ETag를 만든다."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+METADATA_ETAG = make_etag(METADATA_JSON)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 주어진 ETag와 일치하는지 확인한다."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def cached_json_response(
+    body: bytes,
+    etag: str,
+    if_none_match: Optional[str],
+    cache_control: str,
+    media_type: str = "application/json",
+) -> Response:
+    """ETag가 일치하면 304를, 아니면 미리 인코딩한 본문을 반환한다."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def fast_responses_enabled() -> bool:
+    """FAST_RESPONSES 설정으로 검증 없는 직렬화 경로를 켰는지 확인한다."""
+    return os.getenv("FAST_RESPONSES", "").strip().lower() in {"1", "true", "yes"}
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _encode_chart(chart: Dict[str, Any], chart_id: Optional[int] = None) -> bytes:
+    parts: List[bytes] = []
+    for name in _CHART_FIELDS:
+        if name == "chart_id":
+            encoded = _dumps(chart_id)
+        elif name == "stars_meta" and chart[name] is get_star_metadata_list():
+            encoded = STARS_META_JSON
+        elif name == "palace_meta" and chart[name] is get_palace_metadata_list():
+            encoded = PALACE_META_JSON
+        else:
+            encoded = _dumps(chart[name])
+        parts.append(b'"' + name.encode() + b'":' + encoded)
+    return b"{" + b",".join(parts) + b"}"
+
+
+@metrics.timed("serialization")
+def encode_chart(chart: Dict[str, Any], chart_id: Optional[int] = None) -> bytes:
+    """엔진 결과를 ChartResponse와 같은 JSON 바이트로 바로 인코딩한다.
+
+    메타데이터가 엔진의 공유 상수이면 미리 인코딩한 조각을 그대로 붙인다.
+    """
+    return _encode_chart(chart, chart_id)
+
+
+@metrics.timed("serialization")
+def encode_chart_record(record: Dict[str, Any]) -> bytes:
+    """저장 레코드를 ChartRecord와 같은 JSON 바이트로 인코딩한다."""
+    birth_info = {
+        name: record["birth_info"][name]
+        for name in _BIRTH_INFO_FIELDS
+        if name in record["birth_info"]
+    }
+    return (
+        b'{"id":'
+        + _dumps(record["id"])
+        + b',"created_at":'
+        + _dumps(record["created_at"])
+        + b',"birth_info":'
+        + _dumps(birth_info)
+        + b',"chart_data":'
+        + _encode_chart(record["chart_data"], record["id"])
+        + b"}"
+    )
+
+
+def json_bytes_response(body: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    """이미 인코딩된 JSON 본문을 그대로 반환한다."""
+    return Response(content=body, status_code=status_code, media_type="application/json")
@@ -0,0 +1,525 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.lunar_converter import convert_solar_to_lunar, warm_up
+from core.ming_pan import (
+    _build_star_layout,
+    analyze_birth,
+    clear_chart_cache,
+    find_jami_position,
+)
+from core.ming_pan_batch import analyze_births
+from core.async_storage import close_async_storages
+from core.storage import ChartSearch, ChartStorage, close_storages, get_storage
+from core.write_behind import close_write_behind
+
+GROUPS = ("engine", "storage", "api", "startup")
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+SEED = 20240601
+# 결과 파일 형식이 바뀌면 올린다. 비교 모드는 같은 형식끼리만 비교한다.
+RESULT_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """하나의 측정 대상. func는 인자 없이 한 번의 연산을 수행한다.
+
+    setup이 있으면 측정 직전에 호출한다. 필터에 걸러진 벤치마크의 준비 작업은 건너뛴다.
+    """
+
+    name: str
+    group: str
+    func: Callable[[], Any]
+    setup: Optional[Callable[[], None]] = None
+
+
+def measure(
+    func: Callable[[], Any], min_time: float = 0.2, rounds: int = 5
+) -> Dict[str, float]:
+    """한 라운드가 min_time / rounds초 이상 걸리도록 반복 횟수를 맞춘 뒤 rounds번 측정한다."""
+    round_time = min_time / rounds
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= round_time or number >= 1 << 24:
+            break
+        number = max(number * 2, int(number * round_time / max(elapsed, 1e-9)))
+
+    samples: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    median = statistics.median(samples)
+    return {
+        "number": number,
+        "rounds": rounds,
+        "min_us": min(samples) * 1e6,
+        "median_us": median * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "stdev_us": (statistics.stdev(samples) if rounds > 1 else 0.0) * 1e6,
+        "ops_per_sec": 1 / median,
+    }
+
+
+def _random_births(count: int, rng: random.Random) -> List[Tuple[int, int, int, int]]:
+    births = []
+    for _ in range(count):
+        births.append(
+            (
+                rng.randint(1900, 2049),
+                rng.randint(1, 12),
+                rng.randint(1, 28),
+                rng.randint(0, 23),
+            )
+        )
+    return births
+
+
+def _birth_info(year: int, month: int, day: int, hour: int) -> Dict[str, Any]:
+    return {
+        "year": year,
+        "month": month,
+        "day": day,
+        "hour": hour,
+        "is_lunar": False,
+        "is_intercalation": False,
+        "gender": "M",
+    }
+
+
+def engine_benchmarks(rng: random.Random) -> Iterator[Benchmark]:
+    births = _random_births(1024, rng)
+    solar = cycle([birth[:3] for birth in births])
+    jami = cycle([(day, guo_shu) for day in range(1, 31) for guo_shu in range(1, 6)])
+    positions = cycle(range(1, 13))
+    inputs = cycle(births)
+
+    yield Benchmark(
+        "convert_solar_to_lunar", "engine", lambda: convert_solar_to_lunar(*next(solar))
+    )
+    yield Benchmark(
+        "find_jami_position", "engine", lambda: find_jami_position(*next(jami))
+    )
+    yield Benchmark(
+        "_build_star_layout", "engine", lambda: _build_star_layout(next(positions))
+    )
+
+    def analyze_cached() -> None:
+        year, month, day, hour = next(inputs)
+        analyze_birth(year, month, day, hour, False, False, "M")
+
+    def analyze_uncached() -> None:
+        clear_chart_cache()
+        analyze_cached()
+
+    yield Benchmark("analyze_birth[cached]", "engine", analyze_cached)
+    yield Benchmark("analyze_birth[uncached]", "engine", analyze_uncached)
+
+    columns = [list(column) for column in zip(*births)]
+    flags = [False] * len(births)
+    yield Benchmark(
+        "analyze_births[1024]",
+        "engine",
+        lambda: analyze_births(*columns, flags, flags),
+    )
+
+
+def _populate(
+    storage: ChartStorage, seed_births: List[Tuple[int, int, int, int]]
+) -> None:
+    chunk = 10000
+    for start in range(0, len(seed_births), chunk):
+        births = seed_births[start : start + chunk]
+        batch = analyze_births(
+            *[list(column) for column in zip(*births)],
+            [False] * len(births),
+            [False] * len(births),
+        )
+        storage.save_charts_bulk(
+            (
+                (_birth_info(*birth), batch.to_dict(index))
+                for index, birth in enumerate(births)
+            ),
+            chunk_size=chunk,
+        )
+
+
+def storage_benchmarks(
+    rng: random.Random, rows: int, workdir: Path
+) -> Iterator[Benchmark]:
+    # 난수 순서가 바뀌지 않도록 채울 명반은 먼저 뽑고, DB는 실제로 측정할 때 만든다.
+    seed_births = _random_births(rows, rng)
+    births = cycle(_random_births(1024, rng))
+    ids = cycle(rng.randint(1, rows) for _ in range(1024))
+    middle = rows // 2
+    label = f"{rows}"
+    storage: Optional[ChartStorage] = None
+    bulk_items: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    def setup() -> None:
+        nonlocal storage
+        if storage is None:
+            storage = get_storage(workdir / f"storage-{rows}.db")
+            _populate(storage, seed_births)
+            bulk_items.extend(
+                (_birth_info(*birth), analyze_birth(*birth, False, False, "M"))
+                for birth in islice(births, 100)
+            )
+
+    def save_chart() -> None:
+        birth = next(births)
+        storage.save_chart(
+            _birth_info(*birth), analyze_birth(*birth, False, False, "M")
+        )
+
+    # 쓰기 벤치마크가 넣은 행이 읽기 결과를 바꾸지 않도록 읽기를 먼저 잰다.
+    # 레코드는 읽을 때 디코딩하므로 본문까지 꺼내야 이전 결과와 비교할 수 있다.
+    yield Benchmark(
+        f"storage.get_chart[{label}]",
+        "storage",
+        lambda: storage.get_chart(next(ids))["chart_data"],
+        setup,
+    )
+    yield Benchmark(
+        f"storage.get_chart_summary[{label}]",
+        "storage",
+        lambda: storage.get_chart_summary(next(ids)),
+        setup,
+    )
+    yield Benchmark(
+        f"storage.list_charts[{label},first]",
+        "storage",
+        lambda: [record["chart_data"] for record in storage.list_charts(limit=20)],
+        setup,
+    )
+    yield Benchmark(
+        f"storage.list_charts[{label},offset]",
+        "storage",
+        lambda: [
+            record["chart_data"]
+            for record in storage.list_charts(limit=20, offset=middle)
+        ],
+        setup,
+    )
+    yield Benchmark(
+        f"storage.list_charts[{label},cursor]",
+        "storage",
+        lambda: [
+            record["chart_data"]
+            for record in storage.list_charts(limit=20, before_id=middle)
+        ],
+        setup,
+    )
+    yield Benchmark(
+        f"storage.list_chart_summaries[{label}]",
+        "storage",
+        lambda: storage.list_chart_summaries(limit=20),
+        setup,
+    )
+    yield Benchmark(
+        f"storage.search_charts[{label},star]",
+        "storage",
+        lambda: storage.search_charts(ChartSearch(star="자미"), limit=0),
+        setup,
+    )
+    yield Benchmark(f"storage.save_chart[{label}]", "storage", save_chart, setup)
+    yield Benchmark(
+        f"storage.save_charts_bulk[{label},100]",
+        "storage",
+        lambda: storage.save_charts_bulk(bulk_items),
+        setup,
+    )
+
+
+def api_benchmarks(rng: random.Random, workdir: Path) -> Iterator[Benchmark]:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    births = cycle([_birth_info(*birth) for birth in _random_births(1024, rng)])
+    ids: Optional[Iterator[int]] = None
+
+    def setup() -> None:
+        nonlocal ids
+        if ids is None:
+            ids = cycle(
+                [
+                    client.post("/api/v1/birth/charts", json=next(births)).json()["id"]
+                    for _ in range(100)
+                ]
+            )
+
+    yield Benchmark(
+        "api.POST /analyze",
+        "api",
+        lambda: client.post("/api/v1/birth/analyze", json=next(births)),
+        setup,
+    )
+    yield Benchmark(
+        "api.GET /charts/{id}",
+        "api",
+        lambda: client.get(f"/api/v1/birth/charts/{next(ids)}"),
+        setup,
+    )
+    yield Benchmark(
+        "api.GET /charts", "api", lambda: client.get("/api/v1/birth/charts"), setup
+    )
+    yield Benchmark(
+        "api.POST /charts",
+        "api",
+        lambda: client.post("/api/v1/birth/charts", json=next(births)),
+        setup,
+    )
+
+
+# 새 인터프리터에서 앱을 띄우고 첫 /analyze를 처리한 뒤 시작 시간 보고를 출력한다.
+_STARTUP_SCRIPT = """
+import json
+from main import app
+from core import startup_report
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    client.post("/api/v1/birth/analyze", json={birth_info!r})
+print(json.dumps(startup_report.get_startup_report()))
+"""
+
+
+@contextmanager
+def _benchmark_db(db_path: Path) -> Iterator[None]:
+    """CHART_DB_PATH를 db_path로 바꿔 두고, 끝나면 연 저장소를 닫고 원래 값으로 되돌린다."""
+    previous = os.environ.get("CHART_DB_PATH")
+    os.environ["CHART_DB_PATH"] = str(db_path)
+    try:
+        yield
+    finally:
+        close_write_behind()
+        close_async_storages()
+        close_storages()
+        if previous is None:
+            os.environ.pop("CHART_DB_PATH", None)
+        else:
+            os.environ["CHART_DB_PATH"] = previous
+
+
+def _summarize_samples(samples: List[float], group: str) -> Dict[str, Any]:
+    median = statistics.median(samples)
+    return {
+        "number": 1,
+        "rounds": len(samples),
+        "min_us": min(samples) * 1e6,
+        "median_us": median * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "stdev_us": (statistics.stdev(samples) if len(samples) > 1 else 0.0) * 1e6,
+        "ops_per_sec": 1 / median,
+        "group": group,
+    }
+
+
+def startup_results(rounds: int, workdir: Path) -> Dict[str, Dict[str, Any]]:
+    """프로세스 시작부터 각 시점까지의 시간과 시작 단계별 시간을 rounds번 잰다."""
+    script = _STARTUP_SCRIPT.format(birth_info=_birth_info(1990, 6, 24, 12))
+    env = {**os.environ, "CHART_DB_PATH": str(workdir / "startup.db")}
+    samples: Dict[str, List[float]] = {}
+    for _ in range(rounds):
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=_BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(completed.stdout.strip().splitlines()[-1])
+        for kind in ("milestones", "phases"):
+            for name, seconds in report[kind].items():
+                samples.setdefault(f"startup.{name}", []).append(seconds)
+    return {
+        name: _summarize_samples(values, "startup") for name, values in samples.items()
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """결과를 비교할 때 함께 확인해야 하는 실행 환경 정보."""
+    import numpy
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": numpy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "fast_responses": os.getenv("FAST_RESPONSES", ""),
+        "chart_atlas": os.getenv("CHART_ATLAS_PATH", ""),
+    }
+
+
+def run_benchmarks(
+    groups: Sequence[str] = GROUPS,
+    rows: Sequence[int] = (10000,),
+    min_time: float = 0.2,
+    rounds: int = 5,
+    name_filter: Optional[str] = None,
+    progress: Optional[Callable[[str, Dict[str, float]], None]] = None,
+) -> Dict[str, Any]:
+    """선택한 그룹의 벤치마크를 실행하고 JSON으로 기록할 결과 dict를 반환한다."""
+    rng = random.Random(SEED)
+    warm_up()
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        suites: List[Iterator[Benchmark]] = []
+        if "engine" in groups:
+            suites.append(engine_benchmarks(rng))
+        if "storage" in groups:
+            suites.extend(storage_benchmarks(rng, count, workdir) for count in rows)
+        if "api" in groups:
+            suites.append(api_benchmarks(rng, workdir))
+        if "startup" in groups:
+            for name, result in startup_results(rounds, workdir).items():
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = result
+                if progress is not None:
+                    progress(name, result)
+        with _benchmark_db(workdir / "api.db"):
+            for suite in suites:
+                for benchmark in suite:
+                    if name_filter and name_filter not in benchmark.name:
+                        continue
+                    if benchmark.setup is not None:
+                        benchmark.setup()
+                    result = measure(benchmark.func, min_time=min_time, rounds=rounds)
+                    result["group"] = benchmark.group
+                    results[benchmark.name] = result
+                    if progress is not None:
+                        progress(benchmark.name, result)
+    return {
+        "format": RESULT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "seed": SEED,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """두 결과의 처리량을 비교해 (비교 행 목록, 회귀한 벤치마크 이름 목록)을 반환한다.
+
+    처리량이 기준보다 threshold 비율 넘게 떨어지면 회귀로 본다.
+    """
+    if baseline.get("format") != current.get("format"):
+        raise ValueError("결과 파일 형식이 달라 비교할 수 없다.")
+    rows: List[Dict[str, Any]] = []
+    regressions: List[str] = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["ops_per_sec"] / base["ops_per_sec"]
+        regressed = ratio < 1 - threshold
+        rows.append(
+            {
+                "name": name,
+                "baseline_ops_per_sec": base["ops_per_sec"],
+                "current_ops_per_sec": result["ops_per_sec"],
+                "ratio": ratio,
+                "regressed": regressed,
+            }
+        )
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _print_result(name: str, result: Dict[str, float]) -> None:
+    print(
+        f"{name:<42} {result['ops_per_sec']:>14,.1f} ops/s "
+        f"{result['median_us']:>12.2f} us ±{result['stdev_us']:.2f}",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="명반 엔진, 음력 변환, 저장소, API의 처리량을 측정하고 기준 결과와 비교한다."
+    )
+    parser.add_argument("--group", action="append", choices=GROUPS, default=None)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        action="append",
+        default=None,
+        help="저장소 벤치마크 행 수(여러 번 지정 가능, 기본 10000)",
+    )
+    parser.add_argument(
+        "--filter", default=None, help="이름에 이 문자열이 들어간 벤치마크만 실행"
+    )
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--output", type=Path, default=None, help="결과 JSON 파일(없으면 표준 출력)"
+    )
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="비교할 기준 결과 JSON 파일"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="회귀로 볼 처리량 감소 비율"
+    )
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        groups=args.group or GROUPS,
+        rows=args.rows or (10000,),
+        min_time=args.min_time,
+        rounds=args.rounds,
+        name_filter=args.filter,
+        progress=_print_result,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows, regressions = compare_results(baseline, report, threshold=args.threshold)
+        for row in rows:
+            mark = "회귀" if row["regressed"] else ""
+            print(
+                f"{row['name']:<42} {row['baseline_ops_per_sec']:>14,.1f} -> "
+                f"{row['current_ops_per_sec']:>14,.1f} ({row['ratio'] - 1:+.1%}) {mark}",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
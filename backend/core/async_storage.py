@@ -0,0 +1,136 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from core.storage import (
+    ChartSearch,
+    ChartStorage,
+    LazyChartRecord,
+    resolve_db_path,
+    get_storage,
+)
+
+T = TypeVar("T")
+
+
+class AsyncChartStorage:
+    """ChartStorage를 전용 스레드에서 실행하는 비동기 인터페이스.
+
+    쓰기는 하나의 전용 스레드에서 순서대로, 읽기는 별도 스레드 풀에서 실행하므로
+    DB 대기가 Starlette 스레드 풀을 점유하지 않는다.
+    """
+
+    def __init__(self, storage: ChartStorage, read_workers: int = 4) -> None:
+        self.storage = storage
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="chart-db-writer"
+        )
+        self._readers = ThreadPoolExecutor(
+            max_workers=read_workers, thread_name_prefix="chart-db-reader"
+        )
+
+    async def _run(
+        self, executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+    async def save_chart(
+        self, birth_info: Dict[str, Any], chart_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await self._run(self._writer, self.storage.save_chart, birth_info, chart_data)
+
+    async def save_charts_bulk(
+        self,
+        items: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+        chunk_size: int = 500,
+    ) -> List[int]:
+        return await self._run(
+            self._writer, self.storage.save_charts_bulk, items, chunk_size=chunk_size
+        )
+
+    async def delete_chart(self, chart_id: int) -> bool:
+        return await self._run(self._writer, self.storage.delete_chart, chart_id)
+
+    async def list_charts(
+        self, limit: int = 20, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[LazyChartRecord]:
+        return await self._run(
+            self._readers,
+            self.storage.list_charts,
+            limit=limit,
+            offset=offset,
+            before_id=before_id,
+        )
+
+    async def list_chart_summaries(
+        self, limit: int = 20, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run(
+            self._readers,
+            self.storage.list_chart_summaries,
+            limit=limit,
+            offset=offset,
+            before_id=before_id,
+        )
+
+    async def search_charts(
+        self,
+        search: ChartSearch,
+        limit: int = 20,
+        before_id: Optional[int] = None,
+        group_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return await self._run(
+            self._readers,
+            self.storage.search_charts,
+            search,
+            limit=limit,
+            before_id=before_id,
+            group_by=group_by,
+        )
+
+    async def get_chart(self, chart_id: int) -> Optional[LazyChartRecord]:
+        return await self._run(self._readers, self.storage.get_chart, chart_id)
+
+    async def get_chart_summary(self, chart_id: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self._readers, self.storage.get_chart_summary, chart_id)
+
+    async def chart_exists(self, chart_id: int) -> bool:
+        return await self._run(self._readers, self.storage.chart_exists, chart_id)
+
+    def close(self) -> None:
+        """실행 중인 작업을 마친 뒤 스레드를 정리한다."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+_ASYNC_STORAGES: Dict[Path, AsyncChartStorage] = {}
+_ASYNC_STORAGES_LOCK = threading.Lock()
+
+
+def get_async_storage(db_path: Optional[Path] = None) -> AsyncChartStorage:
+    """DB 경로별 비동기 저장소를 반환한다."""
+    path = resolve_db_path(db_path)
+    storage = _ASYNC_STORAGES.get(path)
+    if storage is not None:
+        return storage
+    with _ASYNC_STORAGES_LOCK:
+        storage = _ASYNC_STORAGES.get(path)
+        if storage is None:
+            read_workers = int(os.getenv("CHART_DB_READ_WORKERS", "4"))
+            storage = AsyncChartStorage(get_storage(path), read_workers=read_workers)
+            _ASYNC_STORAGES[path] = storage
+    return storage
+
+
+def close_async_storages() -> None:
+    """열려 있는 모든 비동기 저장소의 스레드를 정리한다."""
+    with _ASYNC_STORAGES_LOCK:
+        for storage in _ASYNC_STORAGES.values():
+            storage.close()
+        _ASYNC_STORAGES.clear()
@@ -0,0 +1,557 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+EVICTION_LRU = "lru"
+EVICTION_FIFO = "fifo"
+EVICTION_POLICIES = (EVICTION_LRU, EVICTION_FIFO)
+
+BACKEND_MEMORY = "memory"
+BACKEND_MMAP = "mmap"
+BACKEND_REDIS = "redis"
+
+_DEFAULT_MMAP_DIR = Path(__file__).resolve().parents[1] / "data" / "cache"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """캐시 크기, 만료 시간(초), 가득 찼을 때 내보낼 항목을 고르는 정책."""
+
+    max_entries: int = 4096
+    ttl: Optional[float] = None
+    eviction: str = EVICTION_LRU
+
+    def __post_init__(self) -> None:
+        if self.eviction not in EVICTION_POLICIES:
+            raise ValueError(f"지원하지 않는 축출 정책: {self.eviction}")
+
+
+class CacheBackend:
+    """문자열 키로 바이트 값을 보관하는 캐시 백엔드의 공통 인터페이스.
+
+    값의 인코딩은 호출하는 쪽이 정한다. 적중/실패/축출 횟수는 프로세스마다 센다.
+    blocking이 참인 백엔드는 파일 잠금이나 소켓 응답을 기다릴 수 있으므로 비동기
+    코드에서는 이벤트 루프 밖에서 불러야 한다.
+    """
+
+    blocking = False
+
+    def __init__(self, policy: CachePolicy) -> None:
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """열어 둔 파일이나 연결을 닫는다."""
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size(),
+            "max_size": self.policy.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryCacheBackend(CacheBackend):
+    """현재 프로세스 안에서만 공유하는 캐시."""
+
+    def __init__(self, policy: CachePolicy) -> None:
+        super().__init__(policy)
+        # 값과 만료 시각(time.monotonic 기준, 없으면 None)
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.policy.eviction == EVICTION_LRU:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        if self.policy.max_entries <= 0:
+            return
+        ttl = self.policy.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.policy.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_MMAP_MAGIC = b"JAMICACH"
+_MMAP_VERSION = 1
+# 매직, 버전, 슬롯 수, 슬롯 크기
+_MMAP_HEADER = struct.Struct("<8sB3xII12x")
+# 키 해시(0이면 빈 슬롯), 만료 시각(time.time 기준, 0이면 없음), 순서 도장, 값 길이, 키 길이
+_SLOT_HEADER = struct.Struct("<QdQIH2x")
+_SLOT_KEY_HASH = struct.Struct("<Q")
+_SLOT_STAMP = struct.Struct("<Q")
+_SLOT_STAMP_OFFSET = 16
+
+
+def _key_hash(key: bytes) -> int:
+    value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """같은 호스트의 워커 프로세스들이 하나의 메모리 매핑 파일을 공유하는 캐시.
+
+    파일은 ways개씩 묶은 고정 크기 슬롯의 집합 연관 해시 테이블이다. 키는 해시로
+    정한 묶음 안에만 들어가고, 묶음이 가득 차면 정책에 따라 가장 오래 쓰지 않았거나
+    (lru) 가장 먼저 넣은(fifo) 슬롯을 덮어쓴다. 슬롯보다 큰 값은 저장하지 않는다.
+    프로세스 사이는 flock으로, 스레드 사이는 잠금으로 막는다.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: Path,
+        policy: CachePolicy,
+        slot_size: int = 8192,
+        ways: int = 8,
+    ) -> None:
+        super().__init__(policy)
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"슬롯 크기는 {_SLOT_HEADER.size}바이트보다 커야 한다.")
+        self.path = path
+        self.slot_size = slot_size
+        self.ways = ways
+        self.slot_count = max(1, -(-policy.max_entries // ways)) * ways
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._mm = self._open_mapping()
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def _open_mapping(self) -> mmap.mmap:
+        length = _MMAP_HEADER.size + self.slot_count * self.slot_size
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            created = os.fstat(self._fd).st_size == 0
+            if created:
+                os.ftruncate(self._fd, length)
+            mm = mmap.mmap(self._fd, 0)
+            if created:
+                _MMAP_HEADER.pack_into(
+                    mm, 0, _MMAP_MAGIC, _MMAP_VERSION, self.slot_count, self.slot_size
+                )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        magic, version, slot_count, slot_size = _MMAP_HEADER.unpack_from(mm, 0)
+        if (magic, version, slot_count, slot_size) != (
+            _MMAP_MAGIC,
+            _MMAP_VERSION,
+            self.slot_count,
+            self.slot_size,
+        ) or len(mm) != length:
+            mm.close()
+            raise ValueError(
+                f"{self.path}는 다른 크기로 만든 캐시 파일이다. 파일을 지우고 다시 시작해야 한다."
+            )
+        return mm
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _bucket(self, key_hash: int) -> range:
+        start = _MMAP_HEADER.size + (key_hash % (self.slot_count // self.ways)) * self.ways * self.slot_size
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    def _find(self, key: bytes, key_hash: int) -> Optional[int]:
+        for offset in self._bucket(key_hash):
+            slot_hash, _, _, _, key_length = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_hash != key_hash or key_length != len(key):
+                continue
+            start = offset + _SLOT_HEADER.size
+            if self._mm[start : start + key_length] == key:
+                return offset
+        return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        encoded = key.encode()
+        key_hash = _key_hash(encoded)
+        lru = self.policy.eviction == EVICTION_LRU
+        with self._locked(exclusive=lru):
+            offset = self._find(encoded, key_hash)
+            value = None
+            if offset is not None:
+                _, expires_at, _, value_length, key_length = _SLOT_HEADER.unpack_from(
+                    self._mm, offset
+                )
+                if not expires_at or expires_at > time.time():
+                    start = offset + _SLOT_HEADER.size + key_length
+                    value = self._mm[start : start + value_length]
+                    if lru:
+                        _SLOT_STAMP.pack_into(
+                            self._mm, offset + _SLOT_STAMP_OFFSET, time.time_ns()
+                        )
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        encoded = key.encode()
+        if (
+            self.policy.max_entries <= 0
+            or _SLOT_HEADER.size + len(encoded) + len(value) > self.slot_size
+        ):
+            return
+        key_hash = _key_hash(encoded)
+        ttl = self.policy.ttl
+        now = time.time()
+        with self._locked(exclusive=True):
+            offset = self._find(encoded, key_hash)
+            if offset is None:
+                offset = self._choose_slot(key_hash, now)
+            start = offset + _SLOT_HEADER.size
+            self._mm[start : start + len(encoded) + len(value)] = encoded + value
+            _SLOT_HEADER.pack_into(
+                self._mm,
+                offset,
+                key_hash,
+                now + ttl if ttl else 0.0,
+                time.time_ns(),
+                len(value),
+                len(encoded),
+            )
+
+    def _choose_slot(self, key_hash: int, now: float) -> int:
+        victim = None
+        victim_stamp = None
+        for offset in self._bucket(key_hash):
+            slot_hash, expires_at, stamp, _, _ = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_hash == 0 or (expires_at and expires_at <= now):
+                return offset
+            if victim_stamp is None or stamp < victim_stamp:
+                victim, victim_stamp = offset, stamp
+        self.evictions += 1
+        return victim
+
+    def delete(self, key: str) -> None:
+        encoded = key.encode()
+        with self._locked(exclusive=True):
+            offset = self._find(encoded, _key_hash(encoded))
+            if offset is not None:
+                _SLOT_KEY_HASH.pack_into(self._mm, offset, 0)
+
+    def clear(self) -> None:
+        with self._locked(exclusive=True):
+            for index in range(self.slot_count):
+                _SLOT_KEY_HASH.pack_into(
+                    self._mm, _MMAP_HEADER.size + index * self.slot_size, 0
+                )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def size(self) -> int:
+        now = time.time()
+        count = 0
+        with self._locked(exclusive=False):
+            for index in range(self.slot_count):
+                slot_hash, expires_at, _, _, _ = _SLOT_HEADER.unpack_from(
+                    self._mm, _MMAP_HEADER.size + index * self.slot_size
+                )
+                if slot_hash and not (expires_at and expires_at <= now):
+                    count += 1
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._mm.closed:
+                self._mm.close()
+                os.close(self._fd)
+
+
+class RedisError(Exception):
+    """Redis 서버가 오류 응답을 보냈다."""
+
+
+class _RedisConnection:
+    """RESP2 명령을 보내고 응답을 읽는 최소한의 Redis 연결."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    def command(self, *args: bytes) -> object:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> object:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis 연결이 끊겼다.")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode(errors="replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Redis 연결이 끊겼다.")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"알 수 없는 응답: {line!r}")
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis 프로토콜 서버를 여러 호스트의 워커가 함께 쓰는 캐시.
+
+    키에는 prefix를 붙이고 TTL은 SET PX로 건다. 항목 수 제한과 축출은 서버의
+    maxmemory와 maxmemory-policy 설정을 따르며 policy.eviction은 쓰지 않는다.
+    서버에 닿지 않으면 캐시가 없는 것처럼 동작하고 경고만 남긴다. 실패한 뒤
+    cooldown초 동안은 다시 연결하지 않고 바로 실패로 처리해, 응답하지 않는 서버가
+    요청마다 timeout만큼 지연시키지 않게 한다.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: str,
+        policy: CachePolicy,
+        prefix: str = "jami:",
+        timeout: float = 0.5,
+        cooldown: float = 5.0,
+    ) -> None:
+        super().__init__(policy)
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"지원하지 않는 Redis 주소: {url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix.encode()
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self._local = threading.local()
+        self._connections: List[_RedisConnection] = []
+        self._lock = threading.Lock()
+        self._available = True
+        # 이 시각(time.monotonic 기준) 전에는 서버에 닿지 않는 것으로 본다.
+        self._retry_at = 0.0
+
+    def _connection(self) -> _RedisConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _RedisConnection(self.host, self.port, self.timeout)
+            if self.password:
+                conn.command(b"AUTH", self.password.encode())
+            if self.db:
+                conn.command(b"SELECT", str(self.db).encode())
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _command(self, *args: bytes) -> object:
+        if self._retry_at and time.monotonic() < self._retry_at:
+            raise ConnectionError("Redis 캐시가 잠시 꺼져 있다.")
+        try:
+            reply = self._connection().command(*args)
+        except (OSError, RedisError) as exc:
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                self._local.conn = None
+                with self._lock:
+                    self._connections.remove(conn)
+                conn.close()
+            if self._available:
+                logger.warning("Redis 캐시 %s:%d를 쓸 수 없다: %r", self.host, self.port, exc)
+            self._available = False
+            self._retry_at = time.monotonic() + self.cooldown
+            raise
+        self._available = True
+        self._retry_at = 0.0
+        return reply
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self._command(b"GET", self.prefix + key.encode())
+        except (OSError, RedisError):
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if self.policy.max_entries <= 0:
+            return
+        args = [b"SET", self.prefix + key.encode(), value]
+        if self.policy.ttl:
+            args += [b"PX", str(int(self.policy.ttl * 1000)).encode()]
+        try:
+            self._command(*args)
+        except (OSError, RedisError):
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._command(b"DEL", self.prefix + key.encode())
+        except (OSError, RedisError):
+            pass
+
+    def _scan_keys(self) -> Iterator[List[bytes]]:
+        cursor = b"0"
+        while True:
+            cursor, keys = self._command(
+                b"SCAN", cursor, b"MATCH", self.prefix + b"*", b"COUNT", b"500"
+            )
+            if keys:
+                yield keys
+            if cursor == b"0":
+                return
+
+    def clear(self) -> None:
+        """prefix가 붙은 키만 지운다."""
+        try:
+            for keys in self._scan_keys():
+                self._command(b"DEL", *keys)
+        except (OSError, RedisError):
+            pass
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def size(self) -> int:
+        """prefix가 붙은 키 수. SCAN으로 세므로 지표 수집 때만 부른다."""
+        try:
+            return sum(len(keys) for keys in self._scan_keys())
+        except (OSError, RedisError):
+            return 0
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def cache_policy_from_env(max_entries: int) -> CachePolicy:
+    """CACHE_TTL_SECONDS와 CACHE_EVICTION으로 정책을 만든다."""
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "0"))
+    return CachePolicy(
+        max_entries=max_entries,
+        ttl=ttl if ttl > 0 else None,
+        eviction=os.getenv("CACHE_EVICTION", EVICTION_LRU),
+    )
+
+
+def create_cache_backend(
+    namespace: str, max_entries: int, slot_size: int = 8192
+) -> CacheBackend:
+    """CACHE_BACKEND 설정(memory, mmap, redis)에 맞는 namespace용 백엔드를 만든다.
+
+    mmap은 CACHE_MMAP_DIR 아래 namespace별 파일을, redis는 CACHE_REDIS_URL 서버에서
+    namespace별 키 접두사를 쓴다.
+    """
+    kind = os.getenv("CACHE_BACKEND", BACKEND_MEMORY)
+    policy = cache_policy_from_env(max_entries)
+    if kind == BACKEND_MEMORY or max_entries <= 0:
+        return MemoryCacheBackend(policy)
+    if kind == BACKEND_MMAP:
+        directory = Path(os.getenv("CACHE_MMAP_DIR", str(_DEFAULT_MMAP_DIR)))
+        return SharedMemoryCacheBackend(
+            directory / f"{namespace}.cache", policy, slot_size=slot_size
+        )
+    if kind == BACKEND_REDIS:
+        return RedisCacheBackend(
+            os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"),
+            policy,
+            prefix=f"jami:{namespace}:",
+            cooldown=float(os.getenv("CACHE_REDIS_COOLDOWN_SECONDS", "5")),
+        )
+    raise ValueError(f"지원하지 않는 캐시 백엔드: {kind}")
@@ -0,0 +1,202 @@
+import argparse
+import mmap
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.chart_codec import (
+    CODEC_VERSION,
+    RECORD_SIZE,
+    CompactChart,
+    _RECORD,
+    decode_chart,
+    decode_core_fields,
+)
+from core.ming_pan import get_engine_version
+from core.ming_pan_batch import analyze_births
+
+ATLAS_MIN_YEAR = 1900
+ATLAS_MAX_YEAR = 2100
+_DEFAULT_ATLAS_PATH = Path(__file__).resolve().parents[1] / "data" / "chart_atlas.bin"
+_MAGIC = b"JAMIATLS"
+# 매직, 레코드 버전, 첫 해, 마지막 해, 엔진 버전. 레코드가 16바이트 경계에서 시작하도록 채운다.
+_HEADER = struct.Struct("<8sBHH3x16s")
+HEADER_SIZE = _HEADER.size
+# 입력으로 받는 음력 일은 1~31이므로 31칸을 둔다.
+_DAYS = 31
+
+
+def _record_index(year: int, month: int, day: int, is_intercalation: bool, min_year: int) -> int:
+    return (((year - min_year) * 12 + (month - 1)) * 2 + int(is_intercalation)) * _DAYS + (
+        day - 1
+    )
+
+
+def build_atlas(
+    path: Optional[Path] = None,
+    min_year: int = ATLAS_MIN_YEAR,
+    max_year: int = ATLAS_MAX_YEAR,
+) -> Path:
+    """음력 (연, 월, 윤달, 일) 전 범위의 명반 핵심 필드를 고정 길이 레코드로 기록한다.
+
+    시지는 명궁/국수/자미성 위치에 영향을 주지 않으므로 레코드에 넣지 않고
+    조회할 때 채운다.
+    """
+    path = path or _DEFAULT_ATLAS_PATH
+    years, months, leaps, days = np.meshgrid(
+        np.arange(min_year, max_year + 1),
+        np.arange(1, 13),
+        np.array([False, True]),
+        np.arange(1, _DAYS + 1),
+        indexing="ij",
+    )
+    count = years.size
+    batch = analyze_births(
+        years.ravel(),
+        months.ravel(),
+        days.ravel(),
+        np.zeros(count, dtype=np.int64),
+        np.ones(count, dtype=bool),
+        leaps.ravel(),
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("wb") as stream:
+        stream.write(
+            _HEADER.pack(
+                _MAGIC, CODEC_VERSION, min_year, max_year, get_engine_version().encode()
+            )
+        )
+        columns = zip(
+            batch.lunar_year.tolist(),
+            batch.lunar_month.tolist(),
+            batch.lunar_day.tolist(),
+            batch.is_intercalation.tolist(),
+            batch.ming_gong.tolist(),
+            batch.guo_shu.tolist(),
+            batch.jami_position.tolist(),
+            (batch.bosu % 2).tolist(),
+            batch.star_palaces.tolist(),
+        )
+        stream.write(
+            b"".join(
+                _RECORD.pack(
+                    CODEC_VERSION,
+                    0,
+                    year,
+                    month,
+                    day,
+                    int(leap),
+                    0,
+                    ming_gong,
+                    guo_shu,
+                    jami_position,
+                    direction,
+                    *star_palaces,
+                )
+                for (
+                    year,
+                    month,
+                    day,
+                    leap,
+                    ming_gong,
+                    guo_shu,
+                    jami_position,
+                    direction,
+                    star_palaces,
+                ) in columns
+            )
+        )
+    # 실행 중인 워커가 읽고 있는 파일을 덮어쓰지 않도록 이름을 바꿔 교체한다.
+    tmp_path.replace(path)
+    return path
+
+
+class AtlasVersionError(ValueError):
+    """아틀라스가 현재와 다른 엔진 규칙으로 만들어졌다."""
+
+
+class ChartAtlas:
+    """미리 계산한 명반 레코드 파일을 메모리 매핑해 조회한다.
+
+    읽기 전용 매핑은 운영체제 페이지 캐시를 공유하므로 워커 프로세스가 여럿이어도
+    파일 내용이 한 번만 메모리에 올라간다. 다른 엔진 버전으로 만든 파일은
+    AtlasVersionError로 거부한다.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as stream:
+            self._mm = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER_SIZE:
+            self._mm.close()
+            raise ValueError(f"{path}는 지원하지 않는 명반 아틀라스 파일이다.")
+        magic, version, self.min_year, self.max_year, engine_version = _HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != _MAGIC or version != CODEC_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}는 지원하지 않는 명반 아틀라스 파일이다.")
+        self.engine_version = engine_version.decode(errors="replace")
+        if self.engine_version != get_engine_version():
+            self._mm.close()
+            raise AtlasVersionError(
+                f"{path}는 엔진 버전 {self.engine_version}으로 만들어졌다 "
+                f"(현재 {get_engine_version()}). 다시 만들어야 한다."
+            )
+        expected = (self.max_year - self.min_year + 1) * 12 * 2 * _DAYS
+        if len(self._mm) != HEADER_SIZE + expected * RECORD_SIZE:
+            self._mm.close()
+            raise ValueError(f"{path}의 길이가 올바르지 않다.")
+
+    def _offset(
+        self, year: int, month: int, day: int, is_intercalation: bool
+    ) -> Optional[int]:
+        if not (
+            self.min_year <= year <= self.max_year
+            and 1 <= month <= 12
+            and 1 <= day <= _DAYS
+        ):
+            return None
+        index = _record_index(year, month, day, is_intercalation, self.min_year)
+        return HEADER_SIZE + index * RECORD_SIZE
+
+    def lookup(
+        self, year: int, month: int, day: int, is_intercalation: bool, hour_branch: int
+    ) -> Optional[CompactChart]:
+        """범위 안의 음력 날짜면 레코드를 읽고, 벗어나면 None을 반환한다."""
+        offset = self._offset(year, month, day, is_intercalation)
+        if offset is None:
+            return None
+        return decode_chart(self._mm, offset, hour_branch=hour_branch)
+
+    def lookup_core_fields(
+        self, year: int, month: int, day: int, is_intercalation: bool
+    ) -> Optional[Tuple[int, int, int, str]]:
+        """(명궁, 국수, 자미성 위치, 순역행)만 읽는다. 범위를 벗어나면 None을 반환한다."""
+        offset = self._offset(year, month, day, is_intercalation)
+        if offset is None:
+            return None
+        return decode_core_fields(self._mm, offset)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="음력 전 범위의 명반 핵심 필드를 아틀라스 파일로 미리 계산한다."
+    )
+    parser.add_argument("output", nargs="?", type=Path, default=None)
+    parser.add_argument("--min-year", type=int, default=ATLAS_MIN_YEAR)
+    parser.add_argument("--max-year", type=int, default=ATLAS_MAX_YEAR)
+    args = parser.parse_args()
+
+    path = build_atlas(args.output, min_year=args.min_year, max_year=args.max_year)
+    print(f"{path}: {path.stat().st_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core import metrics
+from core.ming_pan import (
+    build_summary,
+    get_branch_name,
+    get_palace_metadata_list,
+    get_star_metadata_list,
+)
+from core.star_data import MAIN_STARS, PALACE_NAMES
+
+CHART_MEDIA_TYPE = "application/x-jami-chart"
+CODEC_VERSION = 1
+_DIRECTIONS = ("순행", "역행")
+
+# 버전, 차트 ID(없으면 0), 음력 연/월/일/윤달, 시지, 명궁, 국수, 자미성 위치, 순역행,
+# 그리고 MAIN_STARS 순서대로 각 주성이 놓인 궁 번호(PALACE_NAMES 인덱스 + 1).
+_RECORD = struct.Struct(f"<BIiBBBBBBBB{len(MAIN_STARS)}B")
+RECORD_SIZE = _RECORD.size
+# 명궁, 국수, 자미성 위치, 순역행만 읽을 때 쓰는 레코드 안 위치.
+_CORE_FIELDS = struct.Struct("<BBBB")
+_CORE_FIELDS_OFFSET = struct.calcsize("<BIiBBBB")
+_PALACES = range(1, len(PALACE_NAMES) + 1)
+_GUO_SHU = range(1, 6)
+_LUNAR_MONTHS = range(1, 13)
+_LUNAR_DAYS = range(1, 32)
+
+
+class ChartEncodeError(ValueError):
+    """명반이 엔진 결과가 아니어서 이진 레코드로 나타낼 수 없다."""
+
+
+@dataclass(frozen=True)
+class CompactChart:
+    """고정 길이 레코드에서 읽은 명반 핵심 필드."""
+
+    chart_id: Optional[int]
+    lunar_year: int
+    lunar_month: int
+    lunar_day: int
+    is_intercalation: bool
+    hour_branch: int
+    ming_gong: int
+    guo_shu: int
+    jami_position: int
+    direction: int
+    star_palaces: Tuple[int, ...]
+
+    def to_dict(self) -> Dict[str, object]:
+        """ChartResponse와 같은 형태의 dict로 풀어낸다."""
+        stars_data: List[Dict[str, object]] = []
+        palace_stars: Dict[int, List[str]] = {index: [] for index in range(1, 13)}
+        for star, palace_index in zip(MAIN_STARS, self.star_palaces):
+            stars_data.append({"star": star.name, "palace_index": palace_index})
+            palace_stars[palace_index].append(star.name)
+        palace_layout = [
+            {"index": index, "name": name, "stars": palace_stars[index]}
+            for index, name in enumerate(PALACE_NAMES, start=1)
+        ]
+        jami_direction = _DIRECTIONS[self.direction]
+        hour_branch_name = get_branch_name(self.hour_branch)
+        chart: Dict[str, object] = {
+            "ming_gong": self.ming_gong,
+            "guo_shu": self.guo_shu,
+            "jami_position": self.jami_position,
+            "jami_direction": jami_direction,
+            "hour_branch": self.hour_branch,
+            "hour_branch_name": hour_branch_name,
+            "palace_layout": palace_layout,
+            "stars_data": stars_data,
+            "stars_meta": get_star_metadata_list(),
+            "palace_meta": get_palace_metadata_list(),
+            "summary": build_summary(
+                ming_gong=self.ming_gong,
+                guo_shu=self.guo_shu,
+                jami_position=self.jami_position,
+                jami_direction=jami_direction,
+                hour_branch_name=hour_branch_name,
+                palace_layout=palace_layout,
+            ),
+            "lunar_date": {
+                "year": self.lunar_year,
+                "month": self.lunar_month,
+                "day": self.lunar_day,
+                "is_intercalation": self.is_intercalation,
+            },
+        }
+        if self.chart_id is not None:
+            chart["chart_id"] = self.chart_id
+        return chart
+
+
+def _check_fields(
+    lunar_month: int,
+    lunar_day: int,
+    hour_branch: int,
+    ming_gong: int,
+    guo_shu: int,
+    jami_position: int,
+    direction: int,
+) -> bool:
+    return (
+        lunar_month in _LUNAR_MONTHS
+        and lunar_day in _LUNAR_DAYS
+        and hour_branch in _PALACES
+        and ming_gong in _PALACES
+        and guo_shu in _GUO_SHU
+        and jami_position in _PALACES
+        and direction < len(_DIRECTIONS)
+    )
+
+
+@metrics.timed("serialization")
+def encode_chart(chart: Dict[str, object], chart_id: Optional[int] = None) -> bytes:
+    """엔진 결과를 고정 길이 이진 레코드로 인코딩한다.
+
+    필드가 없거나 범위를 벗어난 명반은 ChartEncodeError를 낸다.
+    """
+    try:
+        lunar_date = chart["lunar_date"]
+        placements = {item["star"]: item["palace_index"] for item in chart["stars_data"]}
+        fields = (
+            lunar_date["month"],
+            lunar_date["day"],
+            chart["hour_branch"],
+            chart["ming_gong"],
+            chart["guo_shu"],
+            chart["jami_position"],
+            _DIRECTIONS.index(chart["jami_direction"]),
+        )
+        star_palaces = [placements[star.name] for star in MAIN_STARS]
+        if not _check_fields(*fields) or any(
+            palace not in _PALACES for palace in star_palaces
+        ):
+            raise ValueError("명반 값이 범위를 벗어났다.")
+        return _RECORD.pack(
+            CODEC_VERSION,
+            chart_id or 0,
+            lunar_date["year"],
+            fields[0],
+            fields[1],
+            int(lunar_date["is_intercalation"]),
+            *fields[2:],
+            *star_palaces,
+        )
+    except (KeyError, TypeError, ValueError, struct.error) as exc:
+        raise ChartEncodeError(f"이진 레코드로 인코딩할 수 없는 명반이다: {exc!r}") from exc
+
+
+def decode_chart(
+    data: bytes, offset: int = 0, hour_branch: Optional[int] = None
+) -> CompactChart:
+    """이진 레코드에서 명반 핵심 필드만 읽는다. 전체 dict는 to_dict로 만든다.
+
+    hour_branch를 주면 레코드의 시지 대신 쓴다. 값이 범위를 벗어나면 ValueError를 낸다.
+    """
+    (
+        version,
+        chart_id,
+        lunar_year,
+        lunar_month,
+        lunar_day,
+        is_intercalation,
+        stored_hour_branch,
+        ming_gong,
+        guo_shu,
+        jami_position,
+        direction,
+        *star_palaces,
+    ) = _RECORD.unpack_from(data, offset)
+    if version != CODEC_VERSION:
+        raise ValueError(f"지원하지 않는 명반 레코드 버전: {version}")
+    if hour_branch is None:
+        hour_branch = stored_hour_branch
+    if not _check_fields(
+        lunar_month, lunar_day, hour_branch, ming_gong, guo_shu, jami_position, direction
+    ) or any(palace not in _PALACES for palace in star_palaces):
+        raise ValueError("명반 레코드 값이 올바르지 않다.")
+    return CompactChart(
+        chart_id=chart_id or None,
+        lunar_year=lunar_year,
+        lunar_month=lunar_month,
+        lunar_day=lunar_day,
+        is_intercalation=bool(is_intercalation),
+        hour_branch=hour_branch,
+        ming_gong=ming_gong,
+        guo_shu=guo_shu,
+        jami_position=jami_position,
+        direction=direction,
+        star_palaces=tuple(star_palaces),
+    )
+
+
+def decode_core_fields(data: bytes, offset: int = 0) -> Tuple[int, int, int, str]:
+    """레코드에서 (명궁, 국수, 자미성 위치, 순역행)만 읽는다."""
+    if data[offset] != CODEC_VERSION:
+        raise ValueError(f"지원하지 않는 명반 레코드 버전: {data[offset]}")
+    ming_gong, guo_shu, jami_position, direction = _CORE_FIELDS.unpack_from(
+        data, offset + _CORE_FIELDS_OFFSET
+    )
+    if (
+        ming_gong not in _PALACES
+        or guo_shu not in _GUO_SHU
+        or jami_position not in _PALACES
+        or direction >= len(_DIRECTIONS)
+    ):
+        raise ValueError("명반 레코드 값이 올바르지 않다.")
+    return ming_gong, guo_shu, jami_position, _DIRECTIONS[direction]
+
+
+def iter_decode_charts(data: bytes) -> Iterator[CompactChart]:
+    """이어 붙인 여러 레코드를 차례로 읽는다."""
+    if len(data) % RECORD_SIZE:
+        raise ValueError("명반 레코드 길이가 올바르지 않다.")
+    for offset in range(0, len(data), RECORD_SIZE):
+        yield decode_chart(data, offset)
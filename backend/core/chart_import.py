@@ -0,0 +1,134 @@
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from core.chart_pool import BirthTuple, ChartPool, default_workers
+from core.storage import EncodedChart, encode_stored_chart, save_encoded_charts_bulk
+from models.schemas import BirthInfo
+
+_BIRTH_FIELDS = ("year", "month", "day", "hour", "is_lunar", "is_intercalation")
+
+
+def normalize_birth_info(raw: Any) -> Dict[str, Any]:
+    """CSV/NDJSON 한 행을 BirthInfo로 검증해 같은 모양의 dict로 바꾼다.
+
+    빈 CSV 칸은 값이 없는 것으로 보고 기본값을 쓴다. 검증에 실패하면 ValidationError를 낸다.
+    """
+    if isinstance(raw, dict):
+        raw = {name: value for name, value in raw.items() if value != ""}
+    return BirthInfo.model_validate(raw).model_dump()
+
+
+def iter_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """입력 파일의 행을 (행 번호, CSV dict 또는 NDJSON 문자열)로 차례로 읽는다."""
+    if file_format == "csv":
+        # 따옴표 안에 줄바꿈이 있는 행도 있으므로 읽은 줄 수로 행 번호를 센다.
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def import_charts(
+    stream: TextIO,
+    file_format: str,
+    chunk_size: int = 5000,
+    db_path: Optional[Path] = None,
+    errors: Optional[TextIO] = None,
+    workers: int = 1,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[int, int]:
+    """출생 정보를 배치 엔진으로 계산해 청크 단위 트랜잭션으로 저장한다.
+
+    workers가 2 이상이면 명반 조립과 인코딩을 ChartPool 워커 프로세스에 나눠 맡기고,
+    부모 프로세스는 입력 파싱과 저장만 한다. 저장한 행 수와 건너뛴 행 수를 반환하고,
+    건너뛴 행은 errors에 기록한다.
+    """
+    errors = errors or sys.stderr
+    skipped = 0
+    # 풀은 결과를 입력 순서대로 돌려주므로 계산을 맡긴 행을 같은 순서로 꺼내 짝을 맞춘다.
+    submitted: Deque[Tuple[int, Dict[str, Any]]] = deque()
+
+    def births() -> Iterator[BirthTuple]:
+        nonlocal skipped
+        for line_no, raw in iter_rows(stream, file_format):
+            try:
+                row = json.loads(raw) if isinstance(raw, str) else raw
+                birth_info = normalize_birth_info(row)
+            except (ValidationError, ValueError) as exc:
+                skipped += 1
+                print(f"{line_no}행: {exc!r}", file=errors)
+                continue
+            submitted.append((line_no, birth_info))
+            yield tuple(birth_info[name] for name in _BIRTH_FIELDS)
+
+    def items(pool: ChartPool) -> Iterator[Tuple[Dict[str, Any], EncodedChart]]:
+        nonlocal skipped
+        for encoded in pool.imap(births(), encoder=encode_stored_chart, progress=progress):
+            line_no, birth_info = submitted.popleft()
+            if encoded is None:
+                skipped += 1
+                print(f"{line_no}행: 유효하지 않은 날짜", file=errors)
+                continue
+            yield birth_info, encoded
+
+    imported = 0
+    with ChartPool(workers=workers, shard_size=chunk_size) as pool:
+        encoded_items = items(pool)
+        while True:
+            chunk = list(islice(encoded_items, chunk_size))
+            if not chunk:
+                break
+            imported += len(
+                save_encoded_charts_bulk(chunk, chunk_size=chunk_size, db_path=db_path)
+            )
+    return imported, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="CSV/NDJSON 출생 정보를 명반으로 계산해 DB에 일괄 저장한다."
+    )
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None)
+    parser.add_argument("--db-path", type=Path, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="명반 계산 프로세스 수 (0이면 CHART_POOL_WORKERS 또는 CPU 코어 수)",
+    )
+    parser.add_argument("--progress", action="store_true", help="처리한 행 수를 표시한다.")
+    args = parser.parse_args()
+
+    def report(done: int) -> None:
+        print(f"\r{done}개 계산", end="", file=sys.stderr, flush=True)
+
+    file_format = args.format or ("csv" if args.input.suffix == ".csv" else "ndjson")
+    with args.input.open(encoding="utf-8", newline="") as stream:
+        imported, skipped = import_charts(
+            stream,
+            file_format,
+            chunk_size=args.chunk_size,
+            db_path=args.db_path,
+            workers=args.workers or default_workers(),
+            progress=report if args.progress else None,
+        )
+    if args.progress:
+        print(file=sys.stderr)
+    print(f"{imported}개 저장, {skipped}개 건너뜀")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.lunar_converter import warm_up
+from core.ming_pan import get_engine_version
+from core.ming_pan_batch import analyze_births
+
+# (연, 월, 일, 시, 음력 여부, 윤달 여부)
+BirthTuple = Tuple[int, int, int, int, bool, bool]
+ChartEncoder = Callable[[Dict[str, Any]], Any]
+
+
+def _init_worker() -> None:
+    # fork로 만든 워커는 부모가 만든 변환표와 엔진 버전을 그대로 물려받으므로 아무 일도 하지 않는다.
+    warm_up()
+    get_engine_version()
+
+
+def _compute_shard(
+    shard: List[BirthTuple], encoder: Optional[ChartEncoder]
+) -> List[Any]:
+    """샤드 하나를 배치 엔진으로 계산하고 명반마다 encoder를 적용한다.
+
+    유효하지 않은 날짜는 None으로 남긴다.
+    """
+    batch = analyze_births(*zip(*shard))
+    results: List[Any] = []
+    for index, valid in enumerate(batch.valid.tolist()):
+        if not valid:
+            results.append(None)
+            continue
+        chart = batch.to_dict(index)
+        results.append(chart if encoder is None else encoder(chart))
+    return results
+
+
+def default_workers() -> int:
+    """CHART_POOL_WORKERS가 없으면 CPU 코어 수만큼 워커를 둔다."""
+    return int(os.getenv("CHART_POOL_WORKERS", "0")) or os.cpu_count() or 1
+
+
+class ChartPool:
+    """대량의 명반 계산을 여러 프로세스로 나눠 실행하는 풀.
+
+    명반 dict 조립과 인코딩은 순수 파이썬이라 GIL에 묶이므로, 입력을 shard_size개씩
+    나눠 워커 프로세스에 보낸다. 가능하면 fork로 워커를 만들어 부모가 미리 만든
+    음력 변환표를 복사 없이 공유한다. 결과는 입력 순서대로 돌려주고, 동시에 처리 중인
+    샤드를 max_pending개로 제한해 입력을 읽는 속도가 계산을 앞지르지 않게 한다.
+
+    workers가 1이면 프로세스를 만들지 않고 현재 프로세스에서 계산한다.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        shard_size: int = 2000,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        self.workers = workers or default_workers()
+        self.shard_size = shard_size
+        self.max_pending = max_pending or self.workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        warm_up()
+        get_engine_version()
+        if self.workers > 1:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+            )
+
+    def imap(
+        self,
+        births: Iterable[BirthTuple],
+        encoder: Optional[ChartEncoder] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[Any]:
+        """입력 순서대로 명반(또는 encoder 결과)을 내놓는다. 유효하지 않은 날짜는 None이다.
+
+        encoder는 워커에서 실행되므로 모듈 최상위 함수여야 한다. progress에는 샤드가
+        끝날 때마다 지금까지 처리한 입력 수를 넘긴다.
+        """
+        iterator = iter(births)
+        done = 0
+        if self._executor is None:
+            while True:
+                shard = list(islice(iterator, self.shard_size))
+                if not shard:
+                    return
+                yield from _compute_shard(shard, encoder)
+                done += len(shard)
+                if progress is not None:
+                    progress(done)
+
+        pending: Deque[Future] = deque()
+        try:
+            while True:
+                while len(pending) < self.max_pending:
+                    shard = list(islice(iterator, self.shard_size))
+                    if not shard:
+                        break
+                    pending.append(self._executor.submit(_compute_shard, shard, encoder))
+                if not pending:
+                    return
+                results = pending.popleft().result()
+                yield from results
+                done += len(results)
+                if progress is not None:
+                    progress(done)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        """워커 프로세스를 모두 끝낸다."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ChartPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
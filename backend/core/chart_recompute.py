@@ -0,0 +1,246 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.ming_pan import get_engine_version, recompute_chart
+from core.storage import (
+    ChartStorage,
+    get_storage,
+    resolve_db_path,
+    restore_chart_data,
+    split_constant_sections,
+)
+
+logger = logging.getLogger(__name__)
+
+# 대상 엔진 버전별로 마지막으로 처리한 computed_charts rowid를 남겨 중단한 곳부터 이어 간다.
+_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS recompute_state (
+    engine_version TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL,
+    recomputed INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+)
+"""
+_LOAD_STATE_SQL = """
+SELECT last_rowid, recomputed FROM recompute_state WHERE engine_version = ?
+"""
+_SAVE_STATE_SQL = """
+INSERT INTO recompute_state (engine_version, last_rowid, recomputed, updated_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (engine_version) DO UPDATE SET
+    last_rowid = excluded.last_rowid,
+    recomputed = excluded.recomputed,
+    updated_at = excluded.updated_at
+"""
+_CLEAR_STATE_SQL = """
+DELETE FROM recompute_state
+"""
+_SELECT_STALE_SQL = """
+SELECT rowid, chart_data, constant_sections
+FROM computed_charts
+WHERE rowid > ? AND engine_version != ?
+ORDER BY rowid
+LIMIT ?
+"""
+# 그 사이 저장 경로가 이미 새 버전으로 바꾼 행은 건드리지 않는다.
+_UPDATE_STALE_SQL = """
+UPDATE computed_charts
+SET chart_data = ?, constant_sections = ?, engine_version = ?
+WHERE rowid = ? AND engine_version != ?
+"""
+_COUNT_STALE_SQL = """
+SELECT COUNT(*) FROM computed_charts WHERE engine_version != ?
+"""
+
+
+def count_stale_charts(db_path: Optional[Path] = None) -> int:
+    """현재 엔진 버전이 아닌 계산 결과 행 수를 반환한다."""
+    with get_storage(db_path).connection() as conn:
+        return conn.execute(_COUNT_STALE_SQL, (get_engine_version(),)).fetchone()[0]
+
+
+def _recompute_rows(
+    rows: List[Tuple[int, str, str]], engine_version: str
+) -> List[tuple]:
+    updates = []
+    for rowid, chart_json, constant_sections in rows:
+        chart = recompute_chart(restore_chart_data(chart_json, constant_sections))
+        if chart is None:
+            # 엔진 결과가 아닌 명반은 다시 계산할 수 없으므로 버전만 바꾼다.
+            updates.append(
+                (chart_json, constant_sections, engine_version, rowid, engine_version)
+            )
+            continue
+        stored, sections = split_constant_sections(chart)
+        updates.append(
+            (
+                json.dumps(stored, ensure_ascii=False),
+                ",".join(sections),
+                engine_version,
+                rowid,
+                engine_version,
+            )
+        )
+    return updates
+
+
+def recompute_stale_charts(
+    db_path: Optional[Path] = None,
+    batch_size: int = 500,
+    max_load: float = 0.2,
+    stop: Optional[threading.Event] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """이전 엔진 버전으로 계산한 행만 다시 계산해 batch_size개씩 커밋한다.
+
+    읽기와 계산은 쓰기 잠금 밖에서 하고, 쓰기 트랜잭션에서는 행과 체크포인트만
+    바꾼다. 묶음마다 걸린 시간의 비율이 max_load를 넘지 않도록 쉬어 실시간 요청에
+    DB를 양보한다. stop이 설정되면 현재 묶음까지 커밋하고 멈추며, 다시 부르면
+    체크포인트부터 이어 간다. progress에는 지금까지 다시 쓴 행 수를 넘긴다.
+    """
+    if not 0 < max_load <= 1:
+        raise ValueError("max_load는 0보다 크고 1 이하여야 한다.")
+    storage: ChartStorage = get_storage(db_path)
+    engine_version = get_engine_version()
+    with storage.connection() as conn:
+        conn.execute(_STATE_SQL)
+        state = conn.execute(_LOAD_STATE_SQL, (engine_version,)).fetchone()
+    last_rowid, recomputed = (state[0], state[1]) if state is not None else (0, 0)
+    batches = 0
+    while stop is None or not stop.is_set():
+        started = time.perf_counter()
+        with storage.connection() as conn:
+            rows = conn.execute(
+                _SELECT_STALE_SQL, (last_rowid, engine_version, batch_size)
+            ).fetchall()
+        if not rows:
+            with storage.connection() as conn:
+                conn.execute(_CLEAR_STATE_SQL)
+            break
+        updates = _recompute_rows([tuple(row) for row in rows], engine_version)
+        last_rowid = rows[-1][0]
+        with storage.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            recomputed += conn.executemany(_UPDATE_STALE_SQL, updates).rowcount
+            conn.execute(
+                _SAVE_STATE_SQL,
+                (
+                    engine_version,
+                    last_rowid,
+                    recomputed,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+        batches += 1
+        if progress is not None:
+            progress(recomputed)
+        if max_load < 1:
+            pause = (time.perf_counter() - started) * (1 - max_load) / max_load
+            if stop is not None:
+                stop.wait(pause)
+            else:
+                time.sleep(pause)
+    return {"recomputed": recomputed, "batches": batches, "last_rowid": last_rowid}
+
+
+class ChartRecomputer:
+    """recompute_stale_charts를 백그라운드 스레드에서 한 번 실행한다."""
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        batch_size: int = 500,
+        max_load: float = 0.2,
+    ) -> None:
+        self.db_path = resolve_db_path(db_path)
+        self.batch_size = batch_size
+        self.max_load = max_load
+        self.result: Optional[Dict[str, int]] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="chart-recompute", daemon=True
+        )
+
+    def _run(self) -> None:
+        try:
+            self.result = recompute_stale_charts(
+                self.db_path,
+                batch_size=self.batch_size,
+                max_load=self.max_load,
+                stop=self._stop,
+            )
+            logger.info("명반 재계산: %s", self.result)
+        except Exception:
+            logger.exception("%s의 명반을 다시 계산하지 못했다.", self.db_path)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """현재 묶음까지 커밋하고 멈출 때까지 기다린다."""
+        self._stop.set()
+        self._thread.join()
+
+
+_RECOMPUTER: Optional[ChartRecomputer] = None
+
+
+def start_chart_recompute() -> bool:
+    """CHART_RECOMPUTE가 켜져 있으면 백그라운드 재계산을 시작한다."""
+    global _RECOMPUTER
+    if os.getenv("CHART_RECOMPUTE", "").strip().lower() not in {"1", "true", "yes"}:
+        return False
+    _RECOMPUTER = ChartRecomputer(
+        batch_size=int(os.getenv("CHART_RECOMPUTE_BATCH_SIZE", "500")),
+        max_load=float(os.getenv("CHART_RECOMPUTE_MAX_LOAD", "0.2")),
+    )
+    _RECOMPUTER.start()
+    return True
+
+
+def stop_chart_recompute() -> None:
+    """실행 중인 백그라운드 재계산을 멈춘다."""
+    global _RECOMPUTER
+    if _RECOMPUTER is not None:
+        _RECOMPUTER.stop()
+        _RECOMPUTER = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="이전 엔진 규칙으로 계산한 저장 명반만 다시 계산한다."
+    )
+    parser.add_argument("db_path", nargs="?", type=Path, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--max-load",
+        type=float,
+        default=0.2,
+        help="재계산에 쓰는 시간의 최대 비율 (1이면 쉬지 않는다)",
+    )
+    args = parser.parse_args()
+
+    get_storage(args.db_path).init_schema()
+    print(
+        f"엔진 버전 {get_engine_version()}: {count_stale_charts(args.db_path)}개 행이 오래되었다."
+    )
+    result = recompute_stale_charts(
+        args.db_path,
+        batch_size=args.batch_size,
+        max_load=args.max_load,
+        progress=lambda done: print(f"\r{done}개 다시 계산", end="", flush=True),
+    )
+    print(
+        f"\n{resolve_db_path(args.db_path)}: {result['recomputed']}개 행을 다시 계산했다."
+    )
+
+
+if __name__ == "__main__":
+    main()
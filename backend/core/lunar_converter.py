@@ -1,5 +1,7 @@
-﻿from dataclasses import dataclass
-from typing import Tuple
+﻿from array import array
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
 
 from korean_lunar_calendar import KoreanLunarCalendar
 
@@ -19,34 +21,132 @@ class SolarDate:
     day: int
 
 
-def _parse_iso_date(iso_date: str) -> Tuple[int, int, int]:
-    parts = iso_date.split("-")
-    return int(parts[0]), int(parts[1]), int(parts[2])
+_LUNAR_DATA = KoreanLunarCalendar.KOREAN_LUNAR_DATA
+_BASE_YEAR = KoreanLunarCalendar.KOREAN_LUNAR_BASE_YEAR
+_SOLAR_MIN_ORDINAL = date(1000, 2, 13).toordinal()
+_SOLAR_MAX_ORDINAL = date(2050, 12, 31).toordinal()
+# 라이브러리는 그레고리력 전환으로 사라진 1582-10-05 ~ 1582-10-14를 거부한다.
+_SOLAR_GAP_START = date(1582, 10, 5).toordinal()
+_SOLAR_GAP_END = date(1582, 10, 14).toordinal()
 
 
-def convert_solar_to_lunar(year: int, month: int, day: int) -> LunarDate:
-    """양력을 음력으로 변환한다."""
-    calendar = KoreanLunarCalendar()
-    calendar.setSolarDate(year, month, day)
-    lunar_iso = calendar.LunarIsoFormat()
-    lunar_year, lunar_month, lunar_day = _parse_iso_date(lunar_iso)
+class _CalendarTable:
+    """라이브러리 원본 데이터로 만든 일 단위 양력/음력 변환표."""
+
+    def __init__(self) -> None:
+        total_days = _SOLAR_MAX_ORDINAL - _SOLAR_MIN_ORDINAL + 1
+        # 일 인덱스(양력 서수 - 기준 서수) -> 압축된 음력 날짜
+        self.lunar_by_day = array("i")
+        # (연, 월, 윤달) 슬롯 -> 그 달 1일의 일 인덱스, 없는 달은 -1
+        self.month_starts = array("i", [-1]) * (len(_LUNAR_DATA) * 26)
+        self.month_days = array("b", [0]) * (len(_LUNAR_DATA) * 26)
+
+        year = _BASE_YEAR
+        while len(self.lunar_by_day) < total_days:
+            lunar_data = _LUNAR_DATA[year - _BASE_YEAR]
+            leap_month = (lunar_data >> 12) & 0x0F
+            for month in range(1, 13):
+                big = (lunar_data >> (12 - month)) & 0x01
+                self._append_month(year, month, False, 30 if big else 29)
+                if month == leap_month:
+                    big = (lunar_data >> 16) & 0x01
+                    self._append_month(year, month, True, 30 if big else 29)
+            year += 1
+        del self.lunar_by_day[total_days:]
+
+    def _append_month(
+        self, year: int, month: int, is_intercalation: bool, days: int
+    ) -> None:
+        slot = _month_slot(year, month, is_intercalation)
+        self.month_starts[slot] = len(self.lunar_by_day)
+        self.month_days[slot] = days
+        # 일은 압축 값의 하위 비트이므로 그 달의 날짜들은 연속된 정수이다.
+        first = _pack_lunar(year, month, 1, is_intercalation)
+        self.lunar_by_day.extend(range(first, first + days))
+
+
+def _month_slot(year: int, month: int, is_intercalation: bool) -> int:
+    return (year - _BASE_YEAR) * 26 + (month - 1) * 2 + int(is_intercalation)
+
+
+def _pack_lunar(year: int, month: int, day: int, is_intercalation: bool) -> int:
+    return (year << 10) | (int(is_intercalation) << 9) | (month << 5) | day
+
+
+def _unpack_lunar(packed: int) -> LunarDate:
     return LunarDate(
-        year=lunar_year,
-        month=lunar_month,
-        day=lunar_day,
-        is_intercalation=calendar.isIntercalation(),
+        year=packed >> 10,
+        month=(packed >> 5) & 0x0F,
+        day=packed & 0x1F,
+        is_intercalation=bool((packed >> 9) & 0x01),
     )
 
 
+@lru_cache(maxsize=1)
+def _get_calendar_table() -> _CalendarTable:
+    return _CalendarTable()
+
+
+@dataclass(frozen=True)
+class SolarLunarTable:
+    """양력 서수로 음력 날짜를 찾는 일 단위 변환표.
+
+    lunar_by_day[서수 - min_ordinal]은 (연 << 10) | (윤달 << 9) | (월 << 5) | 일로
+    압축한 음력 날짜이다. gap_start ~ gap_end는 지원하지 않는 날짜이다.
+    """
+
+    min_ordinal: int
+    max_ordinal: int
+    gap_start: int
+    gap_end: int
+    lunar_by_day: array
+
+
+def get_solar_lunar_table() -> SolarLunarTable:
+    """배열 연산으로 여러 날짜를 한 번에 변환할 때 쓰는 양력 -> 음력 변환표를 반환한다."""
+    return SolarLunarTable(
+        min_ordinal=_SOLAR_MIN_ORDINAL,
+        max_ordinal=_SOLAR_MAX_ORDINAL,
+        gap_start=_SOLAR_GAP_START,
+        gap_end=_SOLAR_GAP_END,
+        lunar_by_day=_get_calendar_table().lunar_by_day,
+    )
+
+
+def warm_up() -> None:
+    """변환표를 미리 만들어 첫 요청의 지연을 없앤다."""
+    _get_calendar_table()
+
+
+def convert_solar_to_lunar(year: int, month: int, day: int) -> LunarDate:
+    """양력을 음력으로 변환한다."""
+    try:
+        ordinal = date(year, month, day).toordinal()
+    except ValueError as exc:
+        raise ValueError(f"유효하지 않은 양력 날짜: {year}-{month}-{day}") from exc
+    if not _SOLAR_MIN_ORDINAL <= ordinal <= _SOLAR_MAX_ORDINAL or (
+        _SOLAR_GAP_START <= ordinal <= _SOLAR_GAP_END
+    ):
+        raise ValueError(f"지원 범위를 벗어난 양력 날짜: {year}-{month}-{day}")
+    table = _get_calendar_table()
+    return _unpack_lunar(table.lunar_by_day[ordinal - _SOLAR_MIN_ORDINAL])
+
+
 def convert_lunar_to_solar(
     year: int, month: int, day: int, is_intercalation: bool = False
 ) -> SolarDate:
     """음력을 양력으로 변환한다."""
-    calendar = KoreanLunarCalendar()
-    calendar.setLunarDate(year, month, day, is_intercalation)
-    solar_iso = calendar.SolarIsoFormat()
-    solar_year, solar_month, solar_day = _parse_iso_date(solar_iso)
-    return SolarDate(year=solar_year, month=solar_month, day=solar_day)
+    table = _get_calendar_table()
+    day_index = -1
+    if _BASE_YEAR <= year < _BASE_YEAR + len(_LUNAR_DATA) and 1 <= month <= 12:
+        slot = _month_slot(year, month, is_intercalation)
+        if 1 <= day <= table.month_days[slot]:
+            day_index = table.month_starts[slot] + day - 1
+    if not 0 <= day_index < len(table.lunar_by_day):
+        leap_text = " (윤달)" if is_intercalation else ""
+        raise ValueError(f"유효하지 않은 음력 날짜: {year}-{month}-{day}{leap_text}")
+    solar = date.fromordinal(_SOLAR_MIN_ORDINAL + day_index)
+    return SolarDate(year=solar.year, month=solar.month, day=solar.day)
 
 
 def get_lunar_date(
@@ -0,0 +1,320 @@
+import os
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 핫 패스는 enabled()만 확인하므로 꺼져 있을 때는 함수 호출 한 번의 비용만 든다.
+# 모듈을 불러오는 시점에는 .env가 아직 적용되지 않았을 수 있어 처음 확인할 때 읽는다.
+_ENABLED: Optional[bool] = None
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """누적 버킷 없이 구간별 개수를 세고 내보낼 때 누적한다."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """(구간별 개수, 합계)를 반환한다."""
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+_STAGE_METRIC = "jami_stage_duration_seconds"
+_REQUEST_METRIC = "jami_http_request_duration_seconds"
+_HELP = {
+    _STAGE_METRIC: "Time spent in each hot-path stage.",
+    _REQUEST_METRIC: "Time spent serving each HTTP route.",
+}
+_HISTOGRAMS: Dict[str, Dict[Labels, Histogram]] = {_STAGE_METRIC: {}, _REQUEST_METRIC: {}}
+_HISTOGRAMS_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    """구간별 시간 측정이 켜져 있는지 반환한다. 처음 부를 때 METRICS_ENABLED를 읽는다."""
+    global _ENABLED
+    if _ENABLED is None:
+        _ENABLED = os.getenv("METRICS_ENABLED", "").strip().lower() in {"1", "true", "yes"}
+    return _ENABLED
+
+
+def set_enabled(value: bool) -> None:
+    """구간별 시간 측정을 켜거나 끈다."""
+    global _ENABLED
+    _ENABLED = value
+
+
+def _observe(metric: str, labels: Labels, seconds: float) -> None:
+    family = _HISTOGRAMS[metric]
+    histogram = family.get(labels)
+    if histogram is None:
+        with _HISTOGRAMS_LOCK:
+            histogram = family.setdefault(labels, Histogram())
+    histogram.observe(seconds)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """구간 하나의 소요 시간을 기록한다."""
+    _observe(_STAGE_METRIC, (("stage", stage),), seconds)
+
+
+def observe_request(method: str, route: str, seconds: float) -> None:
+    """HTTP 요청 하나의 소요 시간을 기록한다."""
+    _observe(_REQUEST_METRIC, (("method", method), ("route", route)), seconds)
+
+
+class _StageTimer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        observe_stage(self.stage, perf_counter() - self.started)
+
+
+_NOOP = nullcontext()
+
+
+def timer(stage: str) -> Any:
+    """with 블록의 소요 시간을 stage로 기록한다. 꺼져 있으면 아무것도 하지 않는다."""
+    return _StageTimer(stage) if enabled() else _NOOP
+
+
+def timed(stage: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """함수 호출 시간을 stage로 기록하는 데코레이터."""
+
+    def decorate(func: Callable[..., T]) -> Callable[..., T]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not enabled():
+                return func(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_stage(stage, perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+class RequestMetricsMiddleware:
+    """라우트 경로 템플릿별 요청 처리 시간을 기록하는 ASGI 미들웨어."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not enabled() or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            observe_request(scope["method"], route, perf_counter() - started)
+
+
+def reset_metrics() -> None:
+    """기록한 히스토그램을 모두 지운다."""
+    with _HISTOGRAMS_LOCK:
+        for family in _HISTOGRAMS.values():
+            family.clear()
+
+
+def _format_labels(labels: Iterable[Tuple[str, Any]]) -> str:
+    pairs = [
+        name
+        + '="'
+        + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in labels
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histograms(lines: List[str]) -> None:
+    for metric, family in _HISTOGRAMS.items():
+        lines.append(f"# HELP {metric} {_HELP[metric]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, histogram in sorted(family.items()):
+            counts, total = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels((*labels, ("le", repr(bound))))
+                lines.append(f"{metric}_bucket{bucket_labels} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(
+                f"{metric}_bucket{_format_labels((*labels, ('le', '+Inf')))} {cumulative}"
+            )
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {cumulative}")
+
+
+def _render_samples(
+    lines: List[str],
+    name: str,
+    metric_type: str,
+    help_text: str,
+    samples: Iterable[Tuple[Labels, float]],
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def _render_cache(
+    lines: List[str], prefix: str, description: str, stats: Dict[str, int]
+) -> None:
+    lookups = stats["hits"] + stats["misses"]
+    for key, metric_type in (
+        ("hits", "counter"),
+        ("misses", "counter"),
+        ("evictions", "counter"),
+        ("size", "gauge"),
+        ("max_size", "gauge"),
+    ):
+        suffix = "_total" if metric_type == "counter" else ""
+        _render_samples(
+            lines,
+            f"{prefix}_{key}{suffix}",
+            metric_type,
+            f"{description} {key.replace('_', ' ')}.",
+            [((), stats[key])],
+        )
+    _render_samples(
+        lines,
+        f"{prefix}_hit_ratio",
+        "gauge",
+        f"{description} hits divided by lookups.",
+        [((), stats["hits"] / lookups if lookups else 0.0)],
+    )
+
+
+def render_metrics(
+    chart_cache: Optional[Dict[str, int]] = None,
+    storages: Iterable[Dict[str, Any]] = (),
+    writers: Iterable[Dict[str, Any]] = (),
+    startup: Optional[Dict[str, Any]] = None,
+    response_cache: Optional[Dict[str, int]] = None,
+) -> str:
+    """히스토그램과 캐시/연결 풀/지연 기록 상태를 Prometheus 텍스트 형식으로 만든다."""
+    lines: List[str] = []
+    _render_samples(
+        lines,
+        "jami_metrics_enabled",
+        "gauge",
+        "Whether per-stage timing is enabled.",
+        [((), int(enabled()))],
+    )
+    _render_histograms(lines)
+    if chart_cache is not None:
+        _render_cache(lines, "jami_chart_cache", "Chart cache", chart_cache)
+    if response_cache is not None:
+        _render_cache(lines, "jami_response_cache", "Saved chart response cache", response_cache)
+    storages = list(storages)
+    for key, help_text in (
+        ("pool_size", "Maximum idle connections kept per database."),
+        ("idle", "Idle pooled connections per database."),
+        ("created", "Connections opened per database."),
+    ):
+        _render_samples(
+            lines,
+            f"jami_db_pool_{key}",
+            "gauge",
+            help_text,
+            [((("db_path", stats["db_path"]),), stats[key]) for stats in storages],
+        )
+    writers = list(writers)
+    for key, name, metric_type, help_text in (
+        ("queued", "queued", "gauge", "Charts waiting in the write-behind queue."),
+        ("batches", "batches_total", "counter", "Write-behind group commits."),
+        ("written", "written_total", "counter", "Charts committed by write-behind."),
+        ("failed", "failed_total", "counter", "Charts write-behind failed to commit."),
+        ("retried", "retried_total", "counter", "Write-behind batch commit retries."),
+        (
+            "overflow",
+            "overflow_total",
+            "counter",
+            "Charts saved synchronously because the write-behind queue was full.",
+        ),
+    ):
+        _render_samples(
+            lines,
+            f"jami_write_behind_{name}",
+            metric_type,
+            help_text,
+            [((("db_path", stats["db_path"]),), stats[key]) for stats in writers],
+        )
+    if startup is not None:
+        _render_samples(
+            lines,
+            "jami_startup_milestone_seconds",
+            "gauge",
+            "Seconds from process start to each startup milestone.",
+            [
+                ((("milestone", name),), value)
+                for name, value in startup["milestones"].items()
+            ],
+        )
+        _render_samples(
+            lines,
+            "jami_startup_phase_seconds",
+            "gauge",
+            "Duration of each startup phase.",
+            [
+                ((("phase", name),), value)
+                for name, value in startup["phases"].items()
+            ],
+        )
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,20 @@
-﻿from typing import Dict, List, Tuple
-
-from core.lunar_converter import get_lunar_date
+﻿import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import metrics
+from core.lunar_converter import LunarDate, get_lunar_date
 from core.star_data import BRANCH_NAMES, MAIN_STARS, PALACE_METADATA, PALACE_NAMES, STAR_METADATA
 
+logger = logging.getLogger(__name__)
+
 
 def _normalize_palace_index(value: int) -> int:
     return ((value - 1) % 12) + 1
@@ -34,14 +46,19 @@ def calculate_guo_shu(stem_num: int, branch_num: int) -> int:
     return result if result != 0 else 5
 
 
+def _compute_jami_position(day: int, guo_shu: int) -> Tuple[int, int]:
+    # (day + bosu)가 guo_shu로 나누어떨어지는 최소 bosu는 (-day) % guo_shu이다.
+    bosu = -day % guo_shu
+    jami_raw = (day + bosu) // guo_shu
+    return _normalize_palace_index(jami_raw), bosu
+
+
 def find_jami_position(day: int, guo_shu: int) -> Tuple[int, int]:
     """자미성 위치와 보수를 계산한다."""
-    bosu = 0
-    while (day + bosu) % guo_shu != 0:
-        bosu += 1
-    jami_raw = (day + bosu) // guo_shu
-    jami_position = _normalize_palace_index(jami_raw)
-    return jami_position, bosu
+    cached = _JAMI_TABLE.get((day, guo_shu))
+    if cached is not None:
+        return cached[0], cached[1]
+    return _compute_jami_position(day, guo_shu)
 
 
 def get_hour_branch(hour: int) -> int:
@@ -61,7 +78,43 @@ def get_jami_direction(bosu: int) -> str:
     return "순행" if bosu % 2 == 0 else "역행"
 
 
-def _build_star_layout(
+def _read_only(*args: Any, **kwargs: Any) -> None:
+    raise TypeError("여러 명반이 공유하는 값이므로 수정할 수 없다. 복사해서 고쳐야 한다.")
+
+
+class _ReadOnlyList(list):
+    """명반 캐시와 템플릿이 공유하는 리스트. 비교와 JSON 직렬화는 list와 같다."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self) -> Tuple[type, Tuple[list]]:
+        # 복사하거나 다른 프로세스로 보내면 수정할 수 있는 list가 된다.
+        return list, (list(self),)
+
+
+class _ReadOnlyDict(dict):
+    """명반 캐시와 템플릿이 공유하는 dict. 비교와 JSON 직렬화는 dict와 같다."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> Tuple[type, Tuple[dict]]:
+        return dict, (dict(self),)
+
+
+def _freeze(value: Any) -> Any:
+    """중첩 리스트와 dict를 수정할 수 없는 사본으로 바꾼다."""
+    if isinstance(value, list):
+        return _ReadOnlyList(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return _ReadOnlyDict((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _compute_star_layout(
     jami_position: int,
 ) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
     palace_stars = {i: [] for i in range(1, 13)}
@@ -80,8 +133,31 @@ def _build_star_layout(
     return palace_layout, stars_data
 
 
-def get_star_metadata_list() -> List[Dict[str, object]]:
-    """14주성 메타데이터 목록을 반환한다."""
+def _build_star_layout(
+    jami_position: int,
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    # 미리 계산한 템플릿을 그대로 준다. 수정할 수 없으므로 복사하지 않아도 된다.
+    return _STAR_LAYOUT_TABLE[jami_position]
+
+
+def _build_jami_table() -> Dict[Tuple[int, int], Tuple[int, int, str]]:
+    table: Dict[Tuple[int, int], Tuple[int, int, str]] = {}
+    for day in range(1, 31):
+        for guo_shu in range(1, 6):
+            jami_position, bosu = _compute_jami_position(day, guo_shu)
+            table[(day, guo_shu)] = (jami_position, bosu, get_jami_direction(bosu))
+    return table
+
+
+# 국수는 1~5, 음력 일은 1~30이므로 자미성 결과와 명반 배치를 미리 계산해 둔다.
+_JAMI_TABLE = _build_jami_table()
+_STAR_LAYOUT_TABLE: Dict[int, Tuple[List[Dict[str, object]], List[Dict[str, object]]]] = {
+    jami_position: tuple(_freeze(part) for part in _compute_star_layout(jami_position))
+    for jami_position in range(1, 13)
+}
+
+
+def _build_star_metadata_list() -> List[Dict[str, object]]:
     metadata_list: List[Dict[str, object]] = []
     for star in MAIN_STARS:
         meta = STAR_METADATA.get(star.name, {})
@@ -91,8 +167,7 @@ def get_star_metadata_list() -> List[Dict[str, object]]:
     return metadata_list
 
 
-def get_palace_metadata_list() -> List[Dict[str, object]]:
-    """12궁 메타데이터 목록을 반환한다."""
+def _build_palace_metadata_list() -> List[Dict[str, object]]:
     metadata_list: List[Dict[str, object]] = []
     for index, name in enumerate(PALACE_NAMES, start=1):
         meta = PALACE_METADATA.get(name, {})
@@ -100,6 +175,21 @@ def get_palace_metadata_list() -> List[Dict[str, object]]:
     return metadata_list
 
 
+# 메타데이터는 상수이므로 한 번만 만들고 모든 명반이 같은 리스트를 공유한다.
+_STAR_METADATA_LIST = _freeze(_build_star_metadata_list())
+_PALACE_METADATA_LIST = _freeze(_build_palace_metadata_list())
+
+
+def get_star_metadata_list() -> List[Dict[str, object]]:
+    """14주성 메타데이터 목록을 반환한다. 공유 리스트이므로 수정하면 안 된다."""
+    return _STAR_METADATA_LIST
+
+
+def get_palace_metadata_list() -> List[Dict[str, object]]:
+    """12궁 메타데이터 목록을 반환한다. 공유 리스트이므로 수정하면 안 된다."""
+    return _PALACE_METADATA_LIST
+
+
 def build_summary(
     ming_gong: int,
     guo_shu: int,
@@ -122,19 +212,188 @@ def build_summary(
     )
 
 
-def analyze_birth(
-    year: int,
-    month: int,
-    day: int,
-    hour: int,
-    is_lunar: bool,
-    is_intercalation: bool,
-    gender: str,
-) -> Dict[str, object]:
-    """생년월일시를 기반으로 명반 데이터를 계산한다."""
-    lunar_date = get_lunar_date(
-        year, month, day, is_lunar, is_intercalation=is_intercalation
-    )
+# (음력 연, 월, 일, 윤달 여부, 시지 번호)
+ChartKey = Tuple[int, int, int, bool, int]
+
+
+class ChartCache:
+    """정규화된 출생 정보로 명반 결과를 보관하는 LRU 캐시.
+
+    max_size가 없으면 처음 넣을 때 CHART_CACHE_SIZE를 읽는다. 모듈을 불러오는
+    시점에는 .env가 아직 적용되지 않았을 수 있다.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self._max_size = max_size
+        self._entries: "OrderedDict[ChartKey, Dict[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            self._max_size = int(os.getenv("CHART_CACHE_SIZE", "4096"))
+        return self._max_size
+
+    def get(self, key: ChartKey) -> Optional[Dict[str, object]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: ChartKey, value: Dict[str, object]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_CHART_CACHE = ChartCache()
+
+
+def get_chart_cache_stats() -> Dict[str, int]:
+    """명반 캐시의 크기와 적중/실패/축출 횟수를 반환한다."""
+    return _CHART_CACHE.stats()
+
+
+def clear_chart_cache() -> None:
+    """명반 캐시를 비운다."""
+    _CHART_CACHE.clear()
+
+
+# load_chart_atlas로 켜는 조회 모드. core.chart_atlas가 이 모듈을 import하므로 늦게 불러온다.
+_CHART_ATLAS = None
+
+
+def load_chart_atlas(path: Optional[Path] = None) -> bool:
+    """미리 계산한 명반 아틀라스를 메모리 매핑해 조회 모드를 켠다.
+
+    path가 없으면 CHART_ATLAS_PATH를 사용하고, 둘 다 없으면 아무것도 하지 않는다.
+    아틀라스 범위를 벗어난 날짜는 계속 직접 계산한다. 현재와 다른 엔진 버전으로
+    만든 아틀라스는 쓰지 않고 False를 반환한다.
+    """
+    global _CHART_ATLAS
+    if path is None:
+        env_path = os.getenv("CHART_ATLAS_PATH")
+        if not env_path:
+            return False
+        path = Path(env_path)
+    from core.chart_atlas import AtlasVersionError, ChartAtlas
+
+    try:
+        atlas = ChartAtlas(path)
+    except AtlasVersionError as exc:
+        logger.warning("명반 아틀라스를 쓰지 않는다: %s", exc)
+        return False
+    previous, _CHART_ATLAS = _CHART_ATLAS, atlas
+    if previous is not None:
+        previous.close()
+    _CHART_CACHE.clear()
+    return True
+
+
+def unload_chart_atlas() -> None:
+    """아틀라스 조회 모드를 끄고 매핑한 파일을 닫는다."""
+    global _CHART_ATLAS
+    previous, _CHART_ATLAS = _CHART_ATLAS, None
+    if previous is not None:
+        previous.close()
+    _CHART_CACHE.clear()
+
+
+# load_shared_chart_cache로 켜는 프로세스 간 공유 캐시. 명반 핵심 필드만 압축 레코드로 둔다.
+_SHARED_CHARTS = None
+
+
+def load_shared_chart_cache(backend: Optional[Any] = None) -> bool:
+    """여러 워커가 함께 쓰는 명반 캐시 계층을 켠다.
+
+    backend가 없으면 SHARED_CHART_CACHE가 켜져 있을 때만 CACHE_BACKEND 설정으로
+    만든다. 프로세스 안의 명반 캐시에서 놓친 경우에만 조회한다.
+    """
+    global _SHARED_CHARTS
+    if backend is None:
+        if os.getenv("SHARED_CHART_CACHE", "").strip().lower() not in {"1", "true", "yes"}:
+            return False
+        from core.cache_backends import create_cache_backend
+
+        backend = create_cache_backend(
+            "charts", int(os.getenv("SHARED_CHART_CACHE_SIZE", "65536")), slot_size=128
+        )
+    _SHARED_CHARTS = backend
+    _CHART_CACHE.clear()
+    return True
+
+
+def unload_shared_chart_cache() -> None:
+    """공유 명반 캐시 계층을 끄고 백엔드를 닫는다."""
+    global _SHARED_CHARTS
+    if _SHARED_CHARTS is not None:
+        _SHARED_CHARTS.close()
+    _SHARED_CHARTS = None
+    _CHART_CACHE.clear()
+
+
+def shared_chart_cache_blocks() -> bool:
+    """공유 명반 캐시가 켜져 있고 조회가 소켓이나 파일 잠금을 기다릴 수 있으면 참이다.
+
+    이때 analyze_birth는 이벤트 루프 밖에서 불러야 한다.
+    """
+    return _SHARED_CHARTS is not None and _SHARED_CHARTS.blocking
+
+
+def _shared_chart_key(key: ChartKey) -> str:
+    # 배포 전 엔진이 남긴 항목을 조립하지 않도록 엔진 버전을 키에 넣는다.
+    return get_engine_version() + ":" + ":".join(str(int(part)) for part in key)
+
+
+def _shared_chart_fields(key: ChartKey) -> Optional[Tuple[int, int, int, str]]:
+    from core.chart_codec import decode_core_fields
+
+    data = _SHARED_CHARTS.get(_shared_chart_key(key))
+    if data is None:
+        return None
+    try:
+        return decode_core_fields(data)
+    except (ValueError, IndexError):
+        # 깨진 항목은 없는 것으로 보고 다시 계산해 덮어쓴다.
+        return None
+
+
+def _share_chart(key: ChartKey, chart: Dict[str, object]) -> None:
+    from core.chart_codec import encode_chart
+
+    _SHARED_CHARTS.set(_shared_chart_key(key), encode_chart(chart))
+
+
+def _compute_chart(lunar_date: LunarDate, hour_branch: int) -> Dict[str, object]:
     month_branch = get_branch_number(lunar_date.month)
     day_branch = get_branch_number(lunar_date.day)
     ming_gong = calculate_ming_gong(month_branch, day_branch)
@@ -142,13 +401,32 @@ def analyze_birth(
     stem_num, branch_num = get_stem_branch_numbers(lunar_date.year)
     guo_shu = calculate_guo_shu(stem_num, branch_num)
 
-    jami_position, bosu = find_jami_position(lunar_date.day, guo_shu)
-    jami_direction = get_jami_direction(bosu)
+    jami_entry = _JAMI_TABLE.get((lunar_date.day, guo_shu))
+    if jami_entry is None:
+        jami_position, bosu = _compute_jami_position(lunar_date.day, guo_shu)
+        jami_direction = get_jami_direction(bosu)
+    else:
+        jami_position, _, jami_direction = jami_entry
+    return _assemble_chart(
+        lunar_date, hour_branch, ming_gong, guo_shu, jami_position, jami_direction
+    )
+
+
+def _assemble_chart(
+    lunar_date: LunarDate,
+    hour_branch: int,
+    ming_gong: int,
+    guo_shu: int,
+    jami_position: int,
+    jami_direction: str,
+) -> Dict[str, object]:
     palace_layout, stars_data = _build_star_layout(jami_position)
-    hour_branch = get_hour_branch(hour)
     hour_branch_name = get_branch_name(hour_branch)
     stars_meta = get_star_metadata_list()
     palace_meta = get_palace_metadata_list()
+    timing = metrics.enabled()
+    if timing:
+        started = perf_counter()
     summary = build_summary(
         ming_gong=ming_gong,
         guo_shu=guo_shu,
@@ -157,6 +435,8 @@ def analyze_birth(
         hour_branch_name=hour_branch_name,
         palace_layout=palace_layout,
     )
+    if timing:
+        metrics.observe_stage("summary", perf_counter() - started)
 
     return {
         "ming_gong": ming_gong,
@@ -170,10 +450,114 @@ def analyze_birth(
         "stars_meta": stars_meta,
         "palace_meta": palace_meta,
         "summary": summary,
-        "lunar_date": {
-            "year": lunar_date.year,
-            "month": lunar_date.month,
-            "day": lunar_date.day,
-            "is_intercalation": lunar_date.is_intercalation,
-        },
+        "lunar_date": _ReadOnlyDict(
+            year=lunar_date.year,
+            month=lunar_date.month,
+            day=lunar_date.day,
+            is_intercalation=lunar_date.is_intercalation,
+        ),
     }
+
+
+def analyze_birth(
+    year: int,
+    month: int,
+    day: int,
+    hour: int,
+    is_lunar: bool,
+    is_intercalation: bool,
+    gender: str,
+) -> Dict[str, object]:
+    """생년월일시를 기반으로 명반 데이터를 계산한다.
+
+    결과는 음력 날짜와 시지로만 결정되므로 캐시에서 공유된다. 반환 dict의
+    최상위 키는 복사본이고, 공유되는 중첩 리스트/dict는 수정하면 TypeError를 낸다.
+    """
+    # 측정이 꺼져 있으면 지역 변수 검사만 하도록 timer 대신 직접 잰다.
+    timing = metrics.enabled()
+    if timing:
+        started = perf_counter()
+    lunar_date = get_lunar_date(
+        year, month, day, is_lunar, is_intercalation=is_intercalation
+    )
+    if timing:
+        metrics.observe_stage("lunar_conversion", perf_counter() - started)
+    hour_branch = get_hour_branch(hour)
+    key = (
+        lunar_date.year,
+        lunar_date.month,
+        lunar_date.day,
+        lunar_date.is_intercalation,
+        hour_branch,
+    )
+    chart = _CHART_CACHE.get(key)
+    if chart is None:
+        if timing:
+            started = perf_counter()
+        fields = None
+        if _CHART_ATLAS is not None:
+            fields = _CHART_ATLAS.lookup_core_fields(
+                lunar_date.year,
+                lunar_date.month,
+                lunar_date.day,
+                lunar_date.is_intercalation,
+            )
+        shared_miss = False
+        if fields is None and _SHARED_CHARTS is not None:
+            fields = _shared_chart_fields(key)
+            shared_miss = fields is None
+        if fields is not None:
+            chart = _assemble_chart(lunar_date, hour_branch, *fields)
+        else:
+            chart = _compute_chart(lunar_date, hour_branch)
+        if shared_miss:
+            _share_chart(key, chart)
+        if timing:
+            metrics.observe_stage("chart_computation", perf_counter() - started)
+        _CHART_CACHE.put(key, chart)
+    return dict(chart)
+
+
+# 계산 결과 중 저장하지 않고 읽을 때 현재 값으로 붙이는 메타데이터 구간.
+_UNSTORED_SECTIONS = ("stars_meta", "palace_meta")
+
+
+@lru_cache(maxsize=1)
+def get_engine_version() -> str:
+    """저장되는 명반 필드를 결정하는 규칙과 데이터의 지문을 반환한다.
+
+    주성 오프셋, 궁 이름, 요약 문구처럼 결과를 바꾸는 변경만 잡도록 대표 입력들의
+    계산 결과를 해시한다. 국수를 모두 거치도록 10년, 음력 일 1~30일을 쓴다.
+    """
+    digest = hashlib.sha256()
+    for year in range(1984, 1994):
+        for day in range(1, 31):
+            lunar_date = LunarDate(year, day % 12 + 1, day, False)
+            chart = _compute_chart(lunar_date, (year + day) % 12 + 1)
+            stored = {
+                key: value
+                for key, value in chart.items()
+                if key not in _UNSTORED_SECTIONS
+            }
+            digest.update(json.dumps(stored, ensure_ascii=False, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def recompute_chart(chart_data: Dict[str, Any]) -> Optional[Dict[str, object]]:
+    """저장된 명반의 음력 날짜와 시지로 현재 규칙의 명반을 다시 계산한다.
+
+    엔진 결과가 아니어서 음력 날짜나 시지가 없으면 None을 반환한다.
+    """
+    lunar_date = chart_data.get("lunar_date")
+    hour_branch = chart_data.get("hour_branch")
+    if not isinstance(lunar_date, dict) or not isinstance(hour_branch, int):
+        return None
+    return _compute_chart(
+        LunarDate(
+            lunar_date["year"],
+            lunar_date["month"],
+            lunar_date["day"],
+            bool(lunar_date["is_intercalation"]),
+        ),
+        hour_branch,
+    )
@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from core.lunar_converter import get_solar_lunar_table
+from core.ming_pan import (
+    _build_star_layout,
+    build_summary,
+    get_branch_name,
+    get_jami_direction,
+    get_palace_metadata_list,
+    get_star_metadata_list,
+)
+from core.star_data import MAIN_STARS
+
+_STAR_OFFSETS = np.array([star.offset for star in MAIN_STARS], dtype=np.int64)
+# numpy datetime64[D]는 1970-01-01 기준 일수이므로 date 서수와의 차이를 보정한다.
+_EPOCH_ORDINAL = 719163
+
+
+@dataclass(frozen=True)
+class ChartBatch:
+    """여러 명반의 계산 결과를 열 단위로 보관한다."""
+
+    valid: np.ndarray
+    lunar_year: np.ndarray
+    lunar_month: np.ndarray
+    lunar_day: np.ndarray
+    is_intercalation: np.ndarray
+    ming_gong: np.ndarray
+    guo_shu: np.ndarray
+    jami_position: np.ndarray
+    bosu: np.ndarray
+    hour_branch: np.ndarray
+    star_palaces: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def to_dict(self, index: int) -> Dict[str, object]:
+        """index번째 명반을 analyze_birth와 같은 형태의 dict로 만든다."""
+        if not self.valid[index]:
+            raise ValueError(f"{index}번째 입력은 유효하지 않은 날짜이다.")
+        ming_gong = int(self.ming_gong[index])
+        guo_shu = int(self.guo_shu[index])
+        jami_position = int(self.jami_position[index])
+        jami_direction = get_jami_direction(int(self.bosu[index]))
+        hour_branch = int(self.hour_branch[index])
+        hour_branch_name = get_branch_name(hour_branch)
+        palace_layout, stars_data = _build_star_layout(jami_position)
+        summary = build_summary(
+            ming_gong=ming_gong,
+            guo_shu=guo_shu,
+            jami_position=jami_position,
+            jami_direction=jami_direction,
+            hour_branch_name=hour_branch_name,
+            palace_layout=palace_layout,
+        )
+        return {
+            "ming_gong": ming_gong,
+            "guo_shu": guo_shu,
+            "jami_position": jami_position,
+            "jami_direction": jami_direction,
+            "hour_branch": hour_branch,
+            "hour_branch_name": hour_branch_name,
+            "palace_layout": palace_layout,
+            "stars_data": stars_data,
+            "stars_meta": get_star_metadata_list(),
+            "palace_meta": get_palace_metadata_list(),
+            "summary": summary,
+            "lunar_date": {
+                "year": int(self.lunar_year[index]),
+                "month": int(self.lunar_month[index]),
+                "day": int(self.lunar_day[index]),
+                "is_intercalation": bool(self.is_intercalation[index]),
+            },
+        }
+
+    def invalid_indexes(self) -> List[int]:
+        """유효하지 않은 입력의 위치를 반환한다."""
+        return [int(index) for index in np.flatnonzero(~self.valid)]
+
+    def iter_dicts(self) -> Iterator[Dict[str, object]]:
+        """유효한 명반을 순서대로 dict로 만들어 반환한다."""
+        for index in np.flatnonzero(self.valid):
+            yield self.to_dict(int(index))
+
+
+def _solar_to_lunar_arrays(
+    year: np.ndarray, month: np.ndarray, day: np.ndarray
+) -> Dict[str, np.ndarray]:
+    dates = (
+        (year - 1970).astype("datetime64[Y]")
+        + (month - 1).astype("timedelta64[M]")
+    ).astype("datetime64[M]")
+    days = dates.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    ordinal = days.astype(np.int64) + _EPOCH_ORDINAL
+    month_ok = (days.astype("datetime64[M]") == dates) & (month >= 1) & (month <= 12)
+    table = get_solar_lunar_table()
+    valid = (
+        month_ok
+        & (day >= 1)
+        & (ordinal >= table.min_ordinal)
+        & (ordinal <= table.max_ordinal)
+        & ~((ordinal >= table.gap_start) & (ordinal <= table.gap_end))
+    )
+    lunar_by_day = np.frombuffer(table.lunar_by_day, dtype=np.int32)
+    packed = lunar_by_day[np.where(valid, ordinal - table.min_ordinal, 0)]
+    return {
+        "valid": valid,
+        "year": packed >> 10,
+        "month": (packed >> 5) & 0x0F,
+        "day": packed & 0x1F,
+        "is_intercalation": ((packed >> 9) & 0x01).astype(bool),
+    }
+
+
+def analyze_births(
+    year: Sequence[int],
+    month: Sequence[int],
+    day: Sequence[int],
+    hour: Sequence[int],
+    is_lunar: Sequence[bool],
+    is_intercalation: Sequence[bool],
+) -> ChartBatch:
+    """여러 생년월일시의 명반을 배열 연산으로 한 번에 계산한다."""
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    hour = np.asarray(hour, dtype=np.int64)
+    is_lunar = np.asarray(is_lunar, dtype=bool)
+    is_intercalation = np.asarray(is_intercalation, dtype=bool)
+
+    solar = _solar_to_lunar_arrays(year, month, day)
+    valid = is_lunar | solar["valid"]
+    lunar_year = np.where(is_lunar, year, solar["year"])
+    lunar_month = np.where(is_lunar, month, solar["month"])
+    lunar_day = np.where(is_lunar, day, solar["day"])
+    lunar_leap = np.where(is_lunar, is_intercalation, solar["is_intercalation"])
+
+    month_branch = ((lunar_month - 1) % 12) + 1
+    day_branch = ((lunar_day - 1) % 12) + 1
+    ming_gong = (month_branch + day_branch) % 12
+    ming_gong = np.where(ming_gong == 0, 12, ming_gong)
+
+    offset = lunar_year - 1984
+    guo_shu = ((offset % 10) + 1 + (offset % 12) + 1) % 5
+    guo_shu = np.where(guo_shu == 0, 5, guo_shu)
+
+    bosu = (-lunar_day) % guo_shu
+    jami_position = (((lunar_day + bosu) // guo_shu - 1) % 12) + 1
+    star_palaces = ((jami_position[:, None] + _STAR_OFFSETS - 1) % 12) + 1
+    hour_branch = np.where(hour == 23, 1, ((hour + 1) // 2) + 1)
+
+    return ChartBatch(
+        valid=valid,
+        lunar_year=lunar_year,
+        lunar_month=lunar_month,
+        lunar_day=lunar_day,
+        is_intercalation=lunar_leap,
+        ming_gong=ming_gong,
+        guo_shu=guo_shu,
+        jami_position=jami_position,
+        bosu=bosu,
+        hour_branch=hour_branch,
+        star_palaces=star_palaces,
+    )
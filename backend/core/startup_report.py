@@ -0,0 +1,72 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age() -> float:
+    """이 모듈을 불러온 시점까지 프로세스가 살아 있던 시간(초).
+
+    /proc의 시작 틱과 가동 시간은 같은 부팅 기준 시계이다. /proc이 없으면 0을 반환한다.
+    """
+    try:
+        with open("/proc/self/stat", encoding="ascii") as stream:
+            # 명령 이름에 공백이 있을 수 있으므로 마지막 ')' 뒤부터 필드를 센다.
+            fields = stream.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as stream:
+            uptime = float(stream.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+_AGE_AT_IMPORT = _process_age()
+_PROCESS_STARTED = time.perf_counter() - _AGE_AT_IMPORT
+_PROCESS_STARTED_AT = time.time() - _AGE_AT_IMPORT
+_MILESTONES: Dict[str, float] = {}
+_PHASES: Dict[str, float] = {}
+
+
+def mark(milestone: str) -> bool:
+    """프로세스 시작부터 지금까지 걸린 시간을 milestone으로 한 번만 기록한다.
+
+    처음 기록했으면 True를 반환한다.
+    """
+    if milestone in _MILESTONES:
+        return False
+    _MILESTONES[milestone] = time.perf_counter() - _PROCESS_STARTED
+    return True
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """with 블록의 소요 시간을 시작 단계 name으로 기록한다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _PHASES[name] = time.perf_counter() - started
+
+
+def get_startup_report() -> Dict[str, Any]:
+    """프로세스 시작 시각, 시점별 경과 시간, 시작 단계별 소요 시간을 반환한다."""
+    return {
+        "process_started_at": _PROCESS_STARTED_AT,
+        "milestones": dict(_MILESTONES),
+        "phases": dict(_PHASES),
+    }
+
+
+def log_startup_report() -> None:
+    """지금까지의 시작 시간 보고를 한 줄로 남긴다."""
+    report = get_startup_report()
+    milestones = ", ".join(
+        f"{name}={seconds * 1000:.0f}ms" for name, seconds in report["milestones"].items()
+    )
+    phases = ", ".join(
+        f"{name}={seconds * 1000:.1f}ms" for name, seconds in report["phases"].items()
+    )
+    logger.info("시작 시간: %s (단계: %s)", milestones, phases)
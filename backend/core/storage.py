@@ -1,125 +1,846 @@
+import hashlib
 import json
 import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from core import metrics
+from core.ming_pan import (
+    get_engine_version,
+    get_palace_metadata_list,
+    get_star_metadata_list,
+    recompute_chart,
+)
+from core.star_data import MAIN_STARS
 
-def _resolve_db_path(db_path: Optional[Path] = None) -> Path:
+_DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "charts.db"
+
+# 같은 출생 키의 명반은 computed_charts에 한 번만 저장하고 charts는 그 키를 가리킨다.
+# 상수인 메타데이터 구간은 저장하지 않고 constant_sections에 이름만 남긴다.
+# engine_version은 계산한 엔진 규칙의 지문이며, 비어 있으면 알 수 없는 이전 버전이다.
+_SCHEMA_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS computed_charts (
+        birth_key TEXT PRIMARY KEY,
+        chart_data TEXT NOT NULL,
+        constant_sections TEXT NOT NULL DEFAULT '',
+        engine_version TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS charts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        birth_payload TEXT NOT NULL,
+        birth_key TEXT NOT NULL REFERENCES computed_charts (birth_key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_charts_birth_key ON charts (birth_key)",
+)
+# 검색용 필드는 chart_data에서 뽑은 VIRTUAL 생성 열로 두고 인덱스를 건다.
+# 기존 DB에도 ALTER TABLE로 추가할 수 있고 저장 형식은 바뀌지 않는다.
+_GENERATED_COLUMNS = (
+    ("ming_gong", "json_extract(chart_data, '$.ming_gong')"),
+    ("guo_shu", "json_extract(chart_data, '$.guo_shu')"),
+    ("jami_position", "json_extract(chart_data, '$.jami_position')"),
+    ("hour_branch", "json_extract(chart_data, '$.hour_branch')"),
+    ("lunar_year", "json_extract(chart_data, '$.lunar_date.year')"),
+    ("lunar_month", "json_extract(chart_data, '$.lunar_date.month')"),
+    ("lunar_day", "json_extract(chart_data, '$.lunar_date.day')"),
+    ("lunar_leap", "json_extract(chart_data, '$.lunar_date.is_intercalation')"),
+)
+_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_charts_created_at ON charts (created_at)",
+    """
+    CREATE INDEX IF NOT EXISTS idx_computed_ming_gong
+    ON computed_charts (ming_gong, jami_position)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_computed_guo_shu ON computed_charts (guo_shu)",
+    """
+    CREATE INDEX IF NOT EXISTS idx_computed_jami_position
+    ON computed_charts (jami_position)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_computed_lunar_date
+    ON computed_charts (lunar_year, lunar_month, lunar_day, lunar_leap)
+    """,
+)
+SEARCH_FIELDS = tuple(name for name, _ in _GENERATED_COLUMNS if name != "lunar_leap")
+_STAR_OFFSETS = {star.name: star.offset % 12 for star in MAIN_STARS}
+# 같은 SQL 문자열을 재사용해 연결별 prepared statement 캐시에 적중시킨다.
+# 이전 엔진으로 계산한 행이 있으면 새로 계산한 결과로 바꿔 둔다.
+_INSERT_COMPUTED_SQL = """
+INSERT INTO computed_charts (birth_key, chart_data, constant_sections, engine_version)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (birth_key) DO UPDATE SET
+    chart_data = excluded.chart_data,
+    constant_sections = excluded.constant_sections,
+    engine_version = excluded.engine_version
+WHERE computed_charts.engine_version != excluded.engine_version
+"""
+_INSERT_CHART_SQL = """
+INSERT INTO charts (created_at, birth_payload, birth_key)
+VALUES (?, ?, ?)
+"""
+_INSERT_CHART_WITH_ID_SQL = """
+INSERT INTO charts (id, created_at, birth_payload, birth_key)
+VALUES (?, ?, ?, ?)
+"""
+_NEXT_CHART_ID_SQL = """
+SELECT MAX(
+    COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'charts'), 0),
+    COALESCE((SELECT MAX(id) FROM charts), 0)
+) + 1
+"""
+# AUTOINCREMENT는 max(seq, 최대 id) + 1을 다음 ID로 쓰므로 seq를 올려 두면
+# 다른 프로세스의 INSERT가 예약한 구간을 건너뛴다.
+_DELETE_CHART_SEQUENCE_SQL = """
+DELETE FROM sqlite_sequence WHERE name = 'charts'
+"""
+_SET_CHART_SEQUENCE_SQL = """
+INSERT INTO sqlite_sequence (name, seq) VALUES ('charts', ?)
+"""
+_RECORD_COLUMNS = """
+SELECT c.id, c.created_at, c.birth_payload, k.chart_data, k.constant_sections,
+    k.engine_version
+FROM charts AS c
+JOIN computed_charts AS k ON k.birth_key = c.birth_key
+"""
+_LIST_CHARTS_SQL = _RECORD_COLUMNS + """
+ORDER BY c.id DESC
+LIMIT ? OFFSET ?
+"""
+_LIST_CHARTS_BEFORE_SQL = _RECORD_COLUMNS + """
+WHERE c.id < ?
+ORDER BY c.id DESC
+LIMIT ?
+"""
+# 목록 화면용 투영: chart_data 전체를 파이썬에서 디코딩하지 않고 요약 필드만 꺼낸다.
+_SUMMARY_COLUMNS = """
+SELECT c.id, c.created_at, c.birth_payload,
+    json_extract(k.chart_data, '$.summary') AS summary,
+    json_extract(k.chart_data, '$.ming_gong') AS ming_gong,
+    json_extract(k.chart_data, '$.guo_shu') AS guo_shu,
+    json_extract(k.chart_data, '$.jami_position') AS jami_position
+FROM charts AS c
+JOIN computed_charts AS k ON k.birth_key = c.birth_key
+"""
+_LIST_SUMMARIES_SQL = _SUMMARY_COLUMNS + """
+ORDER BY c.id DESC
+LIMIT ? OFFSET ?
+"""
+_LIST_SUMMARIES_BEFORE_SQL = _SUMMARY_COLUMNS + """
+WHERE c.id < ?
+ORDER BY c.id DESC
+LIMIT ?
+"""
+_GET_CHART_SQL = _RECORD_COLUMNS + """
+WHERE c.id = ?
+"""
+# 단건 요약: 궁 배치와 메타데이터는 읽지 않고 SQLite에서 필요한 필드만 꺼낸다.
+_GET_CHART_SUMMARY_SQL = """
+SELECT c.id, c.birth_key, k.engine_version,
+    json_extract(k.chart_data, '$.summary') AS summary,
+    k.ming_gong, k.guo_shu, k.jami_position
+FROM charts AS c
+JOIN computed_charts AS k ON k.birth_key = c.birth_key
+WHERE c.id = ?
+"""
+# 엔진 버전이 다른 행만 음력 날짜와 시지를 더 읽어 다시 계산한다.
+_GET_BIRTH_FIELDS_SQL = """
+SELECT lunar_year, lunar_month, lunar_day, lunar_leap, hour_branch
+FROM computed_charts
+WHERE birth_key = ?
+"""
+_SUMMARY_FIELDS = ("summary", "ming_gong", "guo_shu", "jami_position")
+_GET_BIRTH_KEY_SQL = """
+SELECT birth_key FROM charts WHERE id = ?
+"""
+_DELETE_CHART_SQL = """
+DELETE FROM charts
+WHERE id = ?
+"""
+_DELETE_ORPHAN_COMPUTED_SQL = """
+DELETE FROM computed_charts
+WHERE birth_key = ?
+    AND NOT EXISTS (SELECT 1 FROM charts WHERE birth_key = ?)
+"""
+_SEARCH_FROM = """
+FROM charts AS c
+JOIN computed_charts AS k ON k.birth_key = c.birth_key
+"""
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+)
+
+
+def resolve_db_path(db_path: Optional[Path] = None) -> Path:
+    """db_path가 없으면 CHART_DB_PATH, 그것도 없으면 기본 DB 경로를 반환한다."""
     if db_path is not None:
         return db_path
     env_path = os.getenv("CHART_DB_PATH")
     if env_path:
         return Path(env_path)
-    return Path(__file__).resolve().parents[1] / "data" / "charts.db"
+    return _DEFAULT_DB_PATH
 
 
-def init_db(db_path: Optional[Path] = None) -> None:
-    """차트 저장용 SQLite DB를 초기화한다."""
-    path = _resolve_db_path(db_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(path) as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS charts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                created_at TEXT NOT NULL,
-                birth_payload TEXT NOT NULL,
-                chart_data TEXT NOT NULL
-            )
-            """
+_CONSTANT_SECTIONS: Dict[str, Callable[[], List[Dict[str, object]]]] = {
+    "stars_meta": get_star_metadata_list,
+    "palace_meta": get_palace_metadata_list,
+}
+
+
+def make_birth_key(chart_data: Dict[str, Any]) -> str:
+    """명반을 결정하는 정규화된 출생 키(음력 날짜, 윤달, 시지)를 만든다.
+
+    엔진 결과가 아닌 데이터는 내용 해시를 키로 사용한다.
+    """
+    lunar_date = chart_data.get("lunar_date")
+    hour_branch = chart_data.get("hour_branch")
+    if isinstance(lunar_date, dict) and isinstance(hour_branch, int):
+        leap = "L" if lunar_date.get("is_intercalation") else ""
+        return (
+            f"{lunar_date['year']:04d}-{lunar_date['month']:02d}-"
+            f"{lunar_date['day']:02d}{leap}-{hour_branch:02d}"
         )
+    canonical = json.dumps(chart_data, ensure_ascii=False, sort_keys=True)
+    return "sha256:" + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def split_constant_sections(
+    chart_data: Dict[str, Any],
+) -> Tuple[Dict[str, Any], List[str]]:
+    """저장하지 않을 상수 메타데이터 구간을 떼어 낸다."""
+    stored = {
+        key: value for key, value in chart_data.items() if key not in _CONSTANT_SECTIONS
+    }
+    sections = [name for name in _CONSTANT_SECTIONS if name in chart_data]
+    return stored, sections
+
+
+def restore_chart_data(chart_json: str, constant_sections: str) -> Dict[str, Any]:
+    """저장한 명반 JSON에 split_constant_sections로 떼어 낸 상수 구간을 되붙인다."""
+    chart_data = json.loads(chart_json)
+    for name in filter(None, constant_sections.split(",")):
+        chart_data[name] = _CONSTANT_SECTIONS[name]()
+    return chart_data
 
 
-def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+def _decode_chart_data(row: sqlite3.Row) -> Dict[str, Any]:
+    chart_data = restore_chart_data(row["chart_data"], row["constant_sections"])
+    if row["engine_version"] != get_engine_version():
+        # 재계산 작업이 아직 바꾸지 않은 행도 현재 규칙의 결과로 돌려준다.
+        chart_data = recompute_chart(chart_data) or chart_data
+    return chart_data
+
+
+class LazyChartRecord(Mapping):
+    """저장 레코드를 dict처럼 읽되 birth_info와 chart_data는 처음 읽을 때 디코딩한다."""
+
+    __slots__ = ("_row", "_decoded")
+    _KEYS = ("id", "created_at", "birth_info", "chart_data")
+
+    def __init__(self, row: sqlite3.Row) -> None:
+        self._row = row
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "id" or key == "created_at":
+            return self._row[key]
+        try:
+            return self._decoded[key]
+        except KeyError:
+            pass
+        if key == "birth_info":
+            value = json.loads(self._row["birth_payload"])
+        elif key == "chart_data":
+            value = _decode_chart_data(self._row)
+        else:
+            raise KeyError(key)
+        self._decoded[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"LazyChartRecord(id={self._row['id']})"
+
+
+def _row_to_record(row: sqlite3.Row) -> LazyChartRecord:
+    return LazyChartRecord(row)
+
+
+def _current_chart_summary(
+    conn: sqlite3.Connection, row: sqlite3.Row
+) -> Dict[str, Any]:
+    summary = {"id": row["id"], **{name: row[name] for name in _SUMMARY_FIELDS}}
+    if row["engine_version"] == get_engine_version():
+        return summary
+    birth = conn.execute(_GET_BIRTH_FIELDS_SQL, (row["birth_key"],)).fetchone()
+    if birth["lunar_year"] is None:
+        return summary
+    chart_data = recompute_chart(
+        {
+            "lunar_date": {
+                "year": birth["lunar_year"],
+                "month": birth["lunar_month"],
+                "day": birth["lunar_day"],
+                "is_intercalation": bool(birth["lunar_leap"]),
+            },
+            "hour_branch": birth["hour_branch"],
+        }
+    )
+    if chart_data is None:
+        return summary
+    return {"id": row["id"], **{name: chart_data[name] for name in _SUMMARY_FIELDS}}
+
+
+def _row_to_summary(row: sqlite3.Row) -> Dict[str, Any]:
     return {
         "id": row["id"],
         "created_at": row["created_at"],
         "birth_info": json.loads(row["birth_payload"]),
-        "chart_data": json.loads(row["chart_data"]),
+        "summary": row["summary"],
+        "ming_gong": row["ming_gong"],
+        "guo_shu": row["guo_shu"],
+        "jami_position": row["jami_position"],
     }
 
 
+# computed_charts 한 행: (출생 키, 저장할 명반 JSON, 떼어 낸 상수 구간 이름들, 엔진 버전)
+EncodedChart = Tuple[str, str, str, str]
+
+
+def encode_stored_chart(chart_data: Dict[str, Any]) -> EncodedChart:
+    """명반을 computed_charts에 저장할 형태로 인코딩한다."""
+    stored, sections = split_constant_sections(chart_data)
+    return (
+        make_birth_key(stored),
+        json.dumps(stored, ensure_ascii=False),
+        ",".join(sections),
+        get_engine_version(),
+    )
+
+
+def _insert_records(
+    conn: sqlite3.Connection,
+    records: List[Tuple[int, str, Dict[str, Any], EncodedChart]],
+) -> None:
+    """(ID, 생성 시각, 출생 정보, 인코딩한 명반) 목록을 executemany로 저장한다."""
+    computed: Dict[str, EncodedChart] = {}
+    rows: List[Tuple[int, str, str, str]] = []
+    for chart_id, created_at, birth_info, encoded in records:
+        birth_key = encoded[0]
+        computed.setdefault(birth_key, encoded)
+        rows.append(
+            (
+                chart_id,
+                created_at,
+                json.dumps(birth_info, ensure_ascii=False),
+                birth_key,
+            )
+        )
+    conn.executemany(_INSERT_COMPUTED_SQL, computed.values())
+    conn.executemany(_INSERT_CHART_WITH_ID_SQL, rows)
+
+
+@dataclass(frozen=True)
+class ChartSearch:
+    """저장된 차트 검색 조건. None인 조건은 적용하지 않는다.
+
+    star만 주면 명궁에 그 주성이 있는 차트를, star_palace도 주면 그 궁에 주성이
+    있는 차트를 찾는다. created_from은 포함, created_to는 제외 경계이다.
+    """
+
+    ming_gong: Optional[int] = None
+    guo_shu: Optional[int] = None
+    jami_position: Optional[int] = None
+    hour_branch: Optional[int] = None
+    lunar_year: Optional[int] = None
+    lunar_month: Optional[int] = None
+    lunar_day: Optional[int] = None
+    is_intercalation: Optional[bool] = None
+    created_from: Optional[str] = None
+    created_to: Optional[str] = None
+    star: Optional[str] = None
+    star_palace: Optional[int] = None
+
+
+def _search_conditions(search: ChartSearch) -> Tuple[List[str], List[Any]]:
+    conditions: List[str] = []
+    params: List[Any] = []
+    for name in SEARCH_FIELDS:
+        value = getattr(search, name)
+        if value is not None:
+            conditions.append(f"k.{name} = ?")
+            params.append(value)
+    if search.is_intercalation is not None:
+        conditions.append("k.lunar_leap = ?")
+        params.append(int(search.is_intercalation))
+    if search.created_from is not None:
+        conditions.append("c.created_at >= ?")
+        params.append(search.created_from)
+    if search.created_to is not None:
+        conditions.append("c.created_at < ?")
+        params.append(search.created_to)
+    if search.star is not None:
+        offset = _STAR_OFFSETS.get(search.star)
+        if offset is None:
+            raise ValueError(f"알 수 없는 주성: {search.star}")
+        # 주성의 궁 = (자미성 위치 + 오프셋 - 1) % 12 + 1 이므로 자미성 위치로 바꿔 찾는다.
+        if search.star_palace is None:
+            conditions.append("(k.jami_position + ? - 1) % 12 + 1 = k.ming_gong")
+            params.append(offset)
+        else:
+            conditions.append("k.jami_position = ?")
+            params.append((search.star_palace - offset - 1) % 12 + 1)
+    return conditions, params
+
+
+def _where_clause(conditions: List[str]) -> str:
+    return ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+
+def _ensure_columns(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(computed_charts)")}
+    if "engine_version" not in columns:
+        conn.execute(
+            "ALTER TABLE computed_charts ADD COLUMN engine_version TEXT NOT NULL DEFAULT ''"
+        )
+    for name, expression in _GENERATED_COLUMNS:
+        if name not in columns:
+            conn.execute(
+                f"ALTER TABLE computed_charts ADD COLUMN {name} "
+                f"GENERATED ALWAYS AS ({expression}) VIRTUAL"
+            )
+    for statement in _INDEX_SQL:
+        conn.execute(statement)
+
+
+def is_legacy_schema(conn: sqlite3.Connection) -> bool:
+    """charts 테이블이 명반 JSON을 행마다 저장하던 이전 형식인지 확인한다."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(charts)")}
+    return "chart_data" in columns
+
+
+class ChartStorage:
+    """하나의 SQLite 파일에 대한 연결 풀과 차트 저장 연산을 제공한다."""
+
+    def __init__(self, db_path: Path, pool_size: int = 4) -> None:
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(
+            maxsize=pool_size
+        )
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=64
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._created += 1
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """풀에서 연결을 빌려 트랜잭션 안에서 사용하고 반납한다."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    def init_schema(self) -> None:
+        """DB 디렉터리와 테이블을 만든다."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connection() as conn:
+            if is_legacy_schema(conn):
+                raise RuntimeError(
+                    f"{self.db_path}는 이전 저장 형식이다. "
+                    "python -m core.storage_migration으로 먼저 변환해야 한다."
+                )
+            for statement in _SCHEMA_SQL:
+                conn.execute(statement)
+            _ensure_columns(conn)
+
+    def close(self) -> None:
+        """풀에 남은 연결을 모두 닫는다."""
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """연결 풀 상태를 반환한다."""
+        return {
+            "db_path": str(self.db_path),
+            "pool_size": self.pool_size,
+            "idle": self._pool.qsize(),
+            "created": self._created,
+        }
+
+    @metrics.timed("storage.save_chart")
+    def save_chart(
+        self, birth_info: Dict[str, Any], chart_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        created_at = datetime.now(timezone.utc).isoformat()
+        stored, sections = split_constant_sections(chart_data)
+        birth_key = make_birth_key(stored)
+        with self.connection() as conn:
+            # 같은 쓰기 트랜잭션에서 명반 행을 넣어야 동시에 실행된 delete_chart가
+            # 그 사이에 고아 행으로 지우지 못한다. 같은 버전의 행이 있으면 아무것도 바꾸지 않는다.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                _INSERT_COMPUTED_SQL,
+                (
+                    birth_key,
+                    json.dumps(stored, ensure_ascii=False),
+                    ",".join(sections),
+                    get_engine_version(),
+                ),
+            )
+            cursor = conn.execute(
+                _INSERT_CHART_SQL,
+                (created_at, json.dumps(birth_info, ensure_ascii=False), birth_key),
+            )
+            chart_id = int(cursor.lastrowid)
+        return {
+            "id": chart_id,
+            "created_at": created_at,
+            "birth_info": birth_info,
+            "chart_data": chart_data,
+        }
+
+    @metrics.timed("storage.save_charts_bulk")
+    def save_charts_bulk(
+        self,
+        items: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+        chunk_size: int = 500,
+    ) -> List[int]:
+        """여러 명반을 하나의 트랜잭션으로 저장하고 부여된 ID를 순서대로 반환한다.
+
+        chunk_size 단위로 executemany를 실행해 매개변수 목록의 크기를 제한한다.
+        """
+        return self.save_encoded_charts_bulk(
+            ((birth_info, encode_stored_chart(chart_data)) for birth_info, chart_data in items),
+            chunk_size,
+        )
+
+    @metrics.timed("storage.save_encoded_charts_bulk")
+    def save_encoded_charts_bulk(
+        self,
+        items: Iterable[Tuple[Dict[str, Any], EncodedChart]],
+        chunk_size: int = 500,
+    ) -> List[int]:
+        """encode_stored_chart로 미리 인코딩한 명반들을 save_charts_bulk처럼 저장한다.
+
+        인코딩을 다른 프로세스에서 끝낸 결과를 받을 때 쓴다.
+        """
+        created_at = datetime.now(timezone.utc).isoformat()
+        chart_ids: List[int] = []
+        with self.connection() as conn:
+            # 쓰기 잠금을 먼저 잡아야 미리 계산한 ID가 다른 쓰기와 겹치지 않는다.
+            conn.execute("BEGIN IMMEDIATE")
+            next_id = conn.execute(_NEXT_CHART_ID_SQL).fetchone()[0]
+            iterator = iter(items)
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                records = []
+                for birth_info, encoded in chunk:
+                    records.append((next_id, created_at, birth_info, encoded))
+                    chart_ids.append(next_id)
+                    next_id += 1
+                _insert_records(conn, records)
+        return chart_ids
+
+    @metrics.timed("storage.reserve_chart_ids")
+    def reserve_chart_ids(self, count: int) -> int:
+        """연속된 ID count개를 예약하고 첫 ID를 반환한다.
+
+        예약한 ID는 insert_charts로 나중에 저장할 수 있다.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            first_id = conn.execute(_NEXT_CHART_ID_SQL).fetchone()[0]
+            conn.execute(_DELETE_CHART_SEQUENCE_SQL)
+            conn.execute(_SET_CHART_SEQUENCE_SQL, (first_id + count - 1,))
+        return first_id
+
+    @metrics.timed("storage.insert_charts")
+    def insert_charts(self, records: List[Dict[str, Any]]) -> None:
+        """ID와 생성 시각이 정해진 레코드들을 하나의 트랜잭션으로 저장한다."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _insert_records(
+                conn,
+                [
+                    (
+                        record["id"],
+                        record["created_at"],
+                        record["birth_info"],
+                        encode_stored_chart(record["chart_data"]),
+                    )
+                    for record in records
+                ],
+            )
+
+    @metrics.timed("storage.list_charts")
+    def list_charts(
+        self, limit: int = 20, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[LazyChartRecord]:
+        with self.connection() as conn:
+            if before_id is None:
+                rows = conn.execute(_LIST_CHARTS_SQL, (limit, offset)).fetchall()
+            else:
+                rows = conn.execute(_LIST_CHARTS_BEFORE_SQL, (before_id, limit)).fetchall()
+        return [_row_to_record(row) for row in rows]
+
+    @metrics.timed("storage.list_chart_summaries")
+    def list_chart_summaries(
+        self, limit: int = 20, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            if before_id is None:
+                rows = conn.execute(_LIST_SUMMARIES_SQL, (limit, offset)).fetchall()
+            else:
+                rows = conn.execute(
+                    _LIST_SUMMARIES_BEFORE_SQL, (before_id, limit)
+                ).fetchall()
+        return [_row_to_summary(row) for row in rows]
+
+    @metrics.timed("storage.search_charts")
+    def search_charts(
+        self,
+        search: ChartSearch,
+        limit: int = 20,
+        before_id: Optional[int] = None,
+        group_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """검색 조건에 맞는 차트 수, 선택한 필드별 개수, 최신 요약 목록을 반환한다.
+
+        조건은 인덱스가 걸린 생성 열에만 적용되므로 chart_data JSON을 훑지 않는다.
+        """
+        if group_by is not None and group_by not in SEARCH_FIELDS:
+            raise ValueError(f"묶을 수 없는 필드: {group_by}")
+        conditions, params = _search_conditions(search)
+        item_conditions = list(conditions)
+        item_params = list(params)
+        if before_id is not None:
+            item_conditions.append("c.id < ?")
+            item_params.append(before_id)
+        with self.connection() as conn:
+            count = conn.execute(
+                "SELECT COUNT(*)" + _SEARCH_FROM + _where_clause(conditions), params
+            ).fetchone()[0]
+            groups = None
+            if group_by is not None:
+                groups = [
+                    {"value": row["value"], "count": row["count"]}
+                    for row in conn.execute(
+                        f"SELECT k.{group_by} AS value, COUNT(*) AS count"
+                        + _SEARCH_FROM
+                        + _where_clause(conditions)
+                        + " GROUP BY value ORDER BY value",
+                        params,
+                    )
+                ]
+            rows = conn.execute(
+                _SUMMARY_COLUMNS
+                + _where_clause(item_conditions)
+                + " ORDER BY c.id DESC LIMIT ?",
+                [*item_params, limit],
+            ).fetchall()
+        return {
+            "count": count,
+            "groups": groups,
+            "items": [_row_to_summary(row) for row in rows],
+        }
+
+    @metrics.timed("storage.get_chart")
+    def get_chart(self, chart_id: int) -> Optional[LazyChartRecord]:
+        with self.connection() as conn:
+            row = conn.execute(_GET_CHART_SQL, (chart_id,)).fetchone()
+        if row is None:
+            return None
+        return _row_to_record(row)
+
+    @metrics.timed("storage.get_chart_summary")
+    def get_chart_summary(self, chart_id: int) -> Optional[Dict[str, Any]]:
+        """명반 본문을 디코딩하지 않고 ID, 요약, 명궁, 국수, 자미성 위치만 읽는다."""
+        with self.connection() as conn:
+            row = conn.execute(_GET_CHART_SUMMARY_SQL, (chart_id,)).fetchone()
+            if row is None:
+                return None
+            return _current_chart_summary(conn, row)
+
+    def chart_exists(self, chart_id: int) -> bool:
+        """명반을 읽지 않고 ID의 행이 있는지만 확인한다."""
+        with self.connection() as conn:
+            return conn.execute(_GET_BIRTH_KEY_SQL, (chart_id,)).fetchone() is not None
+
+    @metrics.timed("storage.delete_chart")
+    def delete_chart(self, chart_id: int) -> bool:
+        with self.connection() as conn:
+            row = conn.execute(_GET_BIRTH_KEY_SQL, (chart_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute(_DELETE_CHART_SQL, (chart_id,))
+            birth_key = row["birth_key"]
+            conn.execute(_DELETE_ORPHAN_COMPUTED_SQL, (birth_key, birth_key))
+        return True
+
+
+_STORAGES: Dict[Path, ChartStorage] = {}
+_STORAGES_LOCK = threading.Lock()
+
+
+def get_storage(db_path: Optional[Path] = None) -> ChartStorage:
+    """DB 경로별 저장소를 반환한다. 처음 사용할 때 한 번만 스키마를 만든다."""
+    path = resolve_db_path(db_path)
+    storage = _STORAGES.get(path)
+    if storage is not None:
+        return storage
+    with _STORAGES_LOCK:
+        storage = _STORAGES.get(path)
+        if storage is None:
+            pool_size = int(os.getenv("CHART_DB_POOL_SIZE", "4"))
+            storage = ChartStorage(path, pool_size=pool_size)
+            storage.init_schema()
+            _STORAGES[path] = storage
+    return storage
+
+
+def close_storages() -> None:
+    """열려 있는 모든 저장소의 연결을 닫는다."""
+    with _STORAGES_LOCK:
+        for storage in _STORAGES.values():
+            storage.close()
+        _STORAGES.clear()
+
+
+def storage_stats() -> List[Dict[str, Any]]:
+    """열려 있는 저장소들의 연결 풀 상태를 반환한다."""
+    with _STORAGES_LOCK:
+        return [storage.stats() for storage in _STORAGES.values()]
+
+
+def init_db(db_path: Optional[Path] = None) -> None:
+    """차트 저장용 SQLite DB를 초기화한다."""
+    get_storage(db_path)
+
+
 def save_chart(
     birth_info: Dict[str, Any],
     chart_data: Dict[str, Any],
     db_path: Optional[Path] = None,
 ) -> Dict[str, Any]:
     """명반을 저장하고 저장 결과를 반환한다."""
-    path = _resolve_db_path(db_path)
-    init_db(path)
-    created_at = datetime.now(timezone.utc).isoformat()
-    with sqlite3.connect(path) as conn:
-        cursor = conn.execute(
-            """
-            INSERT INTO charts (created_at, birth_payload, chart_data)
-            VALUES (?, ?, ?)
-            """,
-            (
-                created_at,
-                json.dumps(birth_info, ensure_ascii=False),
-                json.dumps(chart_data, ensure_ascii=False),
-            ),
-        )
-        chart_id = int(cursor.lastrowid)
-    return {
-        "id": chart_id,
-        "created_at": created_at,
-        "birth_info": birth_info,
-        "chart_data": chart_data,
-    }
+    return get_storage(db_path).save_chart(birth_info, chart_data)
+
+
+def save_charts_bulk(
+    items: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+    chunk_size: int = 500,
+    db_path: Optional[Path] = None,
+) -> List[int]:
+    """(출생 정보, 명반) 쌍들을 한 번에 저장하고 ID 목록을 반환한다."""
+    return get_storage(db_path).save_charts_bulk(items, chunk_size=chunk_size)
+
+
+def save_encoded_charts_bulk(
+    items: Iterable[Tuple[Dict[str, Any], EncodedChart]],
+    chunk_size: int = 500,
+    db_path: Optional[Path] = None,
+) -> List[int]:
+    """(출생 정보, 인코딩한 명반) 쌍들을 한 번에 저장하고 ID 목록을 반환한다."""
+    return get_storage(db_path).save_encoded_charts_bulk(items, chunk_size=chunk_size)
 
 
 def list_charts(
-    limit: int = 20, offset: int = 0, db_path: Optional[Path] = None
+    limit: int = 20,
+    offset: int = 0,
+    db_path: Optional[Path] = None,
+    before_id: Optional[int] = None,
+) -> List[LazyChartRecord]:
+    """저장된 차트 목록을 반환한다. before_id가 있으면 그보다 작은 ID부터 반환한다."""
+    return get_storage(db_path).list_charts(
+        limit=limit, offset=offset, before_id=before_id
+    )
+
+
+def list_chart_summaries(
+    limit: int = 20,
+    offset: int = 0,
+    db_path: Optional[Path] = None,
+    before_id: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    """저장된 차트 목록을 반환한다."""
-    path = _resolve_db_path(db_path)
-    init_db(path)
-    with sqlite3.connect(path) as conn:
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(
-            """
-            SELECT id, created_at, birth_payload, chart_data
-            FROM charts
-            ORDER BY id DESC
-            LIMIT ? OFFSET ?
-            """,
-            (limit, offset),
-        ).fetchall()
-    return [_row_to_record(row) for row in rows]
-
-
-def get_chart(chart_id: int, db_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """chart_data를 디코딩하지 않고 요약 필드만 담은 차트 목록을 반환한다."""
+    return get_storage(db_path).list_chart_summaries(
+        limit=limit, offset=offset, before_id=before_id
+    )
+
+
+def search_charts(
+    search: ChartSearch,
+    limit: int = 20,
+    before_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+    db_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """생성 열 인덱스로 저장된 차트를 검색하고 집계한다."""
+    return get_storage(db_path).search_charts(
+        search, limit=limit, before_id=before_id, group_by=group_by
+    )
+
+
+def get_chart(chart_id: int, db_path: Optional[Path] = None) -> Optional[LazyChartRecord]:
     """ID로 저장된 차트를 조회한다."""
-    path = _resolve_db_path(db_path)
-    init_db(path)
-    with sqlite3.connect(path) as conn:
-        conn.row_factory = sqlite3.Row
-        row = conn.execute(
-            """
-            SELECT id, created_at, birth_payload, chart_data
-            FROM charts
-            WHERE id = ?
-            """,
-            (chart_id,),
-        ).fetchone()
-    if row is None:
-        return None
-    return _row_to_record(row)
+    return get_storage(db_path).get_chart(chart_id)
+
+
+def get_chart_summary(
+    chart_id: int, db_path: Optional[Path] = None
+) -> Optional[Dict[str, Any]]:
+    """ID로 저장된 차트의 요약 필드만 조회한다."""
+    return get_storage(db_path).get_chart_summary(chart_id)
 
 
 def delete_chart(chart_id: int, db_path: Optional[Path] = None) -> bool:
     """ID로 저장된 차트를 삭제한다."""
-    path = _resolve_db_path(db_path)
-    init_db(path)
-    with sqlite3.connect(path) as conn:
-        cursor = conn.execute(
-            """
-            DELETE FROM charts
-            WHERE id = ?
-            """,
-            (chart_id,),
-        )
-    return cursor.rowcount > 0
+    return get_storage(db_path).delete_chart(chart_id)
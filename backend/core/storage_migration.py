@@ -0,0 +1,115 @@
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from core.storage import (
+    _INSERT_COMPUTED_SQL,
+    _SCHEMA_SQL,
+    resolve_db_path,
+    is_legacy_schema,
+    make_birth_key,
+    split_constant_sections,
+)
+
+_INSERT_MIGRATED_CHART_SQL = """
+INSERT INTO charts (id, created_at, birth_payload, birth_key)
+VALUES (?, ?, ?, ?)
+"""
+
+
+def migrate_legacy_db(
+    db_path: Optional[Path] = None, batch_size: int = 1000, vacuum: bool = True
+) -> int:
+    """행마다 명반 JSON을 저장하던 DB를 출생 키 기준 형식으로 제자리 변환한다.
+
+    변환은 하나의 트랜잭션으로 수행되며 ID와 AUTOINCREMENT 순번을 유지한다.
+    변환한 행 수를 반환하고, 이미 새 형식이면 아무것도 하지 않는다.
+    """
+    path = resolve_db_path(db_path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not is_legacy_schema(conn):
+            return 0
+        migrated = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("ALTER TABLE charts RENAME TO charts_legacy")
+            for statement in _SCHEMA_SQL:
+                conn.execute(statement)
+            sequence = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'charts_legacy'"
+            ).fetchone()
+            last_id = sequence["seq"] if sequence is not None else 0
+
+            rows = conn.execute(
+                """
+                SELECT id, created_at, birth_payload, chart_data
+                FROM charts_legacy
+                ORDER BY id
+                """
+            )
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                computed = []
+                charts = []
+                for row in batch:
+                    stored, sections = split_constant_sections(
+                        json.loads(row["chart_data"])
+                    )
+                    birth_key = make_birth_key(stored)
+                    computed.append(
+                        (
+                            birth_key,
+                            json.dumps(stored, ensure_ascii=False),
+                            ",".join(sections),
+                            # 이전 형식의 명반은 어느 엔진으로 계산했는지 알 수 없다.
+                            "",
+                        )
+                    )
+                    charts.append(
+                        (row["id"], row["created_at"], row["birth_payload"], birth_key)
+                    )
+                    last_id = max(last_id, row["id"])
+                conn.executemany(_INSERT_COMPUTED_SQL, computed)
+                conn.executemany(_INSERT_MIGRATED_CHART_SQL, charts)
+                migrated += len(batch)
+
+            conn.execute("DROP TABLE charts_legacy")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'charts'")
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('charts', ?)",
+                (last_id,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if vacuum:
+            conn.execute("VACUUM")
+        return migrated
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="이전 형식의 charts.db를 출생 키 기준 형식으로 변환한다."
+    )
+    parser.add_argument("db_path", nargs="?", type=Path, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    migrated = migrate_legacy_db(
+        args.db_path, batch_size=args.batch_size, vacuum=not args.no_vacuum
+    )
+    print(f"{resolve_db_path(args.db_path)}: {migrated}개 행을 변환했다.")
+
+
+if __name__ == "__main__":
+    main()
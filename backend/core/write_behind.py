@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.storage import ChartStorage, resolve_db_path, get_storage
+
+logger = logging.getLogger(__name__)
+
+WRITE_MODE_SYNC = "sync"
+WRITE_MODE_WRITE_BEHIND = "write_behind"
+
+# 재시도와 개별 저장까지 실패한 레코드를 남겨 두는 표. 이미 201로 응답한 차트이므로
+# 버리지 않고 운영자가 다시 넣을 수 있게 한다.
+_DEAD_LETTER_SQL = """
+CREATE TABLE IF NOT EXISTS chart_write_failures (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    birth_payload TEXT NOT NULL,
+    chart_data TEXT NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+)
+"""
+_INSERT_DEAD_LETTER_SQL = """
+INSERT OR REPLACE INTO chart_write_failures
+    (id, created_at, birth_payload, chart_data, error, failed_at)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def write_behind_enabled() -> bool:
+    """CHART_WRITE_MODE가 write_behind이면 차트 저장을 지연 기록한다.
+
+    기본값 sync는 응답 전에 커밋하므로 프로세스가 죽어도 저장이 유실되지 않는다.
+    """
+    return os.getenv("CHART_WRITE_MODE", WRITE_MODE_SYNC) == WRITE_MODE_WRITE_BEHIND
+
+
+class ChartWriteBehind:
+    """차트 저장 요청을 모아 묶음 커밋하는 지연 기록 큐.
+
+    submit은 예약한 ID로 레코드를 즉시 반환하고, 전용 스레드가 flush_interval초마다
+    또는 max_batch개가 모일 때마다 한 트랜잭션으로 저장한다. 저장 전 레코드는
+    get_pending으로 조회할 수 있다.
+
+    큐에는 max_queue개까지만 쌓고, 가득 차면 submit이 직접 동기 저장한다. 묶음 커밋이
+    실패하면 retries번 다시 시도한 뒤 레코드를 하나씩 저장하고, 그래도 실패한 레코드는
+    chart_write_failures 표에 남긴다.
+    """
+
+    def __init__(
+        self,
+        storage: ChartStorage,
+        flush_interval: float = 0.05,
+        max_batch: int = 200,
+        id_block: int = 256,
+        max_queue: int = 10000,
+        retries: int = 3,
+        retry_delay: float = 0.1,
+    ) -> None:
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.id_block = id_block
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+        self._id_end = 0
+        self._stopped = threading.Event()
+        self._batches = 0
+        self._written = 0
+        self._failed = 0
+        self._retried = 0
+        self._overflow = 0
+        self._thread = threading.Thread(
+            target=self._run, name="chart-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def _take_id(self) -> int:
+        with self._id_lock:
+            if self._next_id >= self._id_end:
+                self._next_id = self.storage.reserve_chart_ids(self.id_block)
+                self._id_end = self._next_id + self.id_block
+            chart_id = self._next_id
+            self._next_id += 1
+        return chart_id
+
+    def submit(
+        self, birth_info: Dict[str, Any], chart_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """저장할 레코드를 큐에 넣고 예약한 ID가 붙은 레코드를 반환한다.
+
+        큐가 가득 차 있으면 커밋한 뒤에 반환한다.
+        """
+        if self._stopped.is_set():
+            raise RuntimeError("지연 기록 큐가 이미 닫혔다.")
+        record = {
+            "id": self._take_id(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "birth_info": birth_info,
+            "chart_data": chart_data,
+        }
+        # close와 같은 잠금 안에서 확인하고 넣어야 스레드가 끝난 뒤 큐에 남는 레코드가 없다.
+        with self._lock:
+            if self._stopped.is_set():
+                raise RuntimeError("지연 기록 큐가 이미 닫혔다.")
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                pass
+            else:
+                self._pending[record["id"]] = record
+                return record
+            self._overflow += 1
+        self.storage.insert_charts([record])
+        return record
+
+    def get_pending(self, chart_id: int) -> Optional[Dict[str, Any]]:
+        """아직 커밋되지 않은 레코드를 반환한다."""
+        with self._lock:
+            return self._pending.get(chart_id)
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        batch = [self._queue.get(timeout=0.1)]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        for attempt in range(self.retries + 1):
+            try:
+                self.storage.insert_charts(batch)
+                return True
+            except Exception:
+                logger.warning(
+                    "지연 기록 중 차트 %d개를 저장하지 못했다 (%d번째 시도).",
+                    len(batch),
+                    attempt + 1,
+                    exc_info=True,
+                )
+            if attempt < self.retries:
+                self._retried += 1
+                time.sleep(self.retry_delay * 2**attempt)
+        return False
+
+    def _dead_letter(self, record: Dict[str, Any], error: Exception) -> None:
+        try:
+            with self.storage.connection() as conn:
+                conn.execute(_DEAD_LETTER_SQL)
+                conn.execute(
+                    _INSERT_DEAD_LETTER_SQL,
+                    (
+                        record["id"],
+                        record["created_at"],
+                        json.dumps(record["birth_info"], ensure_ascii=False),
+                        json.dumps(record["chart_data"], ensure_ascii=False),
+                        repr(error),
+                        datetime.now(timezone.utc).isoformat(),
+                    ),
+                )
+        except Exception:
+            # 실패 기록조차 남길 수 없으면 로그에 레코드 전체를 남긴다.
+            logger.exception(
+                "저장하지 못한 차트를 기록하지 못했다: %s",
+                json.dumps(record, ensure_ascii=False, default=str),
+            )
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            if self._insert_batch(batch):
+                self._written += len(batch)
+                return
+            # 묶음 안의 레코드 하나 때문에 전체가 실패했을 수 있으므로 하나씩 저장한다.
+            for record in batch:
+                try:
+                    self.storage.insert_charts([record])
+                    self._written += 1
+                except Exception as error:
+                    self._failed += 1
+                    logger.exception("차트 %d를 저장하지 못했다.", record["id"])
+                    self._dead_letter(record, error)
+        finally:
+            self._batches += 1
+            with self._lock:
+                for record in batch:
+                    self._pending.pop(record["id"], None)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self) -> None:
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                batch = self._collect()
+            except queue.Empty:
+                continue
+            self._write(batch)
+
+    def flush(self) -> None:
+        """큐에 들어온 레코드가 모두 커밋될 때까지 기다린다."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """새 요청을 막고 남은 레코드를 모두 커밋한 뒤 스레드를 끝낸다."""
+        with self._lock:
+            self._stopped.set()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 길이와 누적 묶음 커밋, 재시도, 동기 저장 전환 수를 반환한다."""
+        return {
+            "db_path": str(self.storage.db_path),
+            "queued": self._queue.qsize(),
+            "batches": self._batches,
+            "written": self._written,
+            "failed": self._failed,
+            "retried": self._retried,
+            "overflow": self._overflow,
+        }
+
+
+_WRITERS: Dict[Path, ChartWriteBehind] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_write_behind(db_path: Optional[Path] = None) -> ChartWriteBehind:
+    """DB 경로별 지연 기록 큐를 반환한다."""
+    path = resolve_db_path(db_path)
+    writer = _WRITERS.get(path)
+    if writer is not None:
+        return writer
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(path)
+        if writer is None:
+            writer = ChartWriteBehind(
+                get_storage(path),
+                flush_interval=int(os.getenv("CHART_WRITE_FLUSH_MS", "50")) / 1000,
+                max_batch=int(os.getenv("CHART_WRITE_BATCH_SIZE", "200")),
+                max_queue=int(os.getenv("CHART_WRITE_QUEUE_SIZE", "10000")),
+            )
+            _WRITERS[path] = writer
+    return writer
+
+
+def close_write_behind() -> None:
+    """열려 있는 모든 지연 기록 큐를 비우고 닫는다."""
+    with _WRITERS_LOCK:
+        for writer in _WRITERS.values():
+            writer.close()
+        _WRITERS.clear()
+
+
+def write_behind_stats() -> List[Dict[str, Any]]:
+    """열려 있는 지연 기록 큐들의 상태를 반환한다."""
+    with _WRITERS_LOCK:
+        return [writer.stats() for writer in _WRITERS.values()]
@@ -1,13 +1,29 @@
 ﻿import os
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+
+# 일부 모듈은 불러올 때 환경 변수를 읽으므로 앱 모듈보다 먼저 .env를 적용한다.
+load_dotenv()
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.birth_routes import router as birth_router
-from core.storage import init_db
+from api.response_cache import close_response_cache, get_response_cache_stats
+from core import metrics, startup_report
+from core.async_storage import close_async_storages
+from core.chart_recompute import start_chart_recompute, stop_chart_recompute
+from core.lunar_converter import warm_up as warm_up_calendar
+from core.ming_pan import (
+    get_chart_cache_stats,
+    load_chart_atlas,
+    load_shared_chart_cache,
+    unload_shared_chart_cache,
+)
+from core.storage import close_storages, init_db, storage_stats
+from core.write_behind import close_write_behind, write_behind_stats
 
-load_dotenv()
+startup_report.mark("imports")
 
 app = FastAPI(title="Jami-Dusu API", version="0.2.0")
 
@@ -25,18 +41,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
 app.include_router(birth_router, prefix="/api/v1/birth", tags=["birth"])
 
 
 @app.on_event("startup")
 def startup() -> None:
-    """애플리케이션 시작 시 DB를 초기화한다."""
-    init_db()
+    """애플리케이션 시작 시 DB와 음력 변환표를 초기화하고 설정된 부가 기능을 켠다.
+
+    명반 아틀라스와 공유 명반 캐시를 열고, 오래된 명반의 백그라운드 재계산을 시작한다.
+    """
+    with startup_report.phase("init_db"):
+        init_db()
+    with startup_report.phase("warm_up_calendar"):
+        warm_up_calendar()
+    with startup_report.phase("load_chart_atlas"):
+        load_chart_atlas()
+    load_shared_chart_cache()
+    start_chart_recompute()
+    startup_report.mark("startup")
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    """애플리케이션 종료 시 지연 기록을 마저 커밋하고 DB 스레드와 연결을 정리한다."""
+    stop_chart_recompute()
+    close_write_behind()
+    close_response_cache()
+    unload_shared_chart_cache()
+    close_async_storages()
+    close_storages()
 
 
 @app.get("/health")
 def health_check() -> dict:
     """헬스 체크 엔드포인트."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint() -> Response:
+    """구간별 소요 시간, 명반/응답 캐시, DB 연결 풀 상태를 Prometheus 형식으로 반환한다.
+
+    구간별 히스토그램은 METRICS_ENABLED=1일 때만 기록된다.
+    """
+    body = metrics.render_metrics(
+        chart_cache=get_chart_cache_stats(),
+        storages=storage_stats(),
+        writers=write_behind_stats(),
+        startup=startup_report.get_startup_report(),
+        response_cache=get_response_cache_stats(),
+    )
+    return Response(content=body, media_type="text/plain; version=0.0.4")
@@ -64,6 +64,12 @@ class ChartResponse(BaseModel):
     chart_id: Optional[int] = None
 
 
+class BatchChartItem(BaseModel):
+    index: int
+    chart: Optional[ChartResponse] = None
+    error: Optional[str] = None
+
+
 class ChartRecord(BaseModel):
     id: int
     created_at: str
@@ -71,6 +77,31 @@ class ChartRecord(BaseModel):
     chart_data: ChartResponse
 
 
+class BulkSaveResponse(BaseModel):
+    ids: List[int]
+
+
+class ChartListItem(BaseModel):
+    id: int
+    created_at: str
+    birth_info: BirthInfo
+    summary: str
+    ming_gong: int
+    guo_shu: int
+    jami_position: int
+
+
+class ChartSearchGroup(BaseModel):
+    value: Optional[int] = None
+    count: int
+
+
+class ChartSearchResponse(BaseModel):
+    count: int
+    groups: Optional[List[ChartSearchGroup]] = None
+    items: List[ChartListItem]
+
+
 class SummaryResponse(BaseModel):
     chart_id: Optional[int] = None
     summary: str
@@ -0,0 +1,60 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.run import RESULT_FORMAT, compare_results, run_benchmarks
+
+
+def _report(**ops: float) -> dict:
+    return {
+        "format": RESULT_FORMAT,
+        "results": {name: {"ops_per_sec": value} for name, value in ops.items()},
+    }
+
+
+def test_compare_results_flags_regressions() -> None:
+    rows, regressions = compare_results(
+        _report(a=100.0, b=100.0, c=100.0),
+        _report(a=95.0, b=80.0, d=1.0),
+        threshold=0.1,
+    )
+    assert [row["name"] for row in rows] == ["a", "b"]
+    assert regressions == ["b"]
+
+    with pytest.raises(ValueError):
+        compare_results({"format": 0, "results": {}}, _report(a=1.0))
+
+
+def test_run_benchmarks_emits_results() -> None:
+    report = run_benchmarks(
+        groups=["engine"], min_time=0.001, rounds=2, name_filter="find_jami_position"
+    )
+    assert report["format"] == RESULT_FORMAT
+    assert list(report["results"]) == ["find_jami_position"]
+    assert report["results"]["find_jami_position"]["ops_per_sec"] > 0
+
+
+def test_run_benchmarks_restores_db_path_and_skips_filtered_setup(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", "original.db")
+    populated = []
+    monkeypatch.setattr(
+        "benchmarks.run._populate", lambda storage, births: populated.append(storage)
+    )
+
+    report = run_benchmarks(
+        groups=["engine", "storage"],
+        rows=(10,),
+        min_time=0.001,
+        rounds=2,
+        name_filter="find_jami_position",
+    )
+
+    assert list(report["results"]) == ["find_jami_position"]
+    assert populated == []
+    assert os.environ["CHART_DB_PATH"] == "original.db"
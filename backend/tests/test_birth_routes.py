@@ -0,0 +1,244 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from api import birth_routes
+from main import app
+
+client = TestClient(app)
+
+BIRTH_INFO = {
+    "year": 1990,
+    "month": 6,
+    "day": 24,
+    "hour": 12,
+    "is_lunar": False,
+    "is_intercalation": False,
+    "gender": "M",
+}
+
+
+def _read_ndjson(text: str) -> list:
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+def test_analyze_batch_json_list() -> None:
+    single = client.post("/api/v1/birth/analyze", json=BIRTH_INFO).json()
+    response = client.post(
+        "/api/v1/birth/analyze/batch",
+        json=[BIRTH_INFO, {**BIRTH_INFO, "month": 13}, {**BIRTH_INFO, "year": 2051}],
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = _read_ndjson(response.text)
+    assert [item["index"] for item in items] == [0, 1, 2]
+    assert items[0]["chart"] == single
+    assert items[0]["error"] is None
+    assert items[1]["chart"] is None and items[1]["error"]
+    assert items[2]["chart"] is None and items[2]["error"]
+
+
+def test_analyze_batch_ndjson_stream() -> None:
+    body = "\n".join([json.dumps(BIRTH_INFO), "not json", json.dumps(BIRTH_INFO)])
+    response = client.post(
+        "/api/v1/birth/analyze/batch",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    items = _read_ndjson(response.text)
+    assert len(items) == 3
+    assert items[0]["chart"] == items[2]["chart"]
+    assert items[1]["error"]
+
+
+def test_analyze_batch_ndjson_lines_across_chunks_and_length_cap(monkeypatch) -> None:
+    line = json.dumps(BIRTH_INFO).encode()
+    headers = {"content-type": "application/x-ndjson"}
+    chunks = [line[:10], line[10:] + b"\n" + line[:5], line[5:]]
+    response = client.post(
+        "/api/v1/birth/analyze/batch", content=iter(chunks), headers=headers
+    )
+    items = _read_ndjson(response.text)
+    assert [item["index"] for item in items] == [0, 1]
+    assert items[0]["chart"] == items[1]["chart"]
+
+    monkeypatch.setattr(birth_routes, "MAX_NDJSON_LINE_BYTES", len(line))
+    too_long = b" " * (len(line) + 1)
+    response = client.post(
+        "/api/v1/birth/analyze/batch",
+        content=iter([too_long[:8], too_long[8:]]),
+        headers=headers,
+    )
+    assert response.status_code == 413
+    response = client.post(
+        "/api/v1/birth/analyze/batch",
+        content=line + b"\n" + too_long + b"\n" + line,
+        headers=headers,
+    )
+    items = _read_ndjson(response.text)
+    assert response.status_code == 200
+    assert items[0]["chart"] is not None
+    assert items[1]["index"] == 1 and items[1]["error"]
+    assert len(items) == 2
+
+    monkeypatch.setattr(birth_routes, "MAX_JSON_BATCH_BYTES", 16)
+    response = client.post("/api/v1/birth/analyze/batch", json=[BIRTH_INFO])
+    assert response.status_code == 413
+
+
+def test_analyze_batch_rejects_non_list() -> None:
+    response = client.post("/api/v1/birth/analyze/batch", json=BIRTH_INFO)
+    assert response.status_code == 422
+
+
+def test_metadata_etag_not_modified() -> None:
+    response = client.get("/api/v1/birth/metadata")
+    assert response.status_code == 200
+    assert len(response.json()["stars_meta"]) == 14
+    assert len(response.json()["palace_meta"]) == 12
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/birth/metadata", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+def test_list_charts_cursor_pagination(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    ids = [
+        client.post("/api/v1/birth/charts", json=BIRTH_INFO).json()["id"]
+        for _ in range(3)
+    ]
+
+    first = client.get(
+        "/api/v1/birth/charts",
+        params={"limit": 2},
+        headers={"Origin": "http://example.com"},
+    )
+    assert [item["id"] for item in first.json()] == [ids[2], ids[1]]
+    cursor = first.headers["x-next-cursor"]
+    exposed = first.headers["access-control-expose-headers"].lower()
+    assert "x-next-cursor" in exposed and "etag" in exposed
+
+    second = client.get("/api/v1/birth/charts", params={"limit": 2, "cursor": cursor})
+    assert [item["id"] for item in second.json()] == [ids[0]]
+    assert "x-next-cursor" not in second.headers
+
+    summaries = client.get(
+        "/api/v1/birth/charts/summaries", params={"limit": 2, "cursor": cursor}
+    )
+    assert summaries.json()[0]["id"] == ids[0]
+    assert summaries.json()[0]["summary"]
+
+    invalid = client.get("/api/v1/birth/charts", params={"cursor": "%%%"})
+    assert invalid.status_code == 400
+
+
+def test_create_charts_bulk(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    response = client.post(
+        "/api/v1/birth/charts/bulk",
+        json=[BIRTH_INFO, {**BIRTH_INFO, "year": 1984, "is_lunar": True}],
+    )
+    assert response.status_code == 201
+    ids = response.json()["ids"]
+    assert len(ids) == 2 and ids[0] < ids[1]
+    saved = client.get(f"/api/v1/birth/charts/{ids[1]}").json()
+    assert saved["birth_info"]["year"] == 1984
+
+    invalid = client.post(
+        "/api/v1/birth/charts/bulk", json=[BIRTH_INFO, {**BIRTH_INFO, "year": 2051}]
+    )
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["indexes"] == [1]
+
+    too_many = client.post(
+        "/api/v1/birth/charts/bulk",
+        json=[BIRTH_INFO] * (birth_routes.MAX_BULK_CHARTS + 1),
+    )
+    assert too_many.status_code == 422
+    assert too_many.json()["detail"][0]["type"] == "too_long"
+
+
+def test_create_chart_write_behind(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    monkeypatch.setenv("CHART_WRITE_MODE", "write_behind")
+    monkeypatch.setenv("CHART_WRITE_FLUSH_MS", "1000")
+    created = client.post("/api/v1/birth/charts", json=BIRTH_INFO)
+    assert created.status_code == 201
+    chart_id = created.json()["id"]
+
+    fetched = client.get(f"/api/v1/birth/charts/{chart_id}")
+    assert fetched.status_code == 200
+    assert fetched.json() == created.json()
+    assert client.delete(f"/api/v1/birth/charts/{chart_id}").status_code == 204
+    assert client.get(f"/api/v1/birth/charts/{chart_id}").status_code == 404
+
+
+def test_search_charts(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    created = client.post("/api/v1/birth/charts", json=BIRTH_INFO).json()
+    chart = created["chart_data"]
+
+    response = client.get(
+        "/api/v1/birth/charts/search",
+        params={"ming_gong": chart["ming_gong"], "group_by": "jami_position"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 1
+    assert body["groups"] == [{"value": chart["jami_position"], "count": 1}]
+    assert body["items"][0]["id"] == created["id"]
+
+    assert client.get("/api/v1/birth/charts/search", params={"star": "없음"}).status_code == 422
+    assert client.get("/api/v1/birth/charts/search", params={"group_by": "summary"}).status_code == 422
+
+
+def test_saved_chart_etag_and_invalidation(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    created = client.post("/api/v1/birth/charts", json=BIRTH_INFO).json()
+    chart_url = f"/api/v1/birth/charts/{created['id']}"
+    summary_url = f"/api/v1/birth/summary/{created['id']}"
+
+    first = client.get(chart_url)
+    assert first.json() == created
+    assert first.headers["cache-control"] == "private, no-cache"
+    etag = first.headers["etag"]
+    assert client.get(chart_url).headers["etag"] == etag
+    assert client.get(chart_url, headers={"If-None-Match": etag}).status_code == 304
+
+    summary = client.get(summary_url)
+    assert summary.json()["summary"] == created["chart_data"]["summary"]
+    assert summary.headers["etag"] != etag
+    not_modified = client.get(summary_url, headers={"If-None-Match": summary.headers["etag"]})
+    assert not_modified.status_code == 304
+
+    assert client.delete(chart_url).status_code == 204
+    assert client.get(chart_url, headers={"If-None-Match": etag}).status_code == 404
+    assert client.get(summary_url).status_code == 404
+
+
+def test_saved_chart_delete_during_cache_fill(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    created = client.post("/api/v1/birth/charts", json=BIRTH_INFO).json()
+    chart_url = f"/api/v1/birth/charts/{created['id']}"
+    load_record = birth_routes._load_record
+
+    async def load_then_delete(chart_id: int):
+        # 읽기를 마친 GET이 캐시에 넣기 전에 DELETE가 끝난다.
+        record = await load_record(chart_id)
+        await birth_routes.delete_saved_chart(chart_id)
+        return record
+
+    monkeypatch.setattr(birth_routes, "_load_record", load_then_delete)
+    stale = client.get(chart_url)
+    assert stale.status_code == 200
+    monkeypatch.setattr(birth_routes, "_load_record", load_record)
+
+    assert client.get(chart_url).status_code == 404
+    not_modified = client.get(chart_url, headers={"If-None-Match": stale.headers["etag"]})
+    assert not_modified.status_code == 404
@@ -0,0 +1,207 @@
+import multiprocessing
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import cache_backends
+from core.cache_backends import (
+    CachePolicy,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SharedMemoryCacheBackend,
+)
+from core.ming_pan import (
+    analyze_birth,
+    clear_chart_cache,
+    get_engine_version,
+    load_shared_chart_cache,
+    unload_shared_chart_cache,
+)
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    """테스트에 필요한 명령만 구현한 RESP2 서버."""
+
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            now = time.monotonic()
+            for key in [key for key, (_, expires) in data.items() if expires and expires <= now]:
+                del data[key]
+            if name in (b"PING", b"SELECT", b"AUTH"):
+                reply = b"+OK\r\n"
+            elif name == b"GET":
+                reply = self._bulk(data.get(args[1], (None, None))[0])
+            elif name == b"SET":
+                expires = now + int(args[4]) / 1000 if len(args) > 3 else None
+                data[args[1]] = (args[2], expires)
+                reply = b"+OK\r\n"
+            elif name == b"DEL":
+                removed = sum(data.pop(key, None) is not None for key in args[1:])
+                reply = b":%d\r\n" % removed
+            elif name == b"SCAN":
+                prefix = args[3].rstrip(b"*")
+                keys = [key for key in data if key.startswith(prefix)]
+                reply = b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(keys)
+                reply += b"".join(self._bulk(key) for key in keys)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def redis_url():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeRedisHandler)
+    server.daemon_threads = True
+    server.data = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/1"
+    server.shutdown()
+    server.server_close()
+
+
+def _backends(tmp_path: Path, policy: CachePolicy, redis_url: str):
+    return [
+        MemoryCacheBackend(policy),
+        SharedMemoryCacheBackend(tmp_path / "cache.bin", policy, slot_size=256, ways=2),
+        RedisCacheBackend(redis_url, policy, prefix="test:"),
+    ]
+
+
+def test_backends_get_set_delete_and_ttl(tmp_path: Path, redis_url: str) -> None:
+    for backend in _backends(tmp_path, CachePolicy(max_entries=4, ttl=0.2), redis_url):
+        assert backend.get("a") is None
+        backend.set("a", b"\x00value\n")
+        backend.set("b", b"other")
+        assert backend.get("a") == b"\x00value\n"
+        backend.delete("b")
+        assert backend.get("b") is None
+        assert backend.stats()["size"] == 1
+        assert backend.stats()["hits"] == 1
+        time.sleep(0.25)
+        assert backend.get("a") is None, type(backend).__name__
+        backend.set("c", b"c")
+        backend.clear()
+        assert backend.get("c") is None
+        backend.close()
+
+
+@pytest.mark.parametrize("eviction, survivor", [("lru", "a"), ("fifo", "b")])
+def test_local_backends_evict_by_policy(tmp_path: Path, eviction: str, survivor: str) -> None:
+    policy = CachePolicy(max_entries=2, eviction=eviction)
+    # ways=2, 슬롯 2개이면 mmap 캐시도 모든 키가 한 묶음에 들어간다.
+    for backend in (
+        MemoryCacheBackend(policy),
+        SharedMemoryCacheBackend(tmp_path / f"{eviction}.bin", policy, ways=2),
+    ):
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        assert backend.get("a") == b"1"
+        backend.set("c", b"3")
+        assert backend.get(survivor) is not None
+        assert backend.get("c") == b"3"
+        assert backend.stats()["evictions"] == 1
+        backend.close()
+
+
+def _write_from_child(path: Path) -> None:
+    backend = SharedMemoryCacheBackend(path, CachePolicy(max_entries=16))
+    backend.set("from-child", b"shared")
+    backend.close()
+
+
+def test_mmap_backend_is_shared_between_processes(tmp_path: Path) -> None:
+    path = tmp_path / "shared.bin"
+    backend = SharedMemoryCacheBackend(path, CachePolicy(max_entries=16))
+    child = multiprocessing.get_context("fork").Process(target=_write_from_child, args=(path,))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert backend.get("from-child") == b"shared"
+    with pytest.raises(ValueError):
+        SharedMemoryCacheBackend(path, CachePolicy(max_entries=64))
+    backend.close()
+
+
+def test_redis_backend_degrades_to_miss_when_unavailable() -> None:
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0", CachePolicy(), timeout=0.1)
+    backend.set("a", b"1")
+    assert backend.get("a") is None
+    assert backend.stats()["misses"] == 1
+
+
+def test_redis_backend_skips_server_during_cooldown(monkeypatch) -> None:
+    attempts = []
+
+    def refuse(host: str, port: int, timeout: float) -> None:
+        attempts.append(time.monotonic())
+        raise ConnectionRefusedError(host)
+
+    monkeypatch.setattr(cache_backends, "_RedisConnection", refuse)
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0", CachePolicy(), cooldown=0.2)
+    assert backend.blocking and not MemoryCacheBackend(CachePolicy()).blocking
+    assert backend.get("a") is None
+    backend.set("a", b"1")
+    backend.delete("a")
+    assert backend.get("a") is None
+    assert len(attempts) == 1
+    time.sleep(0.25)
+    assert backend.get("a") is None
+    assert len(attempts) == 2
+
+
+def test_shared_chart_cache_tier(redis_url: str) -> None:
+    backend = RedisCacheBackend(redis_url, CachePolicy(), prefix="charts:")
+    load_shared_chart_cache(backend)
+    try:
+        expected = analyze_birth(1990, 6, 24, 12, False, False, "M")
+        assert backend.stats()["size"] == 1
+        clear_chart_cache()
+        assert analyze_birth(1990, 6, 24, 12, False, False, "M") == expected
+        assert backend.stats()["hits"] == 1
+    finally:
+        unload_shared_chart_cache()
+
+
+def test_shared_chart_cache_keys_carry_engine_version() -> None:
+    backend = MemoryCacheBackend(CachePolicy())
+    load_shared_chart_cache(backend)
+    try:
+        analyze_birth(1990, 6, 24, 12, False, False, "M")
+        keys = list(backend._entries)
+        assert len(keys) == 1
+        assert keys[0].startswith(get_engine_version() + ":")
+        # 이전 엔진이 남긴 항목은 키가 달라 조립에 쓰이지 않는다.
+        clear_chart_cache()
+        backend.clear()
+        backend.set(keys[0].replace(get_engine_version(), "0" * 16), b"stale")
+        analyze_birth(1990, 6, 24, 12, False, False, "M")
+        assert backend.stats()["hits"] == 0
+    finally:
+        unload_shared_chart_cache()
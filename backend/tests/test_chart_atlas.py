@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.chart_atlas import AtlasVersionError, ChartAtlas, build_atlas
+from core.lunar_converter import LunarDate
+from core import ming_pan
+from core.ming_pan import _compute_chart, analyze_birth, load_chart_atlas, unload_chart_atlas
+
+
+def test_atlas_matches_engine(tmp_path: Path) -> None:
+    atlas = ChartAtlas(build_atlas(tmp_path / "atlas.bin", min_year=1989, max_year=1991))
+    for year in (1989, 1991):
+        for month in range(1, 13):
+            for is_intercalation in (False, True):
+                for day in range(1, 32):
+                    lunar_date = LunarDate(year, month, day, is_intercalation)
+                    expected = _compute_chart(lunar_date, 7)
+                    assert atlas.lookup(year, month, day, is_intercalation, 7).to_dict() == expected
+    assert atlas.lookup(1992, 1, 1, False, 7) is None
+    assert atlas.lookup_core_fields(1988, 1, 1, False) is None
+    atlas.close()
+
+
+def test_atlas_rejects_truncated_file(tmp_path: Path) -> None:
+    path = build_atlas(tmp_path / "atlas.bin", min_year=1990, max_year=1990)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        ChartAtlas(path)
+
+
+def test_atlas_rejects_other_engine_version(tmp_path: Path) -> None:
+    path = build_atlas(tmp_path / "atlas.bin", min_year=1990, max_year=1990)
+    data = bytearray(path.read_bytes())
+    data[16:32] = b"0" * 16
+    path.write_bytes(bytes(data))
+    with pytest.raises(AtlasVersionError):
+        ChartAtlas(path)
+    assert load_chart_atlas(path) is False
+
+
+def test_analyze_birth_uses_atlas(tmp_path: Path) -> None:
+    expected = [
+        analyze_birth(1990, 6, 24, 12, False, False, "M"),
+        analyze_birth(2150, 1, 1, 0, True, False, "F"),
+    ]
+    assert load_chart_atlas(build_atlas(tmp_path / "atlas.bin", min_year=1990, max_year=1990))
+    try:
+        assert analyze_birth(1990, 6, 24, 12, False, False, "M") == expected[0]
+        assert analyze_birth(2150, 1, 1, 0, True, False, "F") == expected[1]
+    finally:
+        unload_chart_atlas()
+
+
+def test_reloading_atlas_closes_previous_mapping(tmp_path: Path) -> None:
+    path = build_atlas(tmp_path / "atlas.bin", min_year=1990, max_year=1990)
+    assert load_chart_atlas(path)
+    first = ming_pan._CHART_ATLAS
+    assert load_chart_atlas(path)
+    second = ming_pan._CHART_ATLAS
+    unload_chart_atlas()
+    assert first._mm.closed and second._mm.closed
@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from core.chart_codec import (
+    CHART_MEDIA_TYPE,
+    RECORD_SIZE,
+    ChartEncodeError,
+    decode_chart,
+    decode_core_fields,
+    encode_chart,
+    iter_decode_charts,
+)
+from core.ming_pan import analyze_birth
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "birth",
+    [
+        (1984, 1, 1, 0, True, False),
+        (2020, 4, 15, 23, True, True),
+        (1990, 6, 24, 12, False, False),
+    ],
+)
+def test_chart_codec_round_trip(birth: tuple) -> None:
+    chart = analyze_birth(*birth, gender="M")
+    data = encode_chart(chart)
+    assert len(data) == RECORD_SIZE
+    compact = decode_chart(data)
+    assert compact.chart_id is None
+    assert compact.ming_gong == chart["ming_gong"]
+    assert compact.to_dict() == chart
+
+
+def test_chart_codec_rejects_bad_records() -> None:
+    data = bytearray(encode_chart(analyze_birth(1984, 1, 1, 0, True, False, "M")))
+    data[0] = 99
+    with pytest.raises(ValueError):
+        decode_chart(bytes(data))
+    with pytest.raises(ValueError):
+        list(iter_decode_charts(bytes(data[:-1])))
+
+    data = bytearray(encode_chart(analyze_birth(1984, 1, 1, 0, True, False, "M")))
+    # 시지, 명궁, 국수, 순역행 바이트를 범위 밖 값으로 바꾼다.
+    for offset, value in ((12, 13), (13, 0), (14, 6), (16, 2)):
+        corrupted = bytearray(data)
+        corrupted[offset] = value
+        with pytest.raises(ValueError):
+            decode_chart(bytes(corrupted))
+        if offset > 12:
+            with pytest.raises(ValueError):
+                decode_core_fields(bytes(corrupted))
+
+
+def test_chart_codec_rejects_non_engine_charts() -> None:
+    chart = analyze_birth(1984, 1, 1, 0, True, False, "M")
+    for broken in ({"summary": "직접 입력"}, {**chart, "jami_direction": "?"}):
+        with pytest.raises(ChartEncodeError):
+            encode_chart(broken)
+
+
+def test_compact_wire_format(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    payload = {
+        "year": 1990,
+        "month": 6,
+        "day": 24,
+        "hour": 12,
+        "is_lunar": False,
+        "gender": "M",
+    }
+    headers = {"Accept": CHART_MEDIA_TYPE}
+    analyzed = client.post("/api/v1/birth/analyze", json=payload, headers=headers)
+    assert analyzed.headers["content-type"] == CHART_MEDIA_TYPE
+    expected = client.post("/api/v1/birth/analyze", json=payload).json()
+    assert {**decode_chart(analyzed.content).to_dict(), "chart_id": None} == expected
+
+    assert analyzed.headers["vary"] == "Accept"
+
+
+def test_saved_records_ignore_compact_accept(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    birth_info = {
+        "year": 1990,
+        "month": 6,
+        "day": 24,
+        "hour": 12,
+        "is_lunar": False,
+        "gender": "M",
+    }
+    chart_id = client.post("/api/v1/birth/charts", json=birth_info).json()["id"]
+    headers = {"Accept": CHART_MEDIA_TYPE}
+
+    # 이진 레코드에는 출생 정보와 저장 시각이 없으므로 저장 레코드는 JSON으로만 준다.
+    fetched = client.get(f"/api/v1/birth/charts/{chart_id}", headers=headers)
+    assert fetched.headers["content-type"] == "application/json"
+    assert fetched.json()["birth_info"]["gender"] == "M"
+    assert fetched.json()["created_at"]
+    listed = client.get("/api/v1/birth/charts", headers=headers)
+    assert listed.headers["content-type"] == "application/json"
+    assert [item["id"] for item in listed.json()] == [chart_id]
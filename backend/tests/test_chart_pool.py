@@ -0,0 +1,68 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.chart_import import import_charts
+from core.chart_pool import ChartPool
+from core.ming_pan import analyze_birth
+from core.storage import encode_stored_chart, list_charts
+
+BIRTHS = [
+    (1990 + index % 30, index % 12 + 1, index % 28 + 1, index % 24, index % 3 == 0, False)
+    for index in range(50)
+]
+# 2021년 양력 2월 29일은 없는 날짜이다.
+BIRTHS[17] = (2021, 2, 29, 0, False, False)
+
+
+def _expected(birth):
+    if birth == (2021, 2, 29, 0, False, False):
+        return None
+    return analyze_birth(*birth, "M")
+
+
+def test_pool_keeps_input_order_with_backpressure() -> None:
+    progress = []
+    with ChartPool(workers=2, shard_size=7, max_pending=2) as pool:
+        results = list(pool.imap(iter(BIRTHS), progress=progress.append))
+
+    assert results == [_expected(birth) for birth in BIRTHS]
+    assert progress == [7, 14, 21, 28, 35, 42, 49, 50]
+
+
+def test_pool_applies_encoder_in_workers() -> None:
+    with ChartPool(workers=2, shard_size=16) as pool:
+        encoded = list(pool.imap(BIRTHS, encoder=encode_stored_chart))
+    with ChartPool(workers=1, shard_size=16) as pool:
+        inline = list(pool.imap(BIRTHS, encoder=encode_stored_chart))
+
+    assert encoded == inline
+    assert encoded[17] is None
+    assert encoded[0] == encode_stored_chart(_expected(BIRTHS[0]))
+
+
+def test_import_charts_with_workers(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    lines = ["year,month,day,hour,is_lunar,gender"]
+    lines += [f"{y},{m},{d},{h},{str(lunar).lower()},F" for y, m, d, h, lunar, _ in BIRTHS]
+    lines.append("bad,1,1,0,false,F")
+    errors = io.StringIO()
+
+    result = import_charts(
+        io.StringIO("\n".join(lines) + "\n"),
+        "csv",
+        chunk_size=8,
+        db_path=db_path,
+        errors=errors,
+        workers=2,
+    )
+
+    assert result == (49, 2)
+    assert "19행: 유효하지 않은 날짜" in errors.getvalue()
+    charts = list_charts(limit=100, db_path=db_path)
+    assert [chart["birth_info"]["year"] for chart in reversed(charts)] == [
+        birth[0] for index, birth in enumerate(BIRTHS) if index != 17
+    ]
+    assert charts[0]["chart_data"] == analyze_birth(*BIRTHS[-1], "F")
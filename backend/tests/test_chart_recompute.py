@@ -0,0 +1,90 @@
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.chart_recompute import count_stale_charts, recompute_stale_charts
+from core.ming_pan import analyze_birth, get_engine_version
+from core.storage import (
+    get_chart,
+    get_chart_summary,
+    init_db,
+    save_chart,
+    save_charts_bulk,
+)
+
+
+def _make_stale(db_path: Path) -> None:
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT birth_key, chart_data FROM computed_charts").fetchall()
+        for birth_key, chart_json in rows:
+            chart = json.loads(chart_json)
+            if "lunar_date" in chart:
+                chart["summary"] = "이전 규칙의 요약"
+            conn.execute(
+                "UPDATE computed_charts SET chart_data = ?, engine_version = 'old' "
+                "WHERE birth_key = ?",
+                (json.dumps(chart, ensure_ascii=False), birth_key),
+            )
+
+
+def _stored_summaries(db_path: Path) -> list:
+    with sqlite3.connect(db_path) as conn:
+        return [
+            row[0]
+            for row in conn.execute(
+                "SELECT json_extract(chart_data, '$.summary') FROM computed_charts ORDER BY rowid"
+            )
+        ]
+
+
+def test_recompute_only_stale_rows_and_resume(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    init_db(db_path)
+    births = [(1990 + index, 6, 24, 12, False, False, "M") for index in range(5)]
+    ids = save_charts_bulk(
+        [({"gender": "M"}, analyze_birth(*birth)) for birth in births]
+        + [({"gender": "F"}, {"summary": "직접 저장"})],
+        db_path=db_path,
+    )
+    _make_stale(db_path)
+    assert count_stale_charts(db_path) == 6
+    # 재계산 전에도 읽기 경로는 현재 규칙의 결과를 돌려준다.
+    assert get_chart(ids[0], db_path)["chart_data"] == analyze_birth(*births[0])
+    assert get_chart_summary(ids[0], db_path)["summary"] == analyze_birth(*births[0])["summary"]
+
+    stop = threading.Event()
+    first = recompute_stale_charts(
+        db_path, batch_size=2, max_load=1, stop=stop, progress=lambda done: stop.set()
+    )
+    assert first == {"recomputed": 2, "batches": 1, "last_rowid": 2}
+    assert count_stale_charts(db_path) == 4
+
+    rest = recompute_stale_charts(db_path, batch_size=2, max_load=0.5)
+    assert rest["recomputed"] == 6 and rest["batches"] == 2
+    assert count_stale_charts(db_path) == 0
+    assert _stored_summaries(db_path)[:5] == [
+        analyze_birth(*birth)["summary"] for birth in births
+    ]
+    assert _stored_summaries(db_path)[5] == "직접 저장"
+    assert recompute_stale_charts(db_path)["batches"] == 0
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM recompute_state").fetchone()[0] == 0
+
+
+def test_save_replaces_stale_computed_row(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    init_db(db_path)
+    chart = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    save_chart({"gender": "M"}, chart, db_path)
+    _make_stale(db_path)
+
+    save_chart({"gender": "F"}, chart, db_path)
+    assert count_stale_charts(db_path) == 0
+    assert _stored_summaries(db_path) == [chart["summary"]]
+    with sqlite3.connect(db_path) as conn:
+        versions = conn.execute("SELECT engine_version FROM computed_charts").fetchall()
+    assert versions == [(get_engine_version(),)]
@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from core import metrics
+from core.ming_pan import clear_chart_cache
+from main import app
+
+client = TestClient(app)
+
+BIRTH_INFO = {
+    "year": 1990,
+    "month": 6,
+    "day": 24,
+    "hour": 12,
+    "is_lunar": False,
+    "is_intercalation": False,
+    "gender": "M",
+}
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    metrics.reset_metrics()
+    for seconds in (0.00002, 0.0003, 5.0):
+        metrics.observe_stage("test", seconds)
+    body = metrics.render_metrics()
+    assert 'jami_stage_duration_seconds_bucket{stage="test",le="2.5e-05"} 1' in body
+    assert 'jami_stage_duration_seconds_bucket{stage="test",le="0.0005"} 2' in body
+    assert 'jami_stage_duration_seconds_bucket{stage="test",le="+Inf"} 3' in body
+    assert 'jami_stage_duration_seconds_count{stage="test"} 3' in body
+    metrics.reset_metrics()
+
+
+def test_metrics_endpoint_reports_stages(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    metrics.reset_metrics()
+    clear_chart_cache()
+    metrics.set_enabled(True)
+    try:
+        client.post("/api/v1/birth/analyze", json=BIRTH_INFO)
+        client.post("/api/v1/birth/analyze", json=BIRTH_INFO)
+        chart_id = client.post("/api/v1/birth/charts", json=BIRTH_INFO).json()["id"]
+        client.get(f"/api/v1/birth/charts/{chart_id}")
+    finally:
+        metrics.set_enabled(False)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for stage in (
+        "lunar_conversion",
+        "chart_computation",
+        "summary",
+        "validation",
+        "storage.save_chart",
+        "storage.get_chart",
+    ):
+        assert f'jami_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert (
+        'jami_http_request_duration_seconds_count{method="GET",'
+        'route="/api/v1/birth/charts/{chart_id}"} 1'
+    ) in body
+    assert "jami_chart_cache_hits_total 2" in body
+    assert "jami_db_pool_created{" in body
+    metrics.reset_metrics()
+
+
+def test_metrics_disabled_records_nothing() -> None:
+    metrics.reset_metrics()
+    client.post("/api/v1/birth/analyze", json=BIRTH_INFO)
+    assert "jami_stage_duration_seconds_count" not in client.get("/metrics").text
+
+
+def test_metrics_enabled_reads_env_on_first_check(monkeypatch) -> None:
+    # main.py가 load_dotenv()를 부르기 전에 모듈을 불러와도 .env 설정이 적용된다.
+    monkeypatch.setattr(metrics, "_ENABLED", None)
+    monkeypatch.setenv("METRICS_ENABLED", "1")
+    assert metrics.enabled() is True
@@ -1,15 +1,23 @@
-﻿import sys
+﻿import copy
+import json
+import pickle
+import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import pytest
+
 from core.lunar_converter import convert_lunar_to_solar, convert_solar_to_lunar
 from core.ming_pan import (
+    ChartCache,
     analyze_birth,
     calculate_guo_shu,
+    clear_chart_cache,
     calculate_ming_gong,
     find_jami_position,
     get_branch_name,
+    get_chart_cache_stats,
     get_hour_branch,
     get_jami_direction,
     get_stem_branch_numbers,
@@ -33,6 +41,16 @@ def test_find_jami_position() -> None:
     assert bosu == 0
 
 
+def test_find_jami_position_matches_search() -> None:
+    for guo_shu in range(1, 6):
+        for day in range(1, 32):
+            bosu = 0
+            while (day + bosu) % guo_shu != 0:
+                bosu += 1
+            expected = (((day + bosu) // guo_shu - 1) % 12) + 1
+            assert find_jami_position(day, guo_shu) == (expected, bosu)
+
+
 def test_get_hour_branch() -> None:
     assert get_hour_branch(0) == 1
     assert get_hour_branch(1) == 2
@@ -70,6 +88,58 @@ def test_analyze_birth_lunar() -> None:
     assert zi_wei["palace_index"] == 1
 
 
+def test_analyze_birth_uses_cache() -> None:
+    clear_chart_cache()
+    first = analyze_birth(1984, 1, 1, 0, True, False, "M")
+    second = analyze_birth(1984, 1, 1, 23, True, False, "F")
+    assert first == second
+    assert first is not second
+    stats = get_chart_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_chart_cache_evicts_least_recently_used() -> None:
+    cache = ChartCache(max_size=2)
+    cache.put((1984, 1, 1, False, 1), {"summary": "a"})
+    cache.put((1984, 1, 2, False, 1), {"summary": "b"})
+    assert cache.get((1984, 1, 1, False, 1)) is not None
+    cache.put((1984, 1, 3, False, 1), {"summary": "c"})
+    assert cache.get((1984, 1, 2, False, 1)) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_chart_cannot_be_mutated_through_results() -> None:
+    clear_chart_cache()
+    chart = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    expected = json.dumps(chart, ensure_ascii=False)
+    with pytest.raises(TypeError):
+        chart["palace_layout"][0]["stars"].append("가짜")
+    with pytest.raises(TypeError):
+        chart["stars_data"][0]["palace_index"] = 99
+    with pytest.raises(TypeError):
+        chart["lunar_date"]["day"] = 1
+    chart["summary"] = "최상위 키는 호출마다 복사된다."
+    cached = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    assert json.dumps(cached, ensure_ascii=False) == expected
+
+    # 복사하거나 다른 프로세스로 보낸 명반은 수정할 수 있다.
+    for copied in (copy.deepcopy(cached), pickle.loads(pickle.dumps(cached))):
+        copied["palace_layout"][0]["stars"].append("가짜")
+        assert type(copied["palace_layout"]) is list
+    again = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    assert json.dumps(again, ensure_ascii=False) == expected
+
+
+def test_chart_cache_reads_size_on_first_use(monkeypatch) -> None:
+    cache = ChartCache()
+    monkeypatch.setenv("CHART_CACHE_SIZE", "1")
+    cache.put((1984, 1, 1, False, 1), {"summary": "a"})
+    cache.put((1984, 1, 2, False, 1), {"summary": "b"})
+    assert cache.stats()["max_size"] == 1
+    assert cache.stats()["size"] == 1
+
+
 def test_lunar_conversion_round_trip() -> None:
     lunar = convert_solar_to_lunar(2020, 1, 25)
     assert (lunar.month, lunar.day) == (1, 1)
@@ -77,3 +147,32 @@ def test_lunar_conversion_round_trip() -> None:
         lunar.year, lunar.month, lunar.day, lunar.is_intercalation
     )
     assert (solar.year, solar.month, solar.day) == (2020, 1, 25)
+
+
+def test_solar_to_lunar_intercalation() -> None:
+    lunar = convert_solar_to_lunar(2020, 5, 23)
+    assert (lunar.year, lunar.month, lunar.day) == (2020, 4, 1)
+    assert lunar.is_intercalation is True
+
+
+def test_solar_to_lunar_out_of_range() -> None:
+    with pytest.raises(ValueError):
+        convert_solar_to_lunar(2051, 1, 1)
+    with pytest.raises(ValueError):
+        convert_solar_to_lunar(2021, 2, 29)
+
+
+def test_lunar_to_solar_intercalation() -> None:
+    regular = convert_lunar_to_solar(2020, 4, 1, False)
+    leap = convert_lunar_to_solar(2020, 4, 1, True)
+    assert (regular.year, regular.month, regular.day) == (2020, 4, 23)
+    assert (leap.year, leap.month, leap.day) == (2020, 5, 23)
+
+
+def test_lunar_to_solar_rejects_impossible_dates() -> None:
+    with pytest.raises(ValueError):
+        convert_lunar_to_solar(2020, 2, 30)
+    with pytest.raises(ValueError):
+        convert_lunar_to_solar(2021, 4, 1, True)
+    with pytest.raises(ValueError):
+        convert_lunar_to_solar(2050, 12, 1)
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.ming_pan import analyze_birth
+from core.ming_pan_batch import analyze_births
+
+
+def test_analyze_births_matches_scalar() -> None:
+    inputs = [
+        (1984, 1, 1, 0, True, False),
+        (2020, 4, 15, 23, True, True),
+        (1990, 6, 24, 12, False, False),
+        (2020, 5, 23, 7, False, False),
+        (2000, 2, 29, 13, False, False),
+    ]
+    batch = analyze_births(*zip(*inputs))
+    assert len(batch) == len(inputs)
+    for index, row in enumerate(inputs):
+        assert batch.to_dict(index) == analyze_birth(*row, gender="M")
+    assert len(list(batch.iter_dicts())) == len(inputs)
+
+
+def test_analyze_births_marks_invalid_rows() -> None:
+    batch = analyze_births(
+        [2021, 2051, 1990], [2, 1, 6], [29, 1, 24], [0, 0, 0],
+        [False, False, False], [False, False, False],
+    )
+    assert batch.valid.tolist() == [False, False, True]
+    assert batch.star_palaces.shape == (3, 14)
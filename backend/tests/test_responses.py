@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from api.responses import encode_chart, encode_chart_record
+from core.ming_pan import analyze_birth
+from main import app
+from models.schemas import BirthInfo, ChartRecord, ChartResponse
+
+client = TestClient(app)
+
+BIRTH_INPUTS = [
+    (1984, 1, 1, 0, True, False),
+    (2020, 4, 15, 23, True, True),
+    (1990, 6, 24, 12, False, False),
+    (2000, 2, 29, 13, False, False),
+    (1955, 11, 30, 7, False, False),
+]
+
+
+@pytest.mark.parametrize("birth", BIRTH_INPUTS)
+def test_encode_chart_matches_pydantic(birth: tuple) -> None:
+    result = analyze_birth(*birth, gender="M")
+    expected = ChartResponse(**result).model_dump_json().encode()
+    assert encode_chart(result) == expected
+    stored = json.loads(json.dumps(result, ensure_ascii=False))
+    assert encode_chart(stored) == expected
+
+
+def test_encode_chart_record_matches_pydantic() -> None:
+    birth_info = BirthInfo(
+        year=1990, month=6, day=24, hour=12, is_lunar=False, gender="F"
+    )
+    result = analyze_birth(1990, 6, 24, 12, False, False, gender="F")
+    record = {
+        "id": 7,
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "birth_info": birth_info.model_dump(),
+        "chart_data": result,
+    }
+    expected = ChartRecord(
+        id=7,
+        created_at=record["created_at"],
+        birth_info=birth_info,
+        chart_data=ChartResponse(**result, chart_id=7),
+    )
+    assert encode_chart_record(record) == expected.model_dump_json().encode()
+
+
+def test_fast_routes_match_validated_routes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "charts.db"))
+    payload = {
+        "year": 1990,
+        "month": 6,
+        "day": 24,
+        "hour": 12,
+        "is_lunar": False,
+        "gender": "M",
+    }
+    created = client.post("/api/v1/birth/charts", json=payload)
+    chart_id = created.json()["id"]
+    urls = [f"/api/v1/birth/charts/{chart_id}", "/api/v1/birth/charts"]
+
+    slow = [client.get(url).content for url in urls]
+    slow_analyze = client.post("/api/v1/birth/analyze", json=payload).content
+    monkeypatch.setenv("FAST_RESPONSES", "1")
+    fast = [client.get(url).content for url in urls]
+    fast_analyze = client.post("/api/v1/birth/analyze", json=payload).content
+    fast_created = client.post("/api/v1/birth/charts", json=payload)
+
+    assert fast == slow
+    assert fast_analyze == slow_analyze
+    assert fast_created.status_code == 201
+    assert fast_created.json()["chart_data"] == {
+        **created.json()["chart_data"],
+        "chart_id": fast_created.json()["id"],
+    }
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import startup_report
+
+
+def test_mark_records_each_milestone_once() -> None:
+    assert startup_report.mark("test_milestone") is True
+    first = startup_report.get_startup_report()["milestones"]["test_milestone"]
+    assert startup_report.mark("test_milestone") is False
+    assert startup_report.get_startup_report()["milestones"]["test_milestone"] == first
+    assert first > 0
+
+    with startup_report.phase("test_phase"):
+        pass
+    assert startup_report.get_startup_report()["phases"]["test_phase"] >= 0
+
+
+def test_importing_app_defers_numpy() -> None:
+    completed = subprocess.run(
+        [sys.executable, "-c", "import sys, main; print('numpy' in sys.modules)"],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.strip() == "False"
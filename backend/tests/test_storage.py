@@ -1,9 +1,33 @@
-﻿import sys
+﻿import asyncio
+import io
+import json
+import sqlite3
+import sys
+import threading
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from core.storage import delete_chart, get_chart, init_db, list_charts, save_chart
+from core.async_storage import AsyncChartStorage
+from core.chart_import import import_charts
+from core.ming_pan import analyze_birth
+from core.storage import (
+    ChartSearch,
+    ChartStorage,
+    delete_chart,
+    get_chart,
+    get_storage,
+    init_db,
+    list_chart_summaries,
+    list_charts,
+    save_chart,
+    save_charts_bulk,
+    search_charts,
+)
+from core.storage_migration import migrate_legacy_db
+from core.write_behind import ChartWriteBehind
 
 
 def test_storage_round_trip(tmp_path: Path) -> None:
@@ -37,3 +61,349 @@ def test_storage_round_trip(tmp_path: Path) -> None:
 
     deleted = delete_chart(record["id"], db_path)
     assert deleted is True
+
+
+def test_storage_reuses_pooled_connections(tmp_path: Path) -> None:
+    storage = ChartStorage(tmp_path / "nested" / "charts.db", pool_size=2)
+    storage.init_schema()
+    for _ in range(5):
+        storage.save_chart({"year": 1990}, {"summary": "test"})
+    assert len(storage.list_charts(limit=10)) == 5
+    assert storage.stats()["created"] == 1
+    with storage.connection() as conn:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+    storage.close()
+    assert storage.stats()["idle"] == 0
+
+
+def test_get_storage_is_cached_per_path(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    assert get_storage(db_path) is get_storage(db_path)
+
+
+def test_list_charts_keyset_and_summaries(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    ids = [
+        save_chart(
+            {"year": 1990},
+            {"summary": f"chart {index}", "ming_gong": 1, "guo_shu": 2, "jami_position": 3},
+            db_path,
+        )["id"]
+        for index in range(5)
+    ]
+
+    page = list_charts(limit=2, before_id=ids[3], db_path=db_path)
+    assert [record["id"] for record in page] == [ids[2], ids[1]]
+
+    summaries = list_chart_summaries(limit=10, db_path=db_path)
+    assert [record["id"] for record in summaries] == ids[::-1]
+    assert summaries[0]["summary"] == "chart 4"
+    assert summaries[0]["guo_shu"] == 2
+    assert "chart_data" not in summaries[0]
+
+
+def test_save_chart_dedupes_by_birth_key(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    chart_data = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    first = save_chart({"year": 1990, "gender": "M"}, chart_data, db_path)
+    second = save_chart({"year": 1990, "gender": "F"}, chart_data, db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        computed = conn.execute("SELECT chart_data FROM computed_charts").fetchall()
+    assert len(computed) == 1
+    assert "stars_meta" not in json.loads(computed[0][0])
+
+    fetched = get_chart(second["id"], db_path)
+    assert fetched is not None
+    assert fetched["chart_data"] == chart_data
+    assert fetched["birth_info"]["gender"] == "F"
+
+    assert delete_chart(first["id"], db_path) is True
+    assert get_chart(second["id"], db_path) is not None
+
+
+def test_save_chart_survives_concurrent_delete(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    chart_data = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    first = save_chart({"year": 1990}, chart_data, db_path)
+    storage = get_storage(db_path)
+    deleter = threading.Thread(target=storage.delete_chart, args=(first["id"],))
+
+    def delete_before_chart_insert(statement: str) -> None:
+        # 같은 출생 키의 마지막 차트를 다른 연결에서 지우고, 잠금에 막히면 기다리지 않는다.
+        if statement.startswith("INSERT INTO charts") and deleter.ident is None:
+            deleter.start()
+            deleter.join(0.2)
+
+    with storage.connection() as conn:
+        conn.set_trace_callback(lambda sql: delete_before_chart_insert(sql.strip()))
+    try:
+        second = save_chart({"year": 1990}, chart_data, db_path)
+    finally:
+        deleter.join()
+        with storage.connection() as conn:
+            conn.set_trace_callback(None)
+
+    assert get_chart(first["id"], db_path) is None
+    fetched = get_chart(second["id"], db_path)
+    assert fetched is not None
+    assert fetched["chart_data"] == chart_data
+
+
+def test_migrate_legacy_db(tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy.db"
+    chart_data = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE charts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                birth_payload TEXT NOT NULL,
+                chart_data TEXT NOT NULL
+            )
+            """
+        )
+        for payload in ({"gender": "M"}, {"gender": "F"}, {"gender": "X"}):
+            conn.execute(
+                "INSERT INTO charts (created_at, birth_payload, chart_data) VALUES (?, ?, ?)",
+                ("2024-01-01", json.dumps(payload), json.dumps(chart_data, ensure_ascii=False)),
+            )
+        conn.execute("DELETE FROM charts WHERE id = 3")
+
+    assert migrate_legacy_db(db_path) == 2
+    assert migrate_legacy_db(db_path) == 0
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM computed_charts").fetchone()[0] == 1
+    assert get_chart(2, db_path)["chart_data"] == chart_data
+    assert save_chart({"gender": "M"}, chart_data, db_path)["id"] == 4
+
+
+def test_save_charts_bulk_returns_ids_in_order(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    existing = save_chart({"year": 1990}, {"summary": "first"}, db_path)
+    items = [({"year": 1990 + index}, {"summary": f"bulk {index % 2}"}) for index in range(5)]
+
+    ids = save_charts_bulk(items, chunk_size=2, db_path=db_path)
+
+    assert ids == list(range(existing["id"] + 1, existing["id"] + 6))
+    assert get_chart(ids[3], db_path)["birth_info"]["year"] == 1993
+    assert get_chart(ids[3], db_path)["chart_data"]["summary"] == "bulk 1"
+
+
+def test_import_charts_from_csv_and_ndjson(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    csv_text = (
+        "year,month,day,hour,is_lunar,gender\n"
+        "1990,6,24,12,false,M\n"
+        "2021,2,29,0,false,F\n"
+        "1984,1,1,0,true,F\n"
+    )
+    errors = io.StringIO()
+    assert import_charts(io.StringIO(csv_text), "csv", db_path=db_path, errors=errors) == (2, 1)
+    assert "3행" in errors.getvalue()
+
+    ndjson_text = '{"year": 1990, "month": 6, "day": 24, "hour": 12, "is_lunar": false, "gender": "M"}\nnot json\n'
+    assert import_charts(io.StringIO(ndjson_text), "ndjson", db_path=db_path, errors=errors) == (1, 1)
+    charts = list_charts(limit=10, db_path=db_path)
+    assert len(charts) == 3
+    assert charts[0]["chart_data"] == analyze_birth(1990, 6, 24, 12, False, False, "M")
+
+
+def test_import_charts_validates_rows_like_birth_info(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    csv_text = (
+        "year,month,day,hour,is_lunar,gender\n"
+        f"1990,6,24,12,false,{'M' * 40}\n"
+        '1990,6,24,12,banana,"M\nF"\n'
+        "1990,6,24,12,yes,F\n"
+    )
+    errors = io.StringIO()
+    assert import_charts(io.StringIO(csv_text), "csv", db_path=db_path, errors=errors) == (1, 2)
+    assert errors.getvalue().startswith("2행")
+    assert "\n4행" in errors.getvalue()
+    assert list_charts(limit=10, db_path=db_path)[0]["birth_info"]["is_lunar"] is True
+
+
+def test_async_storage_round_trip(tmp_path: Path) -> None:
+    storage = AsyncChartStorage(get_storage(tmp_path / "charts.db"), read_workers=2)
+
+    async def run() -> None:
+        record = await storage.save_chart({"year": 1990}, {"summary": "async"})
+        fetched = await storage.get_chart(record["id"])
+        assert fetched is not None
+        assert fetched["chart_data"]["summary"] == "async"
+        assert len(await storage.list_charts(limit=5)) == 1
+        assert await storage.delete_chart(record["id"]) is True
+
+    asyncio.run(run())
+    storage.close()
+
+
+def test_write_behind_group_commits_reserved_ids(tmp_path: Path) -> None:
+    storage = get_storage(tmp_path / "charts.db")
+    existing = storage.save_chart({"year": 1989}, {"summary": "sync"})
+    writer = ChartWriteBehind(storage, flush_interval=0.05, max_batch=3, id_block=4)
+
+    records = [
+        writer.submit({"year": 1990 + index}, {"summary": f"queued {index}"})
+        for index in range(5)
+    ]
+    ids = [record["id"] for record in records]
+    assert ids == list(range(existing["id"] + 1, existing["id"] + 6))
+    # 예약 구간 뒤에서 동기 저장이 일어나도 ID가 겹치지 않는다.
+    assert storage.save_chart({"year": 2000}, {"summary": "sync"})["id"] > ids[-1]
+
+    writer.close()
+    assert writer.stats()["written"] == 5
+    assert writer.stats()["batches"] >= 2
+    assert writer.get_pending(ids[0]) is None
+    assert storage.get_chart(ids[4])["chart_data"]["summary"] == "queued 4"
+
+
+def test_write_behind_retries_and_keeps_failed_records(tmp_path: Path) -> None:
+    storage = get_storage(tmp_path / "charts.db")
+    insert_charts = storage.insert_charts
+    calls = []
+
+    def flaky_insert(records: list) -> None:
+        calls.append(len(records))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        if any(record["birth_info"].get("poison") for record in records):
+            raise sqlite3.IntegrityError("poison")
+        insert_charts(records)
+
+    storage.insert_charts = flaky_insert
+    writer = ChartWriteBehind(
+        storage, flush_interval=0.05, max_batch=10, retries=1, retry_delay=0.01
+    )
+    good = writer.submit({"year": 1990}, {"summary": "good"})
+    writer.flush()
+    assert writer.stats()["retried"] == 1
+    assert storage.get_chart(good["id"]) is not None
+
+    records = [
+        writer.submit({"year": 1991, "poison": index == 1}, {"summary": str(index)})
+        for index in range(3)
+    ]
+    writer.close()
+
+    stats = writer.stats()
+    assert (stats["written"], stats["failed"]) == (3, 1)
+    assert storage.get_chart(records[0]["id"]) is not None
+    assert storage.get_chart(records[2]["id"]) is not None
+    with storage.connection() as conn:
+        failed = conn.execute("SELECT id, error FROM chart_write_failures").fetchall()
+    assert [row["id"] for row in failed] == [records[1]["id"]]
+    assert "poison" in failed[0]["error"]
+
+
+def test_write_behind_saves_synchronously_when_queue_is_full(tmp_path: Path) -> None:
+    storage = get_storage(tmp_path / "charts.db")
+    insert_charts = storage.insert_charts
+    entered = threading.Event()
+    release = threading.Event()
+
+    def blocking_insert(records: list) -> None:
+        if threading.current_thread().name == "chart-write-behind":
+            entered.set()
+            release.wait(5)
+        insert_charts(records)
+
+    storage.insert_charts = blocking_insert
+    writer = ChartWriteBehind(storage, flush_interval=0.01, max_queue=1)
+    first = writer.submit({"year": 1990}, {"summary": "first"})
+    assert entered.wait(5)
+    queued = writer.submit({"year": 1991}, {"summary": "queued"})
+    overflow = writer.submit({"year": 1992}, {"summary": "overflow"})
+
+    assert writer.stats()["overflow"] == 1
+    assert writer.get_pending(overflow["id"]) is None
+    assert storage.get_chart(overflow["id"]) is not None
+    assert writer.get_pending(queued["id"]) is not None
+
+    release.set()
+    writer.close()
+    assert storage.get_chart(first["id"]) is not None
+    assert storage.get_chart(queued["id"]) is not None
+    with pytest.raises(RuntimeError):
+        writer.submit({"year": 1993}, {"summary": "late"})
+
+
+def test_search_charts_by_generated_columns(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    charts = [analyze_birth(1990, 3, day, 12, False, False, "M") for day in range(1, 29)]
+    save_charts_bulk(
+        (({"day": index}, chart) for index, chart in enumerate(charts)), db_path=db_path
+    )
+    save_chart({"day": 0}, charts[0], db_path)
+
+    def in_ming_gong(chart: dict, star: str) -> bool:
+        return star in chart["palace_layout"][chart["ming_gong"] - 1]["stars"]
+
+    result = search_charts(ChartSearch(star="자미"), group_by="guo_shu", db_path=db_path)
+    expected = [chart for chart in charts if in_ming_gong(chart, "자미")]
+    expected += [charts[0]] if in_ming_gong(charts[0], "자미") else []
+    assert result["count"] == len(expected)
+    assert sum(group["count"] for group in result["groups"]) == len(expected)
+
+    result = search_charts(ChartSearch(star="파군", star_palace=5), limit=0, db_path=db_path)
+    assert result["count"] == sum(
+        "파군" in chart["palace_layout"][4]["stars"] for chart in charts
+    ) + ("파군" in charts[0]["palace_layout"][4]["stars"])
+    assert result["items"] == []
+
+    lunar = charts[3]["lunar_date"]
+    result = search_charts(
+        ChartSearch(lunar_year=lunar["year"], lunar_month=lunar["month"], lunar_day=lunar["day"]),
+        db_path=db_path,
+    )
+    assert [item["birth_info"] for item in result["items"]] == [{"day": 3}]
+
+
+def test_init_schema_adds_search_columns_to_existing_db(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE computed_charts (birth_key TEXT PRIMARY KEY, "
+        "chart_data TEXT NOT NULL, constant_sections TEXT NOT NULL DEFAULT '')"
+    )
+    conn.execute(
+        "INSERT INTO computed_charts VALUES ('k', ?, '')",
+        (json.dumps({"ming_gong": 7, "guo_shu": 2}),),
+    )
+    conn.commit()
+    conn.close()
+
+    storage = ChartStorage(db_path)
+    storage.init_schema()
+    with storage.connection() as conn:
+        row = conn.execute("SELECT ming_gong, guo_shu FROM computed_charts").fetchone()
+    assert tuple(row) == (7, 2)
+    storage.close()
+
+
+def test_lazy_record_and_summary_projection(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    chart_data = analyze_birth(1990, 6, 24, 12, False, False, "M")
+    saved = save_chart({"gender": "M"}, chart_data, db_path)
+
+    record = get_chart(saved["id"], db_path)
+    assert record._decoded == {}
+    assert record["id"] == saved["id"]
+    assert record._decoded == {}
+    assert record["chart_data"] == chart_data
+    assert set(record._decoded) == {"chart_data"}
+    assert record == saved
+
+    assert get_storage(db_path).get_chart_summary(saved["id"]) == {
+        "id": saved["id"],
+        "summary": chart_data["summary"],
+        "ming_gong": chart_data["ming_gong"],
+        "guo_shu": chart_data["guo_shu"],
+        "jami_position": chart_data["jami_position"],
+    }
+    assert get_storage(db_path).get_chart_summary(saved["id"] + 1) is None